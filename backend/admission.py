@@ -0,0 +1,204 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+
+from starlette.responses import JSONResponse
+
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_WAIT
+
+# Admission control for the task routes, so overload is turned away at the door
+# instead of piling up on the threadpool and the SQLite write lock.
+#
+# Reads (GET/HEAD) and writes (everything else) each get a concurrency limit:
+# at most TODO_ADMISSION_{READ,WRITE}_CONCURRENCY run at once, up to
+# TODO_ADMISSION_{READ,WRITE}_QUEUE more wait in line (first come, first served)
+# for at most TODO_ADMISSION_QUEUE_TIMEOUT_MS, and the rest get 503 with
+# Retry-After right away. SQLite has one writer, so a handful of concurrent
+# writes already keeps it busy; the default read limit is much higher.
+#
+# With TODO_RATE_LIMIT_PER_SECOND set, each client also has a token bucket of
+# TODO_RATE_LIMIT_BURST requests refilled at that rate; a client that empties it
+# gets 429 with the seconds until its next token. Clients are told apart by
+# address, or by X-API-Key when the key is one of TODO_API_KEYS: an unchecked
+# key could be made up afresh for every request to get a full bucket each time.
+#
+# All of this is per process: with N workers the effective limits are N times higher.
+# The event stream (/tasks/stream, /tasks/ws) is long-lived and not limited.
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+READ_CONCURRENCY = _env_int("TODO_ADMISSION_READ_CONCURRENCY", 32) # 0 disables the limit
+WRITE_CONCURRENCY = _env_int("TODO_ADMISSION_WRITE_CONCURRENCY", 4)
+READ_QUEUE = _env_int("TODO_ADMISSION_READ_QUEUE", 256)
+WRITE_QUEUE = _env_int("TODO_ADMISSION_WRITE_QUEUE", 64)
+QUEUE_TIMEOUT = _env_int("TODO_ADMISSION_QUEUE_TIMEOUT_MS", 1000) / 1000
+RETRY_AFTER = _env_int("TODO_ADMISSION_RETRY_AFTER", 1)
+RATE_LIMIT = float(os.getenv("TODO_RATE_LIMIT_PER_SECOND", "0")) # 0 disables rate limiting
+RATE_LIMIT_BURST = float(os.getenv("TODO_RATE_LIMIT_BURST", "0")) or 2 * RATE_LIMIT
+RATE_LIMIT_MAX_CLIENTS = _env_int("TODO_RATE_LIMIT_MAX_CLIENTS", 10000)
+API_KEYS = frozenset(key.strip() for key in os.getenv("TODO_API_KEYS", "").split(",") if key.strip())
+
+API_KEY_HEADER = b"x-api-key"
+LIMITED_PREFIX = "/tasks"
+UNLIMITED_PATHS = frozenset({"/tasks/stream"})
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class Overloaded(Exception):
+    """No concurrency slot is free and the queue is full, or the wait timed out."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimit:
+    """At most `limit` holders at once; up to `max_queue` more wait in order for `timeout` seconds.
+
+    Only used from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, kind: str, limit: int, max_queue: int, timeout: float = QUEUE_TIMEOUT):
+        self.kind = kind
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._in_flight = ADMISSION_IN_FLIGHT.labels(kind)
+        self._queued = ADMISSION_QUEUED.labels(kind)
+        self._wait = ADMISSION_WAIT.labels(kind)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._in_flight.inc()
+            self._wait.observe(0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Overloaded("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._queued.inc()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # release() may have handed us the slot just as we gave up: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise Overloaded("queue_timeout") from None
+        finally:
+            self._queued.dec()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self._wait.observe(time.perf_counter() - start)
+
+    def release(self) -> None:
+        # Hand the slot straight to the first waiter still waiting, so newcomers cannot jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+        self._in_flight.dec()
+
+
+class RateLimiter:
+    """Token bucket per client: `burst` requests at once, refilled at `rate` per second."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        # client -> [tokens, last refill]; the least recently seen clients are forgotten first
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def acquire(self, client: str, now: Optional[float] = None) -> float:
+        """Takes a token; returns 0, or the seconds until the client has one if it is out."""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [self.burst, now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate
+
+
+def client_key(scope, api_keys: frozenset = API_KEYS) -> str:
+    if api_keys:
+        for name, value in scope["headers"]:
+            if name == API_KEY_HEADER and value.decode("latin-1") in api_keys:
+                return "key:" + value.decode("latin-1")
+    client = scope.get("client")
+    return "addr:" + (client[0] if client else "unknown")
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying the rate limit, then the read or write concurrency limit."""
+
+    def __init__(self, app, read_concurrency: int = READ_CONCURRENCY, write_concurrency: int = WRITE_CONCURRENCY,
+                 read_queue: int = READ_QUEUE, write_queue: int = WRITE_QUEUE, queue_timeout: float = QUEUE_TIMEOUT,
+                 rate: float = RATE_LIMIT, burst: float = RATE_LIMIT_BURST, retry_after: int = RETRY_AFTER,
+                 api_keys: frozenset = API_KEYS):
+        self.app = app
+        self.limits = {
+            "read": ConcurrencyLimit("read", read_concurrency, read_queue, queue_timeout) if read_concurrency else None,
+            "write": ConcurrencyLimit("write", write_concurrency, write_queue, queue_timeout) if write_concurrency else None,
+        }
+        self.rate_limiter = RateLimiter(rate, burst) if rate > 0 else None
+        self.retry_after = retry_after
+        self.api_keys = api_keys
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith(LIMITED_PREFIX) or path in UNLIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        kind = "read" if scope["method"] in READ_METHODS else "write"
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.acquire(client_key(scope, self.api_keys))
+            if wait:
+                ADMISSION_REJECTED.labels(kind, "rate_limited").inc()
+                await _reject(scope, receive, send, 429, "Rate limit exceeded", math.ceil(wait))
+                return
+
+        limit = self.limits[kind]
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await limit.acquire()
+        except Overloaded as e:
+            ADMISSION_REJECTED.labels(kind, e.reason).inc()
+            await _reject(scope, receive, send, 503, "Server busy, retry later", self.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
+
+
+async def _reject(scope, receive, send, status: int, detail: str, retry_after: int) -> None:
+    response = JSONResponse({"detail": detail}, status_code=status, headers={"Retry-After": str(retry_after)})
+    await response(scope, receive, send)
@@ -0,0 +1,136 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, select
+
+from . import models
+from .crud import allocate_change_seqs_stmt
+from .database import DATABASE_URL, make_engine
+
+# Hot/cold split of tasks: completed tasks untouched for TODO_ARCHIVE_AFTER_DAYS
+# move from tasks to tasks_archive, so the live table and its indexes only hold
+# what clients mostly work with. GET /tasks/{id} still finds archived tasks,
+# lists include them with include_archived=true, search and GET /tasks/stats
+# count them as before, and writing to one moves it back (see crud.unarchive_task).
+#
+# Candidates are found with plain reads; each batch of TODO_ARCHIVE_BATCH_SIZE
+# is then moved in its own short transaction, with a TODO_ARCHIVE_PAUSE_MS pause
+# between batches so API writes get the lock in between.
+#
+# With TODO_ARCHIVE_AFTER_DAYS set, the app runs a pass every
+# TODO_ARCHIVE_INTERVAL_SECONDS; `python -m backend.archive --days N` runs one now.
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("TODO_ARCHIVE_AFTER_DAYS", "0")) # 0 disables the background archiver
+ARCHIVE_BATCH_SIZE = int(os.getenv("TODO_ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_PAUSE = int(os.getenv("TODO_ARCHIVE_PAUSE_MS", "50")) / 1000
+ARCHIVE_INTERVAL = int(os.getenv("TODO_ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+log = logging.getLogger(__name__)
+
+
+def _archivable(cutoff: datetime):
+    task = models.Task
+    return (
+        task.completed.is_(True),
+        func.coalesce(task.updated_at, task.created_at) < cutoff,
+    )
+
+def find_candidates(connection, cutoff: datetime, after_id: int = 0, batch_size: int = ARCHIVE_BATCH_SIZE) -> List[int]:
+    """IDs of the next tasks to archive after `after_id`, read without taking the write lock."""
+    task = models.Task
+    return list(connection.scalars(
+        select(task.id).where(task.id > after_id, *_archivable(cutoff)).order_by(task.id).limit(batch_size)
+    ))
+
+def archive_batch(connection, task_ids: List[int], cutoff: datetime) -> int:
+    """Moves the tasks among `task_ids` that are still archivable; returns how many moved.
+
+    Run inside a transaction. The conditions are checked again by the DELETE, so
+    a task changed since it was found stays live.
+    """
+    task = models.Task
+    rows = connection.execute(
+        delete(task)
+        .where(task.id.in_(task_ids), *_archivable(cutoff))
+        .returning(*(getattr(task, name) for name in models.ARCHIVED_COLUMNS))
+    ).all()
+    if rows:
+        # The owners' lists changed, so the moved tasks get a new change seq, which
+        # moves those users' list versions (crud.get_user_change_seq) and no one else's
+        seq = connection.execute(allocate_change_seqs_stmt(1)).scalar_one()
+        connection.execute(insert(models.ArchivedTask), [dict(row._mapping, change_seq=seq) for row in rows])
+    return len(rows)
+
+def archive_completed(
+    engine, older_than: timedelta, batch_size: int = ARCHIVE_BATCH_SIZE, pause: float = ARCHIVE_PAUSE,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """Archives every completed task last updated before `older_than` ago; returns how many moved."""
+    cutoff = datetime.utcnow() - older_than
+    start = time.perf_counter()
+    archived = after_id = 0
+    while stop is None or not stop.is_set():
+        with engine.connect() as connection:
+            task_ids = find_candidates(connection, cutoff, after_id, batch_size)
+        if not task_ids:
+            break
+        with engine.begin() as connection:
+            moved = archive_batch(connection, task_ids, cutoff)
+        archived += moved
+        after_id = task_ids[-1]
+        time.sleep(pause)
+    if archived:
+        log.info(f"Archived {archived} completed tasks in {time.perf_counter() - start:.2f}s")
+    return archived
+
+
+class Archiver:
+    """Background thread that archives old completed tasks every `interval` seconds."""
+
+    def __init__(self, engines, older_than: timedelta, interval: float = ARCHIVE_INTERVAL):
+        self.engines = engines # () -> engines to archive in
+        self.older_than = older_than
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="task-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for engine in self.engines():
+                try:
+                    archive_completed(engine, self.older_than, stop=self._stop)
+                except Exception as e:
+                    log.error(f"Archiving failed: {e}")
+            self._stop.wait(self.interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old completed tasks to the tasks_archive table.")
+    parser.add_argument("--url", default=DATABASE_URL, help="Database URL (default: TODO_DATABASE_URL)")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS or 30,
+                        help="Archive tasks completed and unchanged for this many days")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Tasks moved per transaction")
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    archived = archive_completed(engine, timedelta(days=args.days), batch_size=args.batch_size)
+    print(f"Archived {archived} tasks")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence
+
+from fastapi import Request, Response
+from . import schemas
+from .metrics import serialization_timer
+from .responses import dumps, rows_to_dicts
+
+# Read-through cache for serialized task responses.
+#
+# Keys:
+#   task:{user}:{id}           one task, deleted when that task is written
+#   list:{generation}:{etag}   one user's list query at one version of the user's tasks
+#                              (crud.get_user_change_seq); a write to them moves the
+#                              version, so their stale list entries are never read again
+#                              and age out, while other users' entries stay valid
+#
+# Both carry their ETag, and readers only use entries matching the ETag of the data
+# they can see, so a lagging read replica cannot serve or store newer-looking data.
+# The generation is only bumped by clear(), to drop every entry at once.
+#
+# Configured with TODO_CACHE_BACKEND=none|memory|redis (default none). The memory
+# backend is per process, so only use it with a single worker; use redis otherwise.
+
+CACHE_BACKEND = os.getenv("TODO_CACHE_BACKEND", "none").lower()
+CACHE_URL = os.getenv("TODO_CACHE_URL", "redis://localhost:6379/0")
+CACHE_TTL = float(os.getenv("TODO_CACHE_TTL", "60"))
+CACHE_MAXSIZE = int(os.getenv("TODO_CACHE_MAXSIZE", "10000"))
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+
+    def to_response(self) -> Response:
+        return Response(content=self.body, media_type="application/json", headers=self.headers)
+
+
+class NullCache:
+    """Cache that stores nothing; used when caching is disabled."""
+    enabled = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return None
+
+    def set(self, key: str, value: CachedResponse, generation: int) -> None:
+        pass
+
+    def delete(self, keys: Iterable[str]) -> None:
+        pass
+
+    def generation(self) -> int:
+        return 0
+
+    def bump_generation(self) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "none", "hits": self.hits, "misses": self.misses}
+
+
+class LRUCache(NullCache):
+    """In-process LRU cache with a per-entry TTL."""
+    enabled = True
+
+    def __init__(self, maxsize: int = CACHE_MAXSIZE, ttl: float = CACHE_TTL):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation):
+        with self._lock:
+            # A write happened while the value was being built: it may be stale
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def generation(self):
+        return self._generation
+
+    def bump_generation(self):
+        with self._lock:
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        return {"backend": "memory", "hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class RedisCache(NullCache):
+    """Cache shared between workers in a Redis-compatible server."""
+    enabled = True
+    GENERATION_KEY = "todo:cache:generation"
+
+    def __init__(self, url: str = CACHE_URL, ttl: float = CACHE_TTL):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("TODO_CACHE_BACKEND=redis requires the 'redis' package") from e
+        super().__init__()
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._client.get(f"todo:cache:{key}")
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        data = json.loads(raw)
+        return CachedResponse(body=data["b"].encode(), headers=data["h"])
+
+    def set(self, key, value, generation):
+        # Best effort: a write between this check and the SET can still slip through,
+        # which the TTL bounds.
+        if generation != self.generation():
+            return
+        raw = json.dumps({"b": value.body.decode(), "h": value.headers})
+        self._client.set(f"todo:cache:{key}", raw, px=int(self.ttl * 1000))
+
+    def delete(self, keys):
+        keys = [f"todo:cache:{key}" for key in keys]
+        if keys:
+            self._client.delete(*keys)
+
+    def generation(self):
+        return int(self._client.get(self.GENERATION_KEY) or 0)
+
+    def bump_generation(self):
+        self._client.incr(self.GENERATION_KEY)
+
+    def clear(self):
+        self.bump_generation()
+
+    def stats(self):
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+def make_cache(backend: str = CACHE_BACKEND) -> NullCache:
+    if backend == "memory":
+        return LRUCache()
+    if backend == "redis":
+        return RedisCache()
+    return NullCache()
+
+
+cache = make_cache()
+
+def set_cache(new_cache: NullCache) -> None:
+    """Swaps the active cache (used by tests and benchmarks)."""
+    global cache
+    cache = new_cache
+
+def get_cache() -> NullCache:
+    return cache
+
+
+def task_key(user_id: int, task_id: int) -> str:
+    # Includes the owner: with a database per tenant, task IDs repeat across users
+    return f"task:{user_id}:{task_id}"
+
+def list_key(generation: int, etag: str) -> str:
+    return f"list:{generation}:{etag}"
+
+
+def query_key(request: Request) -> str:
+    """Normalizes the query string so equivalent list requests share an entry."""
+    return "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+
+def task_response(db_task, headers: Dict[str, str]) -> CachedResponse:
+    with serialization_timer():
+        body = schemas.Task.model_validate(db_task).model_dump_json().encode()
+    return CachedResponse(body=body, headers=dict(headers))
+
+def task_rows_response(rows, fields: Sequence[str], headers: Dict[str, str]) -> CachedResponse:
+    """Serializes Core rows (see crud.get_task_rows) without Pydantic validation."""
+    return CachedResponse(body=dumps(rows_to_dicts(rows, fields)), headers=dict(headers))
+
+
+def invalidate_tasks(user_id: int, task_ids: Iterable[int] = ()) -> None:
+    """Called by the crud write paths: drops the user's written tasks.
+
+    The user's cached lists need no dropping: their keys hold the version that the write moves.
+    """
+    cache.delete([task_key(user_id, task_id) for task_id in task_ids])
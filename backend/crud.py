@@ -1,60 +1,664 @@
+from sqlalchemy import delete, func, insert, or_, select, text, tuple_, union_all, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
 from sqlalchemy.orm import Session
+from datetime import date, datetime, timezone
 from . import models
+from . import events
 from . import schemas
-from typing import List, Optional
+from .cache import invalidate_tasks
+from .pagination import Cursor, sort_column
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Sequence, Tuple
 import logging # Import logging
+import re
 
 # Configure basic logging
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
-def get_task(db: Session, task_id: int) -> Optional[models.Task]:
-    """Gets a single task by ID."""
-    return db.query(models.Task).filter(models.Task.id == task_id).first()
+# Every function takes the user_id of the tasks' owner and only sees or writes
+# that user's tasks (see models.Task.user_id and dependencies.get_user_id).
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100) -> List[models.Task]:
-    """Gets all tasks with optional pagination."""
-    return db.query(models.Task).offset(skip).limit(limit).all()
+def get_task(db: Session, user_id: int, task_id: int) -> Optional[models.Task]:
+    """Gets a single task by ID, from the archive if it was moved there."""
+    db_task = db.query(models.Task).filter(models.Task.id == task_id, models.Task.user_id == user_id).first()
+    if db_task is None:
+        db_task = db.scalar(
+            select(models.ArchivedTask).where(models.ArchivedTask.id == task_id, models.ArchivedTask.user_id == user_id)
+        )
+    return db_task
+
+def get_user(db: Session, user_id: int) -> Optional[models.User]:
+    return db.get(models.User, user_id)
+
+def create_user(db: Session, user: schemas.UserCreate) -> models.User:
+    """Creates a user; raises IntegrityError if the username or email is taken."""
+    try:
+        db_user = db.scalar(insert(models.User).values(**user.model_dump()).returning(models.User))
+        db.commit()
+        return db_user
+    except Exception:
+        db.rollback()
+        raise
+
+def _as_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    # Timestamps are stored as naive UTC (datetime.utcnow), so compare in the same form
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+class selective(ColumnElement):
+    """Marks a condition as matching few rows.
+
+    Without table statistics SQLite assumes date ranges match most rows and
+    prefers walking the primary key for ORDER BY id, filtering every row.
+    On SQLite this renders as unlikely(...) so the range uses its index instead;
+    other databases get the bare condition.
+    """
+    inherit_cache = True
+
+    def __init__(self, clause):
+        self.clause = clause
+
+@compiles(selective)
+def _compile_selective(element, compiler, **kw):
+    return compiler.process(element.clause, **kw)
+
+@compiles(selective, "sqlite")
+def _compile_selective_sqlite(element, compiler, **kw):
+    return f"unlikely({compiler.process(element.clause, **kw)})"
+
+def _page_query(model, user_id: int, filters: schemas.TaskListParams, after: Optional[Cursor], columns):
+    """Filtered, sorted SELECT on tasks or tasks_archive; returns it with its sort keys."""
+    if columns:
+        query = select(*(getattr(model, name) for name in columns))
+    else:
+        query = select(model)
+    query = query.where(model.user_id == user_id)
+    if filters.completed is not None:
+        query = query.where(model.completed == filters.completed)
+    if filters.category is not None:
+        query = query.where(model.category == filters.category)
+    if filters.created_after is not None:
+        query = query.where(selective(model.created_at >= _as_utc_naive(filters.created_after)))
+    if filters.created_before is not None:
+        query = query.where(selective(model.created_at < _as_utc_naive(filters.created_before)))
+    if filters.updated_since is not None:
+        query = query.where(selective(model.updated_at >= _as_utc_naive(filters.updated_since)))
+
+    descending = filters.order_by.startswith("-")
+    column_name = sort_column(filters.order_by)
+
+    keys = [model.id] if column_name == "id" else [getattr(model, column_name), model.id]
+    query = query.order_by(*(key.desc() if descending else key for key in keys))
+
+    if after is not None:
+        position = tuple_(*keys) if len(keys) > 1 else keys[0]
+        values = tuple_(after.value, after.id) if len(keys) > 1 else after.id
+        query = query.where(position < values if descending else position > values)
+    return query, [key.key for key in keys]
+
+def build_tasks_query(
+    user_id: int,
+    filters: Optional[schemas.TaskListParams] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Cursor] = None,
+    columns: Optional[Sequence[str]] = None,
+):
+    """Builds the SELECT for a filtered, sorted page of tasks.
+
+    Each filter/sort combination is backed by an index leading on user_id (see models.Task). When
+    `after` is given, seeks past it on (sort column, id) (keyset pagination)
+    instead of using OFFSET, so deep pages stay as cheap as the first.
+    With `columns`, selects just those columns as Core rows instead of Task objects.
+    """
+    filters = filters or schemas.TaskListParams()
+    if not filters.include_archived:
+        query, _ = _page_query(models.Task, user_id, filters, after, columns)
+        if after is None:
+            query = query.offset(skip)
+        return query.limit(limit)
+
+    # With archived tasks, each table yields its own first skip + limit matches
+    # from its indexes and only those are merged, sorted and paged.
+    names = columns or models.ARCHIVED_COLUMNS
+    window = limit if after is not None else skip + limit
+    live, keys = _page_query(models.Task, user_id, filters, after, names)
+    archived, _ = _page_query(models.ArchivedTask, user_id, filters, after, names)
+    merged = union_all(
+        select(*live.limit(window).subquery().c), select(*archived.limit(window).subquery().c),
+    ).subquery()
+    descending = filters.order_by.startswith("-")
+    query = select(*merged.c).order_by(*(merged.c[key].desc() if descending else merged.c[key] for key in keys))
+    if after is None:
+        query = query.offset(skip)
+    query = query.limit(limit)
+    return query if columns else select(models.Task).from_statement(query)
+
+def get_tasks(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Cursor] = None,
+    filters: Optional[schemas.TaskListParams] = None,
+) -> List[models.Task]:
+    """Gets a filtered, sorted page of tasks (ordered by ID by default)."""
+    return list(db.scalars(build_tasks_query(user_id, filters, skip=skip, limit=limit, after=after)))
+
+def task_row_columns(fields: Sequence[str], order_by: str = "id") -> List[str]:
+    """Columns to select for `fields` (first, in order), plus what keyset pagination needs."""
+    return list(dict.fromkeys([*fields, "id", sort_column(order_by)]))
+
+def get_task_rows(
+    db: Session,
+    user_id: int,
+    fields: Sequence[str],
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Cursor] = None,
+    filters: Optional[schemas.TaskListParams] = None,
+) -> list:
+    """Like get_tasks, but returns Core rows holding only the needed columns."""
+    columns = task_row_columns(fields, filters.order_by if filters else "id")
+    # Run on the session's connection directly to skip the ORM result layer
+    return db.connection().execute(
+        build_tasks_query(user_id, filters, skip=skip, limit=limit, after=after, columns=columns)
+    ).all()
+
+def build_fts_query(q: str, user_id: Optional[int] = None) -> str:
+    """Turns free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted so user input can never inject FTS5 operators. With
+    `user_id`, only that user's tasks match and the words only match the text columns.
+    """
+    words = " ".join(f'"{word}"*' for word in re.findall(r"\w+", q))
+    if not words or user_id is None:
+        return words
+    return f'user_id : "{int(user_id)}" AND {{title description category}} : ({words})'
+
+def build_like_pattern(q: str) -> str:
+    """Turns free text into a substring LIKE pattern, with `\\` as the escape character.
+
+    LIKE wildcards in the text are escaped so "50%" or "a_b" only match themselves.
+    """
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+# Ranking and paging happen inside the FTS5 table (ORDER BY rank, see
+# models.TASKS_FTS_DDL for the weights) so only the returned page is joined to
+# tasks, and to tasks_archive for the hits that were archived.
+_SEARCH_COLUMNS = ", ".join(models.ARCHIVED_COLUMNS)
+_SEARCH_SQL = text(f"""
+    WITH hits AS (
+        SELECT rowid, rank FROM tasks_fts
+        WHERE tasks_fts MATCH :query
+        ORDER BY rank
+        LIMIT :limit OFFSET :skip
+    )
+    SELECT {_SEARCH_COLUMNS}, hits.rank AS rank FROM hits JOIN tasks ON tasks.id = hits.rowid
+    UNION ALL
+    SELECT {_SEARCH_COLUMNS}, hits.rank AS rank FROM hits JOIN tasks_archive ON tasks_archive.id = hits.rowid
+    ORDER BY rank, id
+""")
+
+def search_tasks(db: Session, user_id: int, q: str, skip: int = 0, limit: int = 20) -> List[models.Task]:
+    """Searches title, description and category, best matches first."""
+    if db.get_bind().dialect.name != "sqlite":
+        # No FTS5 index outside SQLite: fall back to a case-insensitive scan of both tables
+        pattern = build_like_pattern(q)
+        matches = union_all(*(
+            select(*(getattr(model, name) for name in models.ARCHIVED_COLUMNS)).where(model.user_id == user_id, or_(
+                model.title.ilike(pattern, escape="\\"),
+                model.description.ilike(pattern, escape="\\"),
+                model.category.ilike(pattern, escape="\\"),
+            ))
+            for model in (models.Task, models.ArchivedTask)
+        )).subquery()
+        query = select(*matches.c).order_by(matches.c.id).offset(skip).limit(limit)
+        return list(db.scalars(select(models.Task).from_statement(query)))
+    fts_query = build_fts_query(q, user_id)
+    if not fts_query:
+        return []
+    stmt = select(models.Task).from_statement(_SEARCH_SQL)
+    return list(db.scalars(stmt, {"query": fts_query, "skip": skip, "limit": limit}))
+
+# --- Change feed (delta sync) ---
+
+def allocate_change_seqs_stmt(count: int):
+    return (
+        update(models.SyncState)
+        .where(models.SyncState.id == models.SYNC_STATE_ID)
+        .values(seq=models.SyncState.seq + count)
+        .returning(models.SyncState.seq)
+    )
+
+def allocate_change_seqs(db: Session, count: int = 1) -> int:
+    """Reserves `count` consecutive change sequence numbers and returns the first.
+
+    Must run inside the write transaction: the counter row stays locked until
+    commit, so sequence numbers become visible in order.
+    """
+    return db.scalar(allocate_change_seqs_stmt(count)) - count + 1
+
+def get_changes(
+    db: Session, user_id: int, since: int = 0, limit: int = 1000,
+) -> Tuple[List[models.Task], List[Tuple[int, int]], bool]:
+    """Gets tasks written and tasks deleted after change `since`, oldest first.
+
+    Returns (tasks, [(task_id, change_seq) of deletions], has_more), at most
+    `limit` changes in total.
+    """
+    # Archived tasks keep their last change, so clients that were away still get it
+    tasks = sorted(
+        (
+            db_task
+            for model in (models.Task, models.ArchivedTask)
+            for db_task in db.scalars(
+                select(model).where(model.user_id == user_id, model.change_seq > since).order_by(model.change_seq).limit(limit + 1)
+            )
+        ),
+        key=lambda db_task: db_task.change_seq,
+    )[:limit + 1]
+    tombstones = db.execute(
+        select(models.TaskTombstone.task_id, models.TaskTombstone.change_seq)
+        .where(
+            models.TaskTombstone.user_id == user_id,
+            models.TaskTombstone.change_seq > since,
+            ~select(models.Task.id).where(models.Task.id == models.TaskTombstone.task_id).exists(),
+        )
+        .order_by(models.TaskTombstone.change_seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(tasks) + len(tombstones) > limit
+    if has_more:
+        # Keep the `limit` oldest changes across both lists
+        cutoff = sorted([t.change_seq for t in tasks] + [seq for _, seq in tombstones])[limit - 1]
+        tasks = [t for t in tasks if t.change_seq <= cutoff]
+        tombstones = [(task_id, seq) for task_id, seq in tombstones if seq <= cutoff]
+    return tasks, [tuple(row) for row in tombstones], has_more
+
+def get_change_seq(db: Session) -> int:
+    """Current position of the change feed; moves on every write to tasks."""
+    return db.scalar(select(models.SyncState.seq).where(models.SyncState.id == models.SYNC_STATE_ID)) or 0
+
+def get_user_change_seq_stmt(user_id: int):
+    # One (user_id, change_seq) index seek per table. The pruned position keeps the
+    # version from going back when the user's latest tombstones are discarded.
+    seqs = union_all(
+        *(select(func.max(model.change_seq).label("seq")).where(model.user_id == user_id)
+          for model in (models.Task, models.TaskTombstone, models.ArchivedTask)),
+        select(models.SyncState.pruned_seq).where(models.SyncState.id == models.SYNC_STATE_ID),
+    ).subquery()
+    return select(func.max(seqs.c.seq))
+
+def get_user_change_seq(db: Session, user_id: int) -> int:
+    """Version of one user's tasks; moves on every write to them, but not on other users' writes."""
+    return db.scalar(get_user_change_seq_stmt(user_id)) or 0
+
+def get_task_change_seq_stmt(model, user_id: int, task_id: int):
+    return select(model.change_seq).where(model.id == task_id, model.user_id == user_id)
+
+def get_task_change_seq(db: Session, user_id: int, task_id: int) -> Optional[int]:
+    """Change sequence number of one task (live or archived), or None if it does not exist."""
+    change_seq = db.scalar(get_task_change_seq_stmt(models.Task, user_id, task_id))
+    if change_seq is None:
+        change_seq = db.scalar(get_task_change_seq_stmt(models.ArchivedTask, user_id, task_id))
+    return change_seq
+
+def get_task_stats(db: Session, user_id: int, since_day: date) -> schemas.TaskStats:
+    """Task counts per category and completion, and per creation day from `since_day`.
+
+    Reads only the statistics tables (see models.TASK_STATS_DDL), so the cost grows
+    with the number of categories and days, not tasks.
+    """
+    counts, daily = models.TaskCategoryCount, models.TaskDailyCount
+    categories: Dict[str, schemas.CategoryStats] = {}
+    for category, completed, total in db.execute(
+        select(counts.category, counts.completed, counts.total).where(counts.user_id == user_id, counts.total > 0)
+    ):
+        entry = categories.setdefault(category, schemas.CategoryStats(category=category or None))
+        entry.total += total
+        if completed:
+            entry.completed += total
+        else:
+            entry.pending += total
+    per_day = db.execute(
+        select(daily.day, daily.total)
+        .where(daily.user_id == user_id, daily.day >= since_day, daily.total > 0)
+        .order_by(daily.day)
+    ).all()
+    ordered = sorted(categories.values(), key=lambda entry: (entry.category is not None, entry.category or ""))
+    return schemas.TaskStats(
+        total=sum(entry.total for entry in ordered),
+        completed=sum(entry.completed for entry in ordered),
+        pending=sum(entry.pending for entry in ordered),
+        categories=ordered,
+        created_per_day=[schemas.DailyStats(day=day, created=total) for day, total in per_day],
+    )
+
+def get_pruned_seq(db: Session) -> int:
+    return db.scalar(select(models.SyncState.pruned_seq).where(models.SyncState.id == models.SYNC_STATE_ID)) or 0
+
+def prune_tombstones(db: Session, before_seq: int) -> int:
+    """Discards tombstones up to `before_seq`; clients older than that must resync fully."""
+    result = db.execute(delete(models.TaskTombstone).where(models.TaskTombstone.change_seq <= before_seq))
+    db.execute(
+        update(models.SyncState)
+        .where(models.SyncState.id == models.SYNC_STATE_ID, models.SyncState.pruned_seq < before_seq)
+        .values(pruned_seq=before_seq)
+    )
+    db.commit()
+    return result.rowcount
+
+# Single-task writes return the row from the write statement itself
+# (INSERT/UPDATE/DELETE ... RETURNING, SQLite 3.35+ and PostgreSQL) instead of
+# loading it before or refreshing it after. Sessions are created with
+# expire_on_commit=False, so the returned task stays usable after commit.
 
-def create_task(db: Session, task: schemas.TaskCreate) -> models.Task:
+def create_task_stmt(user_id: int, task: schemas.TaskCreate, change_seq: int):
+    return insert(models.Task).values(**task.model_dump(), user_id=user_id, change_seq=change_seq).returning(models.Task)
+
+def create_task(db: Session, user_id: int, task: schemas.TaskCreate) -> models.Task:
     """Creates a new task in the database."""
-    log.info(f"Attempting to create task with title: {task.title}")
-    db_task = models.Task(**task.model_dump())
     try:
-        db.add(db_task)
-        log.info("Task added to session.")
+        db_task = db.scalar(create_task_stmt(user_id, task, allocate_change_seqs(db)))
         db.commit()
-        log.info("Session committed.")
-        db.refresh(db_task)
-        log.info(f"Task created with ID: {db_task.id}")
+        log.debug("Task created with ID: %s", db_task.id)
+        invalidate_tasks(user_id)
+        events.publish_task("created", db_task)
         return db_task
     except Exception as e:
         log.error(f"Error during task creation: {e}")
         db.rollback() # Rollback session on error
         raise # Re-raise the exception for FastAPI to handle
 
-def update_task(db: Session, task_id: int, task_update: schemas.TaskUpdate) -> Optional[models.Task]:
-    """Updates an existing task."""
-    db_task = get_task(db, task_id)
-    if not db_task:
-        return None
+def update_task_stmt(user_id: int, task_id: int, task_update: schemas.TaskUpdate, change_seq: int):
+    # Only the fields that were sent; updated_at is set by the column's onupdate
+    return (
+        update(models.Task)
+        .where(models.Task.id == task_id, models.Task.user_id == user_id)
+        .values(**task_update.model_dump(exclude_unset=True), change_seq=change_seq)
+        .returning(models.Task)
+        .execution_options(populate_existing=True)
+    )
 
-    # Get update data, excluding unset values
-    update_data = task_update.model_dump(exclude_unset=True)
-    
-    for key, value in update_data.items():
-        setattr(db_task, key, value)
+def delete_archived_stmt(user_id: int, task_id: int, *columns):
+    archived = models.ArchivedTask
+    return delete(archived).where(archived.id == task_id, archived.user_id == user_id).returning(*(columns or (archived,)))
 
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+def take_archived_stmt(user_id: int, task_id: int):
+    # Removed from the archive before it is inserted into tasks, so its search entry is never there twice
+    return delete_archived_stmt(user_id, task_id, *(getattr(models.ArchivedTask, name) for name in models.ARCHIVED_COLUMNS))
+
+def restore_archived_stmt(row):
+    return insert(models.Task).values(dict(row._mapping))
+
+def unarchive_task(db: Session, user_id: int, task_id: int) -> bool:
+    """Moves an archived task back to tasks (in the caller's transaction); False if it is not archived."""
+    row = db.execute(take_archived_stmt(user_id, task_id)).first()
+    if row is None:
+        return False
+    db.execute(restore_archived_stmt(row))
+    return True
+
+def update_task(db: Session, user_id: int, task_id: int, task_update: schemas.TaskUpdate) -> Optional[models.Task]:
+    """Updates an existing task; an archived task is moved back to tasks first."""
+    try:
+        change_seq = allocate_change_seqs(db)
+        db_task = db.scalar(update_task_stmt(user_id, task_id, task_update, change_seq))
+        if db_task is None and unarchive_task(db, user_id, task_id):
+            db_task = db.scalar(update_task_stmt(user_id, task_id, task_update, change_seq))
+        if db_task is None:
+            db.rollback()
+            return None
+        db.commit()
+    except Exception as e:
+        log.error(f"Error during task update: {e}")
+        db.rollback()
+        raise
+    invalidate_tasks(user_id, [task_id])
+    events.publish_task("updated", db_task)
     return db_task
 
-def delete_task(db: Session, task_id: int) -> Optional[models.Task]:
-    """Deletes a task."""
-    db_task = get_task(db, task_id)
-    if not db_task:
-        return None
-    db.delete(db_task)
-    db.commit()
-    return db_task 
\ No newline at end of file
+def delete_task_stmt(user_id: int, task_id: int):
+    return delete(models.Task).where(models.Task.id == task_id, models.Task.user_id == user_id).returning(models.Task)
+
+def delete_task(db: Session, user_id: int, task_id: int) -> Optional[models.Task]:
+    """Deletes a task, live or archived."""
+    try:
+        seq = allocate_change_seqs(db)
+        db_task = db.scalar(delete_task_stmt(user_id, task_id))
+        if db_task is None:
+            db_task = db.scalar(delete_archived_stmt(user_id, task_id))
+        if db_task is None:
+            db.rollback()
+            return None
+        db.add(models.TaskTombstone(task_id=task_id, user_id=user_id, change_seq=seq))
+        db.commit()
+    except Exception as e:
+        log.error(f"Error during task deletion: {e}")
+        db.rollback()
+        raise
+    invalidate_tasks(user_id, [task_id])
+    db_task.change_seq = seq # position of the deletion in the change feed
+    events.publish_deleted(user_id, task_id, seq)
+    return db_task
+
+# Keep IN (...) lists comfortably below SQLite's bound-parameter limit.
+BULK_CHUNK_SIZE = 500
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _get_tasks_by_ids(db: Session, user_id: int, task_ids: List[int]) -> Dict[int, models.Task]:
+    found = {}
+    for chunk in _chunks(task_ids):
+        for db_task in db.scalars(select(models.Task).where(models.Task.id.in_(chunk), models.Task.user_id == user_id)):
+            found[db_task.id] = db_task
+    return found
+
+def create_tasks(db: Session, user_id: int, tasks: List[schemas.TaskCreate]) -> List[models.Task]:
+    """Creates many tasks in a single transaction using INSERT ... RETURNING."""
+    if not tasks:
+        return []
+    try:
+        first_seq = allocate_change_seqs(db, len(tasks))
+        db_tasks = list(db.scalars(
+            insert(models.Task).returning(models.Task, sort_by_parameter_order=True),
+            [dict(task.model_dump(), user_id=user_id, change_seq=first_seq + i) for i, task in enumerate(tasks)],
+        ))
+        db.commit()
+        log.info(f"Bulk created {len(db_tasks)} tasks.")
+        invalidate_tasks(user_id)
+        events.publish_changed(user_id, first_seq + len(db_tasks) - 1)
+        return db_tasks
+    except Exception as e:
+        log.error(f"Error during bulk task creation: {e}")
+        db.rollback()
+        raise
+
+def update_tasks(db: Session, user_id: int, updates: List[schemas.TaskBulkUpdate]) -> Tuple[List[models.Task], List[int]]:
+    """Applies many partial updates in a single transaction.
+
+    Returns the updated tasks (in request order) and the IDs that were not found.
+    """
+    now = datetime.utcnow()
+    params = []
+    missing = []
+    try:
+        existing = set()
+        for chunk in _chunks([item.id for item in updates]):
+            existing.update(db.scalars(select(models.Task.id).where(models.Task.id.in_(chunk), models.Task.user_id == user_id)))
+        # Archived tasks are moved back into tasks first, like update_task does for one
+        for task_id in dict.fromkeys(item.id for item in updates):
+            if task_id not in existing and unarchive_task(db, user_id, task_id):
+                existing.add(task_id)
+        for item in updates:
+            if item.id not in existing:
+                missing.append(item.id)
+                continue
+            values = item.model_dump(exclude_unset=True)
+            values["id"] = item.id
+            values["updated_at"] = now
+            params.append(values)
+        if params:
+            first_seq = allocate_change_seqs(db, len(params))
+            for i, values in enumerate(params):
+                values["change_seq"] = first_seq + i
+            # executemany UPDATE ... WHERE id = ? grouped by the set of keys (IDs checked against the user above)
+            db.execute(update(models.Task), params)
+        db.commit()
+    except Exception as e:
+        log.error(f"Error during bulk task update: {e}")
+        db.rollback()
+        raise
+    invalidate_tasks(user_id, (values["id"] for values in params))
+    if params:
+        events.publish_changed(user_id, params[-1]["change_seq"])
+    updated = _get_tasks_by_ids(db, user_id, [values["id"] for values in params])
+    return [updated[values["id"]] for values in params], missing
+
+def delete_tasks(
+    db: Session,
+    user_id: int,
+    task_ids: Optional[List[int]] = None,
+    completed: Optional[bool] = None,
+    category: Optional[str] = None,
+) -> Tuple[List[int], Optional[int]]:
+    """Deletes tasks, live or archived, by ID and/or filter in a single transaction.
+
+    With no arguments every task of the user is deleted. Returns the IDs actually deleted
+    and the change sequence number of the last deletion (None if nothing matched).
+    """
+    deleted = []
+    last_seq = None
+    try:
+        # Archived tasks match the same conditions and are deleted along with the live ones
+        for model in (models.Task, models.ArchivedTask):
+            conditions = [model.user_id == user_id]
+            if completed is not None:
+                conditions.append(model.completed == completed)
+            if category is not None:
+                conditions.append(model.category == category)
+            if task_ids is None:
+                stmt = delete(model).where(*conditions).returning(model.id)
+                deleted.extend(db.scalars(stmt))
+            else:
+                for chunk in _chunks(task_ids):
+                    stmt = delete(model).where(model.id.in_(chunk), *conditions).returning(model.id)
+                    deleted.extend(db.scalars(stmt))
+        if deleted:
+            first_seq = allocate_change_seqs(db, len(deleted))
+            db.execute(insert(models.TaskTombstone), [
+                {"task_id": task_id, "user_id": user_id, "change_seq": first_seq + i} for i, task_id in enumerate(deleted)
+            ])
+            last_seq = first_seq + len(deleted) - 1
+        db.commit()
+    except Exception as e:
+        log.error(f"Error during bulk task deletion: {e}")
+        db.rollback()
+        raise
+    log.info(f"Bulk deleted {len(deleted)} tasks.")
+    invalidate_tasks(user_id, deleted)
+    events.publish_changed(user_id, last_seq)
+    return deleted, last_seq
+
+def apply_task_writes(db: Session, writes: List[Tuple[int, Optional[int], dict]]) -> List[Optional[models.Task]]:
+    """Applies queued creates and partial updates in one transaction (see writer.py).
+
+    Each write is (user_id, None, values) to create a task or (user_id, task_id,
+    values) to update one, live or archived. Returns the resulting tasks in order,
+    None for updates of tasks the user does not have. Use a session with expire_on_commit=False so
+    the returned tasks stay loaded.
+    """
+    creates = [(i, user_id, values) for i, (user_id, task_id, values) in enumerate(writes) if task_id is None]
+    results: List[Optional[models.Task]] = [None] * len(writes)
+    try:
+        first_seq = allocate_change_seqs(db, len(writes))
+        existing = {}
+        for chunk in _chunks([task_id for _, task_id, _ in writes if task_id is not None]):
+            for db_task in db.scalars(select(models.Task).where(models.Task.id.in_(chunk))):
+                existing[db_task.id] = db_task
+        # As in update_task, an archived task is moved back to tasks first
+        for user_id, task_id, _ in writes:
+            if task_id is not None and task_id not in existing and unarchive_task(db, user_id, task_id):
+                existing[task_id] = db.get(models.Task, task_id)
+        if creates:
+            created = db.scalars(
+                insert(models.Task).returning(models.Task, sort_by_parameter_order=True),
+                [dict(values, user_id=user_id, change_seq=first_seq + i) for i, user_id, values in creates],
+            )
+            for (i, _, _), db_task in zip(creates, created):
+                results[i] = db_task
+        for i, (user_id, task_id, values) in enumerate(writes):
+            db_task = existing.get(task_id) if task_id is not None else None
+            if db_task is None or db_task.user_id != user_id:
+                continue
+            for key, value in values.items():
+                setattr(db_task, key, value)
+            db_task.change_seq = first_seq + i
+            results[i] = db_task
+            db.flush() # later writes to the same task see this one
+        db.commit()
+    except Exception as e:
+        log.error(f"Error during grouped task writes: {e}")
+        db.rollback()
+        raise
+    for user_id in {user_id for user_id, _, _ in writes}:
+        invalidate_tasks(user_id, (task_id for owner, task_id, _ in writes if owner == user_id and task_id is not None))
+    for (_, task_id, _), db_task in zip(writes, results):
+        if db_task is not None:
+            events.publish_task("created" if task_id is None else "updated", db_task)
+    return results
+
+# --- Export / import ---
+
+EXPORT_COLUMNS = ["id", "title", "description", "category", "created_at", "updated_at", "completed"]
+
+def iter_task_rows(db: Session, user_id: int, batch_size: int = 1000):
+    """Yields every task of the user, live or archived, as a Core row, ordered by ID, in constant memory.
+
+    Uses its own connection with a server-side cursor so no ORM objects are built
+    (or the session's, if it is bound to a connection rather than an engine).
+    """
+    rows = union_all(*(
+        select(*(getattr(model, name) for name in EXPORT_COLUMNS)).where(model.user_id == user_id)
+        for model in (models.Task, models.ArchivedTask)
+    )).subquery()
+    bind = db.get_bind()
+    with bind.connect() if isinstance(bind, Engine) else nullcontext(bind) as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+            select(*rows.c).order_by(rows.c.id)
+        )
+        for partition in result.partitions():
+            yield from partition
+
+def import_tasks_chunk(db: Session, user_id: int, rows: List[schemas.TaskImport]) -> int:
+    """Inserts one chunk of imported tasks in a single executemany transaction."""
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    try:
+        first_seq = allocate_change_seqs(db, len(rows))
+        params = []
+        for i, row in enumerate(rows):
+            values = row.model_dump()
+            values["created_at"] = _as_utc_naive(values["created_at"]) or now
+            values["updated_at"] = _as_utc_naive(values["updated_at"]) or values["created_at"]
+            values["user_id"] = user_id
+            values["change_seq"] = first_seq + i
+            params.append(values)
+        db.execute(insert(models.Task), params)
+        db.commit()
+    except Exception as e:
+        log.error(f"Error during task import: {e}")
+        db.rollback()
+        raise
+    invalidate_tasks(user_id)
+    events.publish_changed(user_id, first_seq + len(rows) - 1)
+    return len(rows)
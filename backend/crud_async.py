@@ -0,0 +1,128 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import events
+from . import models
+from . import schemas
+from .cache import invalidate_tasks
+from .crud import (
+    allocate_change_seqs_stmt, build_tasks_query, create_task_stmt, delete_archived_stmt, delete_task_stmt,
+    get_task_change_seq_stmt, get_user_change_seq_stmt, restore_archived_stmt, take_archived_stmt, task_row_columns, update_task_stmt,
+)
+from .pagination import Cursor
+from typing import List, Optional, Sequence
+import logging
+
+# Async counterparts of the core functions in crud.py, used by routers/tasks_async.py.
+# Like those, they take the owner's user_id and only touch that user's tasks.
+log = logging.getLogger(__name__)
+
+async def get_task(db: AsyncSession, user_id: int, task_id: int) -> Optional[models.Task]:
+    """Gets a single task by ID, from the archive if it was moved there."""
+    for model in (models.Task, models.ArchivedTask):
+        db_task = await db.get(model, task_id)
+        if db_task is not None:
+            return db_task if db_task.user_id == user_id else None
+    return None
+
+async def get_tasks(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Cursor] = None,
+    filters: Optional[schemas.TaskListParams] = None,
+) -> List[models.Task]:
+    """Gets a filtered, sorted page of tasks (ordered by ID by default)."""
+    result = await db.scalars(build_tasks_query(user_id, filters, skip=skip, limit=limit, after=after))
+    return list(result)
+
+async def allocate_change_seqs(db: AsyncSession, count: int = 1) -> int:
+    """Reserves `count` consecutive change sequence numbers and returns the first."""
+    return await db.scalar(allocate_change_seqs_stmt(count)) - count + 1
+
+async def get_task_rows(
+    db: AsyncSession,
+    user_id: int,
+    fields: Sequence[str],
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Cursor] = None,
+    filters: Optional[schemas.TaskListParams] = None,
+) -> list:
+    """Like get_tasks, but returns Core rows holding only the needed columns."""
+    columns = task_row_columns(fields, filters.order_by if filters else "id")
+    conn = await db.connection()
+    result = await conn.execute(build_tasks_query(user_id, filters, skip=skip, limit=limit, after=after, columns=columns))
+    return result.all()
+
+async def get_change_seq(db: AsyncSession) -> int:
+    """Current position of the change feed; moves on every write to tasks."""
+    return await db.scalar(select(models.SyncState.seq).where(models.SyncState.id == models.SYNC_STATE_ID)) or 0
+
+async def get_user_change_seq(db: AsyncSession, user_id: int) -> int:
+    """Version of one user's tasks; moves on every write to them, but not on other users' writes."""
+    return await db.scalar(get_user_change_seq_stmt(user_id)) or 0
+
+async def get_task_change_seq(db: AsyncSession, user_id: int, task_id: int) -> Optional[int]:
+    """Change sequence number of one task (live or archived), or None if it does not exist."""
+    change_seq = await db.scalar(get_task_change_seq_stmt(models.Task, user_id, task_id))
+    if change_seq is None:
+        change_seq = await db.scalar(get_task_change_seq_stmt(models.ArchivedTask, user_id, task_id))
+    return change_seq
+
+async def create_task(db: AsyncSession, user_id: int, task: schemas.TaskCreate) -> models.Task:
+    """Creates a new task in the database."""
+    try:
+        db_task = await db.scalar(create_task_stmt(user_id, task, await allocate_change_seqs(db)))
+        await db.commit()
+        log.debug("Task created with ID: %s", db_task.id)
+        invalidate_tasks(user_id)
+        events.publish_task("created", db_task)
+        return db_task
+    except Exception as e:
+        log.error(f"Error during task creation: {e}")
+        await db.rollback()
+        raise
+
+async def update_task(db: AsyncSession, user_id: int, task_id: int, task_update: schemas.TaskUpdate) -> Optional[models.Task]:
+    """Updates an existing task; an archived task is moved back to tasks first."""
+    try:
+        change_seq = await allocate_change_seqs(db)
+        db_task = await db.scalar(update_task_stmt(user_id, task_id, task_update, change_seq))
+        if db_task is None:
+            archived = (await db.execute(take_archived_stmt(user_id, task_id))).first()
+            if archived is not None:
+                await db.execute(restore_archived_stmt(archived))
+                db_task = await db.scalar(update_task_stmt(user_id, task_id, task_update, change_seq))
+        if db_task is None:
+            await db.rollback()
+            return None
+        await db.commit()
+    except Exception as e:
+        log.error(f"Error during task update: {e}")
+        await db.rollback()
+        raise
+    invalidate_tasks(user_id, [task_id])
+    events.publish_task("updated", db_task)
+    return db_task
+
+async def delete_task(db: AsyncSession, user_id: int, task_id: int) -> Optional[models.Task]:
+    """Deletes a task, live or archived."""
+    try:
+        seq = await allocate_change_seqs(db)
+        db_task = await db.scalar(delete_task_stmt(user_id, task_id))
+        if db_task is None:
+            db_task = await db.scalar(delete_archived_stmt(user_id, task_id))
+        if db_task is None:
+            await db.rollback()
+            return None
+        db.add(models.TaskTombstone(task_id=task_id, user_id=user_id, change_seq=seq))
+        await db.commit()
+    except Exception as e:
+        log.error(f"Error during task deletion: {e}")
+        await db.rollback()
+        raise
+    invalidate_tasks(user_id, [task_id])
+    db_task.change_seq = seq # position of the deletion in the change feed
+    events.publish_deleted(user_id, task_id, seq)
+    return db_task
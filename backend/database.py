@@ -1,17 +1,259 @@
-from sqlalchemy import create_engine
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from .metrics import instrument_engine
+
+# All database settings can be overridden through environment variables.
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
 
 # Use relative path, assuming server/script runs from project root
-DATABASE_URL = "sqlite:///todo.db"
+DATABASE_URL = os.getenv("TODO_DATABASE_URL", "sqlite:///todo.db")
+
+# Pragmas applied to every new SQLite connection. WAL lets readers proceed while
+# a writer is active, and NORMAL sync is safe under WAL while avoiding an fsync per commit.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("TODO_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("TODO_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": _env_int("TODO_SQLITE_BUSY_TIMEOUT_MS", 5000),
+    "cache_size": _env_int("TODO_SQLITE_CACHE_SIZE", -64000), # negative = KiB, i.e. 64 MB
+    "mmap_size": _env_int("TODO_SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+    "temp_store": os.getenv("TODO_SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# Connection pool sizing (ignored by pools that do not support it, e.g. for :memory:)
+POOL_SIZE = _env_int("TODO_DB_POOL_SIZE", 10)
+MAX_OVERFLOW = _env_int("TODO_DB_MAX_OVERFLOW", 20)
+POOL_TIMEOUT = _env_int("TODO_DB_POOL_TIMEOUT", 30)
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def _pool_options(url: str, kwargs: dict) -> dict:
+    # In-memory SQLite and explicitly chosen pool classes keep their own pooling
+    if "poolclass" in kwargs or ":memory:" in url or url.rstrip("/").endswith("sqlite:"):
+        return {}
+    return {"pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW, "pool_timeout": POOL_TIMEOUT}
 
-# include check_same_thread: False for SQLite only
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def apply_sqlite_pragmas(engine, pragmas: dict = None):
+    """Registers a connect hook that applies the SQLite pragmas to each new connection."""
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def is_postgres(url: str) -> bool:
+    return url.startswith(("postgresql", "postgres"))
+
+def make_engine(url: str = DATABASE_URL, pragmas: dict = None, **kwargs):
+    """Creates a sync engine with the configured pool and, for SQLite, pragmas."""
+    # A server can drop idle connections; a local SQLite file cannot, so skip the SELECT 1 per checkout there
+    options = {"pool_pre_ping": not is_sqlite(url)}
+    if is_sqlite(url):
+        # include check_same_thread: False for SQLite only
+        options["connect_args"] = {"check_same_thread": False}
+    elif is_postgres(url):
+        # Timestamps are stored as naive UTC (datetime.utcnow), so read and write them in UTC
+        options["connect_args"] = {"options": "-c timezone=utc"}
+    options.update(_pool_options(url, kwargs))
+    options.update(kwargs)
+    engine = create_engine(url, **options)
+    if is_sqlite(url):
+        apply_sqlite_pragmas(engine, pragmas)
+    instrument_engine(engine)
+    return engine
+
+engine = make_engine(DATABASE_URL)
+# Writes return their rows via RETURNING (see crud), so nothing needs reloading after commit
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
-def create_db_tables():
-    # Create tables based on models that inherit from Base
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+# Optional read replicas (comma-separated URLs, e.g. Postgres streaming replicas).
+# GET /tasks/ and GET /tasks/{id} read from them in turn; everything else uses the
+# primary. A client that just wrote is pinned to data at least as new as its write
+# for TODO_READ_YOUR_WRITES_SECONDS (see dependencies.get_read_db).
+REPLICA_URLS = [url.strip() for url in os.getenv("TODO_DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+READ_YOUR_WRITES_SECONDS = _env_int("TODO_READ_YOUR_WRITES_SECONDS", 30)
+
+_replica_sessionmakers = []
+_next_replica = itertools.count()
+
+def configure_replicas(engines) -> None:
+    """Replaces the replica engines (none disables replica reads).
+
+    Called from the app's lifespan with REPLICA_URLS, so importing the app opens no connections.
+    """
+    global _replica_sessionmakers
+    _replica_sessionmakers = [
+        sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=replica) for replica in engines
+    ]
+
+def dispose_replicas() -> None:
+    """Closes the replica engines' pools and turns replica reads off."""
+    for factory in _replica_sessionmakers:
+        factory.kw["bind"].dispose()
+    configure_replicas([])
+
+def has_replicas() -> bool:
+    return bool(_replica_sessionmakers)
+
+def replica_sessionmaker():
+    """Session factory of the next replica (round robin), or None without replicas."""
+    replicas = _replica_sessionmakers
+    if not replicas:
+        return None
+    return replicas[next(_next_replica) % len(replicas)]
+
+# Tenancy: with TODO_TENANCY=shared (default) every user's tasks live in DATABASE_URL,
+# scoped by tasks.user_id. TODO_TENANCY=database gives each user a database of their
+# own, TODO_TENANT_DATABASE_URL with {user_id} filled in (a SQLite file per user by
+# default), so one heavy user's writes and scans never wait on or evict another's.
+# Users themselves stay in DATABASE_URL. At most TODO_TENANT_ENGINES tenant engines
+# are kept open; the least recently used one is disposed to make room.
+TENANCY = os.getenv("TODO_TENANCY", "shared").lower()
+TENANT_DATABASE_URL = os.getenv("TODO_TENANT_DATABASE_URL", "sqlite:///tenants/{user_id}.db")
+TENANT_ENGINES = _env_int("TODO_TENANT_ENGINES", 64)
+TENANT_POOL_SIZE = _env_int("TODO_TENANT_POOL_SIZE", 5)
+
+
+class TenantEngines:
+    """LRU of per-tenant engines; a tenant's database is created and migrated on first use."""
+
+    def __init__(self, url_template: str = TENANT_DATABASE_URL, maxsize: int = TENANT_ENGINES, **engine_options):
+        self.url_template = url_template
+        self.maxsize = maxsize
+        self.engine_options = {"pool_size": TENANT_POOL_SIZE, **engine_options}
+        self._tenants: "OrderedDict[int, tuple]" = OrderedDict() # user_id -> (engine, sessionmaker)
+        self._lock = threading.Lock()
+
+    def sessionmaker(self, user_id: int) -> sessionmaker:
+        with self._lock:
+            tenant = self._tenants.get(user_id)
+            if tenant is not None:
+                self._tenants.move_to_end(user_id)
+                return tenant[1]
+            # Opening a tenant is rare, so it may hold up other first opens briefly
+            tenant_engine = self._open(user_id)
+            factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=tenant_engine)
+            self._tenants[user_id] = (tenant_engine, factory)
+            while len(self._tenants) > self.maxsize:
+                _, (evicted, _) = self._tenants.popitem(last=False)
+                # Sessions still using it finish normally; their connections close on return
+                evicted.dispose()
+            return factory
+
+    def _open(self, user_id: int):
+        from .migrations import upgrade
+        from .models import ensure_user_row
+        url = self.url_template.format(user_id=int(user_id))
+        path = make_url(url).database
+        if is_sqlite(url) and path and path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tenant_engine = make_engine(url, **self.engine_options)
+        upgrade(tenant_engine)
+        with tenant_engine.begin() as connection:
+            # A row of its own for the tenant, so tasks.user_id's foreign key holds in its database too
+            ensure_user_row(connection, user_id)
+        return tenant_engine
+
+    def engines(self) -> list:
+        """Engines of the tenants currently open."""
+        with self._lock:
+            return [tenant_engine for tenant_engine, _ in self._tenants.values()]
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._tenants
+
+    def dispose(self) -> None:
+        with self._lock:
+            for tenant_engine, _ in self._tenants.values():
+                tenant_engine.dispose()
+            self._tenants.clear()
+
+
+tenant_engines = TenantEngines() if TENANCY == "database" else None
+
+def session_factory(user_id: int) -> sessionmaker:
+    """Session factory holding the user's tasks."""
+    if tenant_engines is None:
+        return SessionLocal
+    return tenant_engines.sessionmaker(user_id)
+
+# Opt-in async stack: set TODO_ASYNC_DB=1 to serve the core task routes with
+# async handlers on an async engine (aiosqlite locally, asyncpg for Postgres).
+USE_ASYNC_DB = os.getenv("TODO_ASYNC_DB", "").lower() in ("1", "true", "yes")
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """Maps a sync database URL onto its async driver equivalent."""
+    scheme, sep, rest = url.partition("://")
+    return _ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+ASYNC_DATABASE_URL = os.getenv("TODO_ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL, pragmas: dict = None, **kwargs):
+    """Async counterpart of make_engine."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    options = {"pool_pre_ping": not is_sqlite(url)}
+    options.update(_pool_options(url, kwargs))
+    options.update(kwargs)
+    async_engine = create_async_engine(url, **options)
+    if is_sqlite(url):
+        apply_sqlite_pragmas(async_engine.sync_engine, pragmas)
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+# The async engine is created lazily so the async drivers are only required
+# when the async stack is actually used.
+_async_sessionmaker = None
+
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        # Objects stay usable after commit without an implicit (blocking) reload
+        _async_sessionmaker = async_sessionmaker(bind=make_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+
+# The async routes read from the same replicas (TODO_DATABASE_REPLICA_URLS)
+# through the async driver; configured alongside the sync ones at startup.
+_async_replica_sessionmakers = []
+
+def configure_async_replicas(engines) -> None:
+    """Replaces the async replica engines (none makes the async routes read from the primary)."""
+    global _async_replica_sessionmakers
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    _async_replica_sessionmakers = [
+        async_sessionmaker(bind=replica, autoflush=False, expire_on_commit=False) for replica in engines
+    ]
+
+async def dispose_async_replicas() -> None:
+    for factory in _async_replica_sessionmakers:
+        await factory.kw["bind"].dispose()
+    configure_async_replicas([])
+
+def async_replica_sessionmaker():
+    """Async session factory of the next replica (round robin), or None without replicas."""
+    replicas = _async_replica_sessionmakers
+    if not replicas:
+        return None
+    return replicas[next(_next_replica) % len(replicas)]
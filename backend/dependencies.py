@@ -1,9 +1,118 @@
+import logging
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.requests import HTTPConnection
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
-from .database import SessionLocal
+from . import crud
+from . import crud_async
+from .database import (
+    SessionLocal, async_replica_sessionmaker, get_async_sessionmaker, replica_sessionmaker, session_factory,
+)
+from .models import DEFAULT_USER_ID
+
+log = logging.getLogger(__name__)
+
+# Read-your-writes with replicas: write responses set this cookie to their change
+# token (see routers.tasks.set_change_token). API clients without cookies can send
+# the token in the header instead.
+CHANGE_TOKEN_COOKIE = "todo_change_token"
+MIN_CHANGE_TOKEN_HEADER = "X-Min-Change-Token"
 
-def get_db():
+# Requests name the user whose tasks they work on. Authentication is future scope
+# (spec 3.6), so put the API behind something that sets this header reliably
+# before exposing it to more than one user. Without it, requests act as the
+# default user. EventSource cannot send headers, so ?user_id= works as well.
+USER_ID_HEADER = "X-User-Id"
+
+# Users are never deleted, so a user seen once needs no further lookups
+_known_users = set()
+
+def get_directory_db():
+    """Session on the main database, which holds the users (also with a database per tenant)."""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_user_id(connection: HTTPConnection, directory: Session = Depends(get_directory_db)) -> int:
+    raw = connection.headers.get(USER_ID_HEADER) or connection.query_params.get("user_id")
+    if not raw:
+        return DEFAULT_USER_ID
+    try:
+        user_id = int(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid user ID: {raw!r}")
+    if user_id not in _known_users:
+        try:
+            known = crud.get_user(directory, user_id) is not None
+        finally:
+            # Hand the connection back before the route's own session takes one
+            directory.close()
+        if not known:
+            raise HTTPException(status_code=401, detail="Unknown user")
+        _known_users.add(user_id)
+    return user_id
+
+def get_db(user_id: int = Depends(get_user_id)):
+    db = session_factory(user_id)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+def required_change_seq(request: Request) -> int:
+    """Change token the client must see reflected in reads (0 for none)."""
+    token = request.headers.get(MIN_CHANGE_TOKEN_HEADER) or request.cookies.get(CHANGE_TOKEN_COOKIE)
+    try:
+        return int(token) if token else 0
+    except ValueError:
+        return 0
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)):
+    """Session for read-only routes: a replica that has caught up with the client's writes, else the primary.
+
+    Sessions connect lazily, so the unused primary session costs nothing.
+    """
+    factory = replica_sessionmaker()
+    if factory is None:
+        yield primary
+        return
+    replica = factory()
+    try:
+        db = replica
+        min_seq = required_change_seq(request)
+        if min_seq:
+            try:
+                if crud.get_change_seq(replica) < min_seq:
+                    db = primary # the replica has not replayed this client's last write yet
+            except OperationalError as e:
+                log.warning(f"Replica unavailable, reading from the primary: {e}")
+                db = primary
+        yield db
+    finally:
+        replica.close()
+
+async def get_async_read_db(request: Request, primary=Depends(get_async_db)):
+    """Async counterpart of get_read_db for the TODO_ASYNC_DB routes."""
+    factory = async_replica_sessionmaker()
+    if factory is None:
+        yield primary
+        return
+    async with factory() as replica:
+        db = replica
+        min_seq = required_change_seq(request)
+        if min_seq:
+            try:
+                if await crud_async.get_change_seq(replica) < min_seq:
+                    db = primary # the replica has not replayed this client's last write yet
+            except OperationalError as e:
+                log.warning(f"Replica unavailable, reading from the primary: {e}")
+                db = primary
+        yield db
@@ -0,0 +1,30 @@
+import hashlib
+
+from fastapi import Request, Response
+
+# Conditional GET support for the task read endpoints.
+# ETags are derived from change sequence numbers (see models.SyncState), so an
+# unchanged resource is answered with 304 without loading or serializing tasks.
+# They are weak: they name a version of the data, and the GZip/Brotli middleware
+# sends that version as differently encoded bytes depending on Accept-Encoding.
+
+
+def make_etag(*parts) -> str:
+    """Builds a weak ETag from the values that identify a response version."""
+    digest = hashlib.blake2b(":".join(str(part) for part in parts).encode(), digest_size=12)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header covers `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # Weak comparison is what If-None-Match uses, so ignore the W/ prefixes
+    opaque = etag.removeprefix("W/")
+    return "*" in candidates or any(candidate.removeprefix("W/") == opaque for candidate in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
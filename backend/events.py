@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+from . import schemas
+
+# Pub/sub of task changes for the /tasks/stream (SSE) and /tasks/ws (WebSocket) endpoints.
+#
+# crud write functions call publish_* after committing. Events are fanned out to
+# subscribers through bounded per-client queues: a subscriber that cannot keep up
+# has its backlog replaced by a single "resync" event, after which the client
+# catches up through GET /tasks/changes using the token of the last event it saw.
+#
+# TODO_EVENTS_BACKEND=memory (default) delivers within this process only;
+# TODO_EVENTS_BACKEND=redis relays events through Redis pub/sub so every worker
+# sees every write (requires the 'redis' package).
+#
+# Every event carries the user_id of the written tasks and reaches only that
+# user's subscribers.
+
+EVENTS_BACKEND = os.getenv("TODO_EVENTS_BACKEND", "memory").lower()
+EVENTS_URL = os.getenv("TODO_EVENTS_URL", "redis://localhost:6379/0")
+EVENTS_CHANNEL = os.getenv("TODO_EVENTS_CHANNEL", "todo:task-events")
+EVENTS_QUEUE_SIZE = int(os.getenv("TODO_EVENTS_QUEUE_SIZE", "100"))
+
+log = logging.getLogger(__name__)
+
+RESYNC_EVENT = {"type": "resync"}
+
+
+class Subscriber:
+    """One connected client: a bounded queue owned by the client's event loop."""
+
+    def __init__(self, user_id: int, maxsize: int = EVENTS_QUEUE_SIZE):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event: dict) -> None:
+        """Queues `event`; must run on the subscriber's loop."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow: drop the backlog and tell the client to catch up via /tasks/changes
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+class EventBroker:
+    """In-process fan-out; safe to publish from any thread."""
+
+    def __init__(self):
+        # Indexed by user, so a write only visits the subscribers of the user it belongs to
+        self._subscribers: Dict[int, List[Subscriber]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int, maxsize: int = EVENTS_QUEUE_SIZE) -> Subscriber:
+        subscriber = Subscriber(user_id, maxsize)
+        with self._lock:
+            # Copy on write: dispatch iterates a user's list outside the lock
+            self._subscribers[user_id] = [*self._subscribers.get(user_id, ()), subscriber]
+            self._count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id, [])
+            if subscriber in subscribers:
+                remaining = [other for other in subscribers if other is not subscriber]
+                if remaining:
+                    self._subscribers[subscriber.user_id] = remaining
+                else:
+                    del self._subscribers[subscriber.user_id]
+                self._count -= 1
+
+    def subscriber_count(self) -> int:
+        return self._count
+
+    def dispatch(self, event: dict) -> None:
+        """Delivers `event` to its user's local subscribers, hopping onto each event loop once."""
+        subscribers = self._subscribers.get(event.get("user_id"))
+        if not subscribers:
+            return
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscriber]] = {}
+        for subscriber in subscribers:
+            by_loop.setdefault(subscriber.loop, []).append(subscriber)
+        for loop, loop_subscribers in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_offer_all, loop_subscribers, event)
+            except RuntimeError: # loop already closed; its subscribers are gone
+                pass
+
+
+def _offer_all(subscribers: List[Subscriber], event: dict) -> None:
+    for subscriber in subscribers:
+        subscriber.offer(event)
+
+
+class LocalBackend:
+    """Delivers events only to subscribers in this process."""
+
+    def __init__(self, broker: EventBroker):
+        self.broker = broker
+
+    def wants_events(self) -> bool:
+        return self.broker.subscriber_count() > 0
+
+    def publish(self, event: dict) -> None:
+        self.broker.dispatch(event)
+
+    def start(self) -> None:
+        pass
+
+
+class RedisBackend(LocalBackend):
+    """Relays events through Redis pub/sub so subscribers in every worker get them."""
+
+    def __init__(self, broker: EventBroker, url: str = EVENTS_URL, channel: str = EVENTS_CHANNEL):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("TODO_EVENTS_BACKEND=redis requires the 'redis' package") from e
+        super().__init__(broker)
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._listener: Optional[threading.Thread] = None
+
+    def wants_events(self) -> bool:
+        return True # subscribers may be connected to other workers
+
+    def publish(self, event: dict) -> None:
+        self._client.publish(self.channel, json.dumps(event))
+
+    def start(self) -> None:
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen, name="task-events", daemon=True)
+            self._listener.start()
+
+    def _listen(self) -> None:
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            try:
+                self.broker.dispatch(json.loads(message["data"]))
+            except (ValueError, KeyError) as e:
+                log.error(f"Dropping malformed task event: {e}")
+
+
+broker = EventBroker()
+backend = RedisBackend(broker) if EVENTS_BACKEND == "redis" else LocalBackend(broker)
+
+
+def subscribe(user_id: int) -> Subscriber:
+    """Registers a subscriber for the user's events on the running event loop."""
+    backend.start()
+    return broker.subscribe(user_id)
+
+def unsubscribe(subscriber: Subscriber) -> None:
+    broker.unsubscribe(subscriber)
+
+
+def publish_task(kind: str, db_task) -> None:
+    """Publishes a created/updated/deleted event carrying the task and its change token."""
+    if not backend.wants_events():
+        return
+    backend.publish({
+        "type": kind,
+        "user_id": db_task.user_id,
+        "id": db_task.id,
+        "token": str(db_task.change_seq) if db_task.change_seq is not None else None,
+        "task": schemas.Task.model_validate(db_task).model_dump(mode="json"),
+    })
+
+def publish_deleted(user_id: int, task_id: int, seq: int) -> None:
+    """Publishes a deleted event for a single task."""
+    if not backend.wants_events():
+        return
+    backend.publish({"type": "deleted", "user_id": user_id, "id": task_id, "token": str(seq), "task": None})
+
+def publish_changed(user_id: int, last_seq: Optional[int]) -> None:
+    """Publishes one event for a bulk write; clients fetch the details from /tasks/changes."""
+    if last_seq is None or not backend.wants_events():
+        return
+    backend.publish({"type": "changed", "user_id": user_id, "token": str(last_seq)})
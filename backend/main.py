@@ -1,13 +1,31 @@
-from fastapi import FastAPI # Removed Depends, HTTPException
+from fastapi import FastAPI, Response # Removed Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware # Import CORS middleware
+from fastapi.middleware.gzip import GZipMiddleware
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import timedelta
 # Removed Session, List imports as they are no longer used directly here
 
 # Use relative imports within the backend package
 from . import crud 
 from . import models
 from . import schemas
-from .database import SessionLocal, engine, create_db_tables
+from .database import (
+    REPLICA_URLS, SessionLocal, TENANCY, USE_ASYNC_DB, configure_async_replicas, configure_replicas,
+    dispose_async_replicas, dispose_replicas, engine, make_async_engine, make_engine, tenant_engines, to_async_url,
+)
+from .admission import AdmissionMiddleware
+from . import archive
+from . import migrations
+from .cache import get_cache
+from .metrics import MetricsMiddleware, render_metrics
 from .routers import tasks # Import the tasks router
+from .routers import tasks_async
+from .routers import events
+from .routers import tasks_grouped
+from .routers import users
+from .writer import GROUP_COMMIT
 
 # Create DB tables if they don't exist (moved after imports)
 # models.Base.metadata.create_all(bind=engine) # <<< Comment this out for now
@@ -18,7 +36,41 @@ origins = [
     # Add any other origins if needed, e.g., deployed frontend URL
 ]
 
-app = FastAPI(title="Todo List API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bring the schema up to date at startup unless migrations are run separately
+    # (TODO_AUTO_MIGRATE=0, e.g. `python -m backend.migrations` in a deploy step)
+    if migrations.AUTO_MIGRATE:
+        migrations.upgrade(engine)
+    if REPLICA_URLS and TENANCY == "database":
+        # Replicas copy the main database, not the tenants' own
+        log.warning("TODO_DATABASE_REPLICA_URLS is ignored with a database per tenant")
+    elif REPLICA_URLS:
+        configure_replicas([make_engine(url) for url in REPLICA_URLS])
+        if USE_ASYNC_DB:
+            configure_async_replicas([make_async_engine(to_async_url(url)) for url in REPLICA_URLS])
+    archiver = None
+    if archive.ARCHIVE_AFTER_DAYS > 0:
+        # The main database, plus each tenant database that is open when a pass starts
+        archiver = archive.Archiver(
+            lambda: [engine, *(tenant_engines.engines() if tenant_engines is not None else [])],
+            timedelta(days=archive.ARCHIVE_AFTER_DAYS),
+        )
+        archiver.start()
+    yield
+    if archiver is not None:
+        archiver.stop()
+    # Close pooled connections so a reload or test run does not leak them
+    dispose_replicas()
+    await dispose_async_replicas()
+    if tenant_engines is not None:
+        tenant_engines.dispose()
+
+app = FastAPI(title="Todo List API", lifespan=lifespan)
+
+# Innermost, so shed requests still get CORS headers and show up in the metrics,
+# but are turned away before routing, the threadpool or a database connection.
+app.add_middleware(AdmissionMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,18 +78,54 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Allow all methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"], # Allow all headers
+    expose_headers=["X-Next-Cursor", "ETag", tasks.CHANGE_TOKEN_HEADER], # Let the browser read cursors, ETags and change tokens
 )
 
+# Compress large responses (e.g. long task lists). Brotli is used when the optional
+# brotli-asgi package is installed (it falls back to gzip for clients without br support).
+COMPRESSION_MIN_SIZE = int(os.getenv("TODO_COMPRESSION_MIN_SIZE", "1000"))
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Outermost, so request latency includes compression. TODO_SERVER_TIMING=1 adds a
+# Server-Timing header (db / serialize / app / total) to every response.
+app.add_middleware(MetricsMiddleware)
+
 # Removed get_db dependency function
 
-# Include the tasks router
+log = logging.getLogger(__name__)
+
+# Include the tasks router (group-commit writes, then async handlers, first when enabled).
+# The event stream routes go first so /tasks/stream is not taken for a task ID.
+# Both optional write paths use the main engine only, so a database per tenant
+# (TODO_TENANCY=database) turns them off.
+app.include_router(users.router)
+app.include_router(events.router)
+if TENANCY == "database" and (GROUP_COMMIT or USE_ASYNC_DB):
+    log.warning("TODO_GROUP_COMMIT and TODO_ASYNC_DB are ignored with a database per tenant")
+else:
+    if GROUP_COMMIT:
+        app.include_router(tasks_grouped.router)
+    if USE_ASYNC_DB:
+        app.include_router(tasks_async.router)
 app.include_router(tasks.router)
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Todo List API"}
 
-# --- Task Endpoints Removed --- 
+@app.get("/cache/stats")
+def read_cache_stats():
+    """Hit/miss counters of the task response cache."""
+    return get_cache().stats()
 
-# Moved create_db_tables call to the end to ensure app/routers are defined
-create_db_tables() 
\ No newline at end of file
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Prometheus metrics in the text exposition format."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# --- Task Endpoints Removed --- 
@@ -0,0 +1,205 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from sqlalchemy import event
+
+# Prometheus metrics for the API and the database layer, exposed at GET /metrics.
+#
+# MetricsMiddleware times every request per route template (e.g. /tasks/{task_id})
+# and, with TODO_SERVER_TIMING=1, adds a Server-Timing header splitting the request
+# into database, serialization and remaining application time. instrument_engine()
+# hooks each engine created by database.make_engine/make_async_engine to count and
+# time queries, pool checkouts and commits. The todo_admission_* metrics are
+# updated by admission.AdmissionMiddleware.
+
+SERVER_TIMING = os.getenv("TODO_SERVER_TIMING", "").lower() in ("1", "true", "yes")
+
+# Query latencies are far below the default request buckets
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUESTS = Counter(
+    "todo_http_requests_total", "HTTP requests handled.", ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "todo_http_request_duration_seconds", "Time until the response headers were sent.", ["method", "route"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "todo_http_requests_in_progress", "HTTP requests currently being handled.", ["method"],
+)
+REQUEST_QUERIES = Histogram(
+    "todo_http_request_db_queries", "Database queries issued per request.", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100, 250),
+)
+DB_QUERIES = Counter(
+    "todo_db_queries_total", "SQL statements executed.", ["operation"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "todo_db_query_duration_seconds", "SQL statement execution time.", ["operation"], buckets=DB_BUCKETS,
+)
+DB_POOL_CHECKOUT = Histogram(
+    "todo_db_pool_checkout_seconds", "Time spent waiting for a pooled connection.", buckets=DB_BUCKETS,
+)
+DB_COMMIT_LATENCY = Histogram(
+    "todo_db_commit_duration_seconds", "Transaction COMMIT time.", buckets=DB_BUCKETS,
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "todo_admission_in_flight", "Admitted task requests currently running.", ["kind"],
+)
+ADMISSION_QUEUED = Gauge(
+    "todo_admission_queued", "Task requests waiting for a concurrency slot.", ["kind"],
+)
+ADMISSION_WAIT = Histogram(
+    "todo_admission_wait_seconds", "Time admitted requests waited for a concurrency slot.", ["kind"],
+    buckets=DB_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "todo_admission_rejected_total", "Task requests shed before reaching a handler.", ["kind", "reason"],
+)
+
+# Label children resolved once: .labels() takes a lock and is the costly part of a hot-path update
+_QUERY_METRICS = {
+    operation: (DB_QUERIES.labels(operation), DB_QUERY_LATENCY.labels(operation))
+    for operation in ("select", "insert", "update", "delete", "other")
+}
+
+
+class RequestStats:
+    """Timings collected while handling one request."""
+
+    __slots__ = ("queries", "db", "serialize")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+
+
+# The middleware sets this per request; the threadpool that runs sync handlers
+# copies the context, so engine events there update the same object.
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class serialization_timer:
+    """Adds the time spent in the block to the current request's serialization time."""
+
+    __slots__ = ("start",)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.serialize += time.perf_counter() - self.start
+
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_start
+    count, latency = _QUERY_METRICS.get(statement.lstrip()[:6].lower()) or _QUERY_METRICS["other"]
+    count.inc()
+    latency.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db += elapsed
+
+def _timed(func, histogram: Histogram):
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            histogram.observe(elapsed)
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.db += elapsed
+    return timed
+
+def instrument_engine(engine) -> None:
+    """Records query, pool checkout and commit metrics for a sync engine.
+
+    Pass async_engine.sync_engine for async engines.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    # Neither has an "after" event, so wrap the calls themselves. Patching the
+    # engine (not its pool) survives engine.dispose() recreating the pool.
+    engine.raw_connection = _timed(engine.raw_connection, DB_POOL_CHECKOUT)
+    engine.dialect.do_commit = _timed(engine.dialect.do_commit, DB_COMMIT_LATENCY)
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    # Label by template, never by raw path, to keep the number of series bounded
+    return getattr(route, "path", None) or "<unmatched>"
+
+def server_timing(stats: RequestStats, total: float) -> bytes:
+    app = max(total - stats.db - stats.serialize, 0.0)
+    return (
+        f'db;dur={stats.db * 1000:.2f};desc="{stats.queries} queries", '
+        f"serialize;dur={stats.serialize * 1000:.2f}, "
+        f"app;dur={app * 1000:.2f}, "
+        f"total;dur={total * 1000:.2f}"
+    ).encode()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (streaming responses pass through untouched)."""
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        # Nested instances (e.g. a wrapped app) share the outer request's stats
+        stats = _request_stats.get() or RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_metrics(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+                route = _route_template(scope)
+                REQUEST_LATENCY.labels(method, route).observe(elapsed)
+                REQUEST_QUERIES.labels(route).observe(stats.queries)
+                if self.server_timing:
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", server_timing(stats, elapsed))]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            in_progress.dec()
+            REQUESTS.labels(method, _route_template(scope), str(status)).inc()
+            _request_stats.reset(token)
+
+
+def metrics_registry() -> CollectorRegistry:
+    # Under gunicorn/uvicorn workers, aggregate the per-process files instead
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def render_metrics():
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
@@ -0,0 +1,123 @@
+import argparse
+import logging
+import os
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import inspect, select, text
+
+from . import models
+from . import stats
+from .database import DATABASE_URL, Base, is_sqlite, make_engine
+
+# Numbered schema migrations, applied in order by upgrade() and recorded in the
+# schema_migrations table.
+#
+# Run them before starting the API (`python -m backend.migrations`), or let the
+# app apply them at startup with TODO_AUTO_MIGRATE=1 (the default for SQLite).
+#
+# Migration 1 creates the tables of the current models, so a fresh database gets
+# later columns and tables up front: every migration must be a no-op when its
+# change already exists. Databases created before migrations existed have no
+# version yet and run all of them, which brings them up to date.
+
+AUTO_MIGRATE = os.getenv("TODO_AUTO_MIGRATE", "1" if is_sqlite(DATABASE_URL) else "0").lower() in ("1", "true", "yes")
+
+log = logging.getLogger(__name__)
+
+# Key of the Postgres advisory lock that serializes concurrent upgrades (e.g. several workers starting)
+_PG_LOCK_KEY = 727465
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable # (connection) -> None
+
+
+def _create_tables(connection):
+    # Includes schema_migrations itself
+    Base.metadata.create_all(bind=connection)
+
+def _add_task_owners(connection):
+    models.ensure_tenancy(connection)
+    stats.install(connection)
+
+def _create_task_archive(connection):
+    models.ArchivedTask.__table__.create(connection, checkfirst=True)
+
+def _count_archived_tasks(connection):
+    # Triggers on tasks_archive keep archived tasks in search and statistics from
+    # now on; add the tasks archived before them
+    if connection.dialect.name == "sqlite":
+        models.ensure_search_index(connection)
+        models.index_archived_tasks(connection)
+    stats.install(connection)
+
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create tables", _create_tables),
+    Migration(2, "change tracking", models.ensure_change_tracking),
+    Migration(3, "task indexes", models.ensure_indexes),
+    Migration(4, "search index", models.ensure_search_index),
+    # Statistics are keyed by user since migration 6, which installs them
+    Migration(5, "task statistics", lambda connection: None),
+    Migration(6, "task owners", _add_task_owners),
+    Migration(7, "task archive", _create_task_archive),
+    Migration(8, "task id autoincrement", models.ensure_task_id_autoincrement),
+    Migration(9, "archived tasks in search and stats", _count_archived_tasks),
+]
+
+HEAD = MIGRATIONS[-1].version
+
+
+def _applied_version(connection) -> int:
+    if not inspect(connection).has_table(models.SchemaMigration.__tablename__):
+        return 0
+    return connection.scalar(select(models.SchemaMigration.version).order_by(models.SchemaMigration.version.desc()).limit(1)) or 0
+
+def current_version(engine) -> int:
+    """Latest migration applied to the database (0 for none)."""
+    with engine.connect() as connection:
+        return _applied_version(connection)
+
+def upgrade(engine, target: int = HEAD) -> List[int]:
+    """Applies the pending migrations up to `target`, each in its own transaction.
+
+    Returns the versions applied.
+    """
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version > target:
+            break
+        with engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+            # Checked inside the transaction: another process may have just applied it
+            if migration.version <= _applied_version(connection):
+                continue
+            log.info(f"Applying migration {migration.version}: {migration.name}")
+            migration.apply(connection)
+            connection.execute(models.SchemaMigration.__table__.insert().values(version=migration.version, name=migration.name))
+        applied.append(migration.version)
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or inspect database schema migrations.")
+    parser.add_argument("command", nargs="?", choices=["upgrade", "current"], default="upgrade")
+    parser.add_argument("--url", default=DATABASE_URL, help="Database URL (default: TODO_DATABASE_URL)")
+    parser.add_argument("--target", type=int, default=HEAD, help="Migrate up to this version")
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    if args.command == "current":
+        print(f"{current_version(engine)} (head: {HEAD})")
+        return
+    applied = upgrade(engine, args.target)
+    print(f"Applied {applied}" if applied else "Already up to date", f"- at version {current_version(engine)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,16 +1,401 @@
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, String, Text, DateTime, Index, event, inspect
 # from sqlalchemy.sql import func # No longer needed for default
 from datetime import datetime # Import datetime
+from typing import Optional
 from .database import Base
 
+# Owner of tasks written without an explicit user (single-user setups, existing clients)
+DEFAULT_USER_ID = 1
+
+class User(Base):
+    """Owner of tasks. Authentication is future scope (spec 3.6): requests name their user in X-User-Id."""
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True)
+    username = Column(String, unique=True, nullable=False)
+    email = Column(String, unique=True, nullable=False)
+    password_hash = Column(String, nullable=True) # set once authentication exists
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
 class Task(Base):
     __tablename__ = "tasks"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Every query is scoped to one user, so each index below leads on user_id
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, default=DEFAULT_USER_ID)
     title = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
-    category = Column(String, nullable=True, index=True)
+    category = Column(String, nullable=True) # indexed by ix_tasks_category_updated_at
     # Use Python's utcnow for default and onupdate
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
-    completed = Column(Boolean, default=False) 
\ No newline at end of file
+    completed = Column(Boolean, default=False)
+    # Position in the change feed (GET /tasks/changes), bumped by every write in crud
+    change_seq = Column(Integer, nullable=True, index=True)
+
+    # Composite indexes backing the filters and sort orders of GET /tasks/, each
+    # confined to one user's tasks. The trailing id makes (sort column, id) keyset
+    # pagination an index range scan.
+    __table_args__ = (
+        Index("ix_tasks_user_id", "user_id", "id"),
+        Index("ix_tasks_user_completed_id", "user_id", "completed", "id"),
+        Index("ix_tasks_user_category_id", "user_id", "category", "id"),
+        Index("ix_tasks_user_completed_created_at", "user_id", "completed", "created_at", "id"),
+        Index("ix_tasks_user_completed_updated_at", "user_id", "completed", "updated_at", "id"),
+        Index("ix_tasks_user_category_created_at", "user_id", "category", "created_at", "id"),
+        Index("ix_tasks_user_category_updated_at", "user_id", "category", "updated_at", "id"),
+        Index("ix_tasks_user_created_at", "user_id", "created_at", "id"),
+        Index("ix_tasks_user_updated_at", "user_id", "updated_at", "id"),
+        Index("ix_tasks_user_change_seq", "user_id", "change_seq"),
+        # IDs are never handed out twice, so a new task cannot take the ID of a
+        # deleted or archived one (migration 8 rebuilds older tables this way)
+        {"sqlite_autoincrement": True},
+    )
+
+# Indexes replaced by the user_id-leading ones above (dropped by ensure_tenancy)
+LEGACY_TASK_INDEXES = (
+    "ix_tasks_completed_id", "ix_tasks_category_id",
+    "ix_tasks_completed_created_at", "ix_tasks_completed_updated_at",
+    "ix_tasks_category_created_at", "ix_tasks_category_updated_at",
+    "ix_tasks_created_at", "ix_tasks_updated_at",
+)
+
+class TaskTombstone(Base):
+    """Records a deleted task so delta sync clients can drop it.
+
+    SQLite reused task IDs before migration 8, so the change feed ignores
+    tombstones of IDs that exist again.
+    """
+    __tablename__ = "task_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False, default=DEFAULT_USER_ID)
+    change_seq = Column(Integer, nullable=False, index=True)
+    deleted_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_task_tombstones_user_change_seq", "user_id", "change_seq"),
+    )
+
+class ArchivedTask(Base):
+    """A completed task moved out of tasks by the archiver (see backend/archive.py).
+
+    Same columns as Task, so reads can serve either. Archived tasks still count in
+    search and statistics (tasks_archive has triggers of its own, so a move between
+    the tables changes neither); a write to one moves it back to tasks first.
+    """
+    __tablename__ = "tasks_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False) # the task's ID in tasks
+    user_id = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    category = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    completed = Column(Boolean)
+    change_seq = Column(Integer, nullable=True)
+    archived_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    # Lists with include_archived page through these alongside the tasks indexes
+    __table_args__ = (
+        Index("ix_tasks_archive_user_id", "user_id", "id"),
+        Index("ix_tasks_archive_user_created_at", "user_id", "created_at", "id"),
+        Index("ix_tasks_archive_user_updated_at", "user_id", "updated_at", "id"),
+        Index("ix_tasks_archive_user_change_seq", "user_id", "change_seq"),
+    )
+
+# Columns copied between tasks and tasks_archive
+ARCHIVED_COLUMNS = (
+    "id", "user_id", "title", "description", "category", "created_at", "updated_at", "completed", "change_seq",
+)
+
+class SyncState(Base):
+    """Single-row counter handing out change sequence numbers.
+
+    Allocating a number updates this row, which serializes writers until commit,
+    so sequence numbers become visible to readers in order.
+    """
+    __tablename__ = "sync_state"
+
+    id = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=False, default=0)
+    pruned_seq = Column(Integer, nullable=False, default=0) # tombstones up to here were discarded
+
+SYNC_STATE_ID = 1
+
+class TaskCategoryCount(Base):
+    """Number of a user's tasks per (category, completed), kept current by triggers on tasks.
+
+    Tasks without a category are counted under ''.
+    """
+    __tablename__ = "task_category_counts"
+
+    user_id = Column(Integer, primary_key=True)
+    category = Column(String, primary_key=True)
+    completed = Column(Boolean, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+class TaskDailyCount(Base):
+    """Number of a user's tasks per creation day (UTC), kept current by triggers on tasks."""
+    __tablename__ = "task_daily_counts"
+
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+class SchemaMigration(Base):
+    """One row per migration applied to this database (see backend/migrations.py)."""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+# --- Full-text search (SQLite FTS5) ---
+# tasks_fts is an external-content index over tasks; triggers keep it in sync with
+# every write path (single, bulk and raw SQL) so crud does not have to.
+# user_id is indexed too: searches add `user_id : "<id>"`, which FTS5 intersects
+# with the word matches, so one user's search never visits other users' hits.
+# Archived tasks stay indexed: triggers on tasks_archive add and remove them as
+# they move, so the index holds each task once, under its ID, in either table.
+TASKS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description, category, user_id,
+        content='tasks', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description, category, user_id)
+        VALUES (new.id, new.title, new.description, new.category, new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description, category, user_id)
+        VALUES ('delete', old.id, old.title, old.description, old.category, old.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description, category ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description, category, user_id)
+        VALUES ('delete', old.id, old.title, old.description, old.category, old.user_id);
+        INSERT INTO tasks_fts(rowid, title, description, category, user_id)
+        VALUES (new.id, new.title, new.description, new.category, new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_archive_fts_ai AFTER INSERT ON tasks_archive BEGIN
+        INSERT INTO tasks_fts(rowid, title, description, category, user_id)
+        VALUES (new.id, new.title, new.description, new.category, new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_archive_fts_ad AFTER DELETE ON tasks_archive BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description, category, user_id)
+        VALUES ('delete', old.id, old.title, old.description, old.category, old.user_id);
+    END""",
+]
+TASKS_FTS_TRIGGERS = ("tasks_fts_ai", "tasks_fts_ad", "tasks_fts_au", "tasks_archive_fts_ai", "tasks_archive_fts_ad")
+
+def ensure_search_index(connection):
+    """Creates the FTS5 index and triggers if missing, backfilling existing tasks."""
+    if connection.dialect.name != "sqlite":
+        return
+    if "user_id" not in {column["name"] for column in inspect(connection).get_columns("tasks")}:
+        return # built by ensure_tenancy once tasks have owners
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+    ).first()
+    for statement in TASKS_FTS_DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        # bm25 column weights: title matches rank above category, then description; user_id only filters
+        connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0, 0.0)')")
+        connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+        index_archived_tasks(connection)
+
+def index_archived_tasks(connection):
+    """Adds the archived tasks to the search index; 'rebuild' only reads tasks."""
+    connection.exec_driver_sql(
+        "INSERT INTO tasks_fts(rowid, title, description, category, user_id) "
+        "SELECT id, title, description, category, user_id FROM tasks_archive"
+    )
+
+def drop_search_index(connection):
+    """Drops the FTS5 index and its triggers (e.g. around bulk loads; restore with ensure_search_index)."""
+    if connection.dialect.name == "sqlite":
+        for trigger in TASKS_FTS_TRIGGERS:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS tasks_fts")
+
+# --- Task statistics (GET /tasks/stats) ---
+# Triggers keep task_category_counts and task_daily_counts in step with every write
+# to tasks, so reading a user's stats costs one row per category and day rather
+# than a scan. Writers already serialize on the sync_state row, so the shared
+# counter rows add no new contention. Archived tasks count too: tasks_archive
+# has the same insert and delete triggers, so archiving a task (a delete from
+# tasks plus an insert into tasks_archive) leaves the counts as they were.
+TASK_STATS_DDL = {
+    "sqlite": [
+        """CREATE TRIGGER IF NOT EXISTS task_stats_ai AFTER INSERT ON tasks BEGIN
+            INSERT INTO task_category_counts(user_id, category, completed, total)
+            VALUES (new.user_id, COALESCE(new.category, ''), COALESCE(new.completed, 0), 1)
+            ON CONFLICT(user_id, category, completed) DO UPDATE SET total = total + 1;
+            INSERT INTO task_daily_counts(user_id, day, total)
+            SELECT new.user_id, date(new.created_at), 1 WHERE new.created_at IS NOT NULL
+            ON CONFLICT(user_id, day) DO UPDATE SET total = total + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS task_stats_ad AFTER DELETE ON tasks BEGIN
+            UPDATE task_category_counts SET total = total - 1
+            WHERE user_id = old.user_id AND category = COALESCE(old.category, '') AND completed = COALESCE(old.completed, 0);
+            UPDATE task_daily_counts SET total = total - 1 WHERE user_id = old.user_id AND day = date(old.created_at);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS task_archive_stats_ai AFTER INSERT ON tasks_archive BEGIN
+            INSERT INTO task_category_counts(user_id, category, completed, total)
+            VALUES (new.user_id, COALESCE(new.category, ''), COALESCE(new.completed, 0), 1)
+            ON CONFLICT(user_id, category, completed) DO UPDATE SET total = total + 1;
+            INSERT INTO task_daily_counts(user_id, day, total)
+            SELECT new.user_id, date(new.created_at), 1 WHERE new.created_at IS NOT NULL
+            ON CONFLICT(user_id, day) DO UPDATE SET total = total + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS task_archive_stats_ad AFTER DELETE ON tasks_archive BEGIN
+            UPDATE task_category_counts SET total = total - 1
+            WHERE user_id = old.user_id AND category = COALESCE(old.category, '') AND completed = COALESCE(old.completed, 0);
+            UPDATE task_daily_counts SET total = total - 1 WHERE user_id = old.user_id AND day = date(old.created_at);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS task_stats_au AFTER UPDATE OF category, completed ON tasks
+        WHEN old.category IS NOT new.category OR old.completed IS NOT new.completed BEGIN
+            UPDATE task_category_counts SET total = total - 1
+            WHERE user_id = old.user_id AND category = COALESCE(old.category, '') AND completed = COALESCE(old.completed, 0);
+            INSERT INTO task_category_counts(user_id, category, completed, total)
+            VALUES (new.user_id, COALESCE(new.category, ''), COALESCE(new.completed, 0), 1)
+            ON CONFLICT(user_id, category, completed) DO UPDATE SET total = total + 1;
+        END""",
+    ],
+    "postgresql": [
+        """CREATE OR REPLACE FUNCTION task_stats_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE task_category_counts SET total = total - 1
+                WHERE user_id = OLD.user_id AND category = COALESCE(OLD.category, '')
+                    AND completed = COALESCE(OLD.completed, false);
+            END IF;
+            IF TG_OP = 'DELETE' AND OLD.created_at IS NOT NULL THEN
+                UPDATE task_daily_counts SET total = total - 1
+                WHERE user_id = OLD.user_id AND day = OLD.created_at::date;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO task_category_counts(user_id, category, completed, total)
+                VALUES (NEW.user_id, COALESCE(NEW.category, ''), COALESCE(NEW.completed, false), 1)
+                ON CONFLICT (user_id, category, completed) DO UPDATE SET total = task_category_counts.total + 1;
+            END IF;
+            IF TG_OP = 'INSERT' AND NEW.created_at IS NOT NULL THEN
+                INSERT INTO task_daily_counts(user_id, day, total) VALUES (NEW.user_id, NEW.created_at::date, 1)
+                ON CONFLICT (user_id, day) DO UPDATE SET total = task_daily_counts.total + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""",
+        """CREATE OR REPLACE TRIGGER task_stats_aid AFTER INSERT OR DELETE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION task_stats_apply()""",
+        """CREATE OR REPLACE TRIGGER task_stats_au AFTER UPDATE OF category, completed ON tasks
+        FOR EACH ROW WHEN (OLD.category IS DISTINCT FROM NEW.category OR OLD.completed IS DISTINCT FROM NEW.completed)
+        EXECUTE FUNCTION task_stats_apply()""",
+        """CREATE OR REPLACE TRIGGER task_archive_stats_aid AFTER INSERT OR DELETE ON tasks_archive
+        FOR EACH ROW EXECUTE FUNCTION task_stats_apply()""",
+    ],
+}
+# (trigger, table)
+TASK_STATS_TRIGGERS = (
+    ("task_stats_ai", "tasks"), ("task_stats_ad", "tasks"), ("task_stats_au", "tasks"), ("task_stats_aid", "tasks"),
+    ("task_archive_stats_ai", "tasks_archive"), ("task_archive_stats_ad", "tasks_archive"),
+    ("task_archive_stats_aid", "tasks_archive"),
+)
+
+def ensure_stats_triggers(connection):
+    """Creates the triggers maintaining the task statistics tables (rebuild them after adding the triggers)."""
+    for statement in TASK_STATS_DDL.get(connection.dialect.name, []):
+        connection.exec_driver_sql(statement)
+
+def drop_stats_triggers(connection):
+    """Drops the statistics triggers (e.g. around bulk loads; restore with ensure_stats_triggers and stats.rebuild)."""
+    for trigger, table in TASK_STATS_TRIGGERS:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger} ON {table}")
+        else:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+
+def ensure_indexes(connection):
+    """Creates indexes added to Task after its table was first created.
+
+    Indexes on columns that a later migration adds are left to that migration.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("tasks")}
+    for index in Task.__table__.indexes:
+        if all(column.name in columns for column in index.columns):
+            index.create(connection, checkfirst=True)
+
+def ensure_user_row(connection, user_id: int, username: Optional[str] = None, email: Optional[str] = None) -> None:
+    """Inserts a users row with this ID unless there is one."""
+    if connection.execute(User.__table__.select().where(User.id == user_id)).first() is None:
+        username = username or f"user-{user_id}"
+        connection.execute(User.__table__.insert().values(
+            id=user_id, username=username, email=email or f"{username}@localhost", created_at=datetime.utcnow(),
+        ))
+        if connection.dialect.name == "postgresql":
+            # An explicit ID does not advance the serial sequence: move it past the IDs
+            # in use, or the next POST /users/ would collide with this row
+            connection.exec_driver_sql(
+                "SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT max(id) FROM users))"
+            )
+
+def ensure_tenancy(connection):
+    """Gives tasks and tombstones an owner, moving existing rows to the default user.
+
+    Swaps the old indexes for the user_id-leading ones and rebuilds the search
+    index with its user_id column. The statistics are rebuilt by stats.install.
+    """
+    User.__table__.create(connection, checkfirst=True)
+    ensure_user_row(connection, DEFAULT_USER_ID, "default")
+    for table in ("tasks", "task_tombstones"):
+        if "user_id" not in {column["name"] for column in inspect(connection).get_columns(table)}:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN user_id INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID}")
+    for name in LEGACY_TASK_INDEXES:
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+    ensure_indexes(connection)
+    for index in TaskTombstone.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    drop_search_index(connection)
+    ensure_search_index(connection)
+
+def ensure_change_tracking(connection):
+    """Adds change_seq to tasks tables created before delta sync, and seeds the counter."""
+    columns = {column["name"] for column in inspect(connection).get_columns("tasks")}
+    if "change_seq" not in columns:
+        connection.exec_driver_sql("ALTER TABLE tasks ADD COLUMN change_seq INTEGER")
+        connection.exec_driver_sql("UPDATE tasks SET change_seq = id")
+    if connection.execute(SyncState.__table__.select()).first() is None:
+        last_seq = connection.exec_driver_sql("SELECT COALESCE(MAX(change_seq), 0) FROM tasks").scalar()
+        connection.execute(SyncState.__table__.insert().values(id=SYNC_STATE_ID, seq=last_seq, pruned_seq=0))
+
+def ensure_task_id_autoincrement(connection):
+    """Rebuilds a SQLite tasks table declared without AUTOINCREMENT, which reuses the highest ID once its row is gone.
+
+    IDs already used by archived tasks or tombstones are skipped as well.
+    """
+    if connection.dialect.name != "sqlite":
+        return # Postgres sequences never hand out an ID twice
+    ddl = connection.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks'").scalar()
+    if "AUTOINCREMENT" not in ddl.upper():
+        columns = ", ".join(column.name for column in Task.__table__.columns)
+        connection.exec_driver_sql(f"CREATE TEMP TABLE tasks_rebuild AS SELECT {columns} FROM tasks")
+        # Takes its indexes and triggers with it; the copy below fires none, so search and stats stay as they are
+        connection.exec_driver_sql("DROP TABLE tasks")
+        Task.__table__.create(connection)
+        connection.exec_driver_sql(f"INSERT INTO tasks ({columns}) SELECT {columns} FROM tasks_rebuild")
+        connection.exec_driver_sql("DROP TABLE tasks_rebuild")
+        ensure_search_index(connection)
+        ensure_stats_triggers(connection)
+    last_id = connection.exec_driver_sql(
+        "SELECT MAX(COALESCE((SELECT MAX(id) FROM tasks), 0), COALESCE((SELECT MAX(id) FROM tasks_archive), 0), "
+        "COALESCE((SELECT MAX(task_id) FROM task_tombstones), 0))"
+    ).scalar()
+    connection.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+    connection.exec_driver_sql(f"INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', {int(last_id)})")
+
+# The schema is created by backend.migrations; drop_all still removes the FTS index
+event.listen(Base.metadata, "before_drop", lambda target, connection, **kw: drop_search_index(connection))
@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+# Opaque cursors for keyset pagination on GET /tasks/.
+# A cursor wraps the sort key of the last seen task (plus its id as a tie-breaker)
+# so clients can't rely on its format.
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+class Cursor(NamedTuple):
+    order_by: str # the order_by the cursor was issued for, e.g. "-created_at"
+    value: Optional[datetime] # sort column value of the last task (None when sorting by id)
+    id: int
+
+
+def sort_column(order_by: str) -> str:
+    """Returns the column name of an order_by value such as "-updated_at"."""
+    return order_by.lstrip("-")
+
+
+def encode_cursor(last_id: int, order_by: str = "id", last_value: Optional[datetime] = None) -> str:
+    """Encodes the position of the last seen task into an opaque, URL-safe cursor."""
+    data = {"id": last_id}
+    if order_by != "id":
+        data["o"] = order_by
+    if last_value is not None:
+        data["v"] = last_value.isoformat()
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Decodes a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = data["id"]
+        order_by = data.get("o", "id")
+        value = data.get("v")
+        if value is not None:
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+    return Cursor(order_by=order_by, value=value, id=last_id)
+
+
+def next_cursor(tasks, limit: int, order_by: str = "id") -> Optional[str]:
+    """Returns the cursor for the page after `tasks`, or None on the last page."""
+    if limit <= 0 or len(tasks) < limit:
+        return None
+    last = tasks[-1]
+    if sort_column(order_by) == "id":
+        return encode_cursor(last.id, order_by)
+    return encode_cursor(last.id, order_by, getattr(last, sort_column(order_by)))
+
+
+def parse_cursor(cursor: Optional[str], order_by: str) -> Optional[Cursor]:
+    """Decodes `cursor` and checks it was issued for the same sort order."""
+    if cursor is None:
+        return None
+    after = decode_cursor(cursor)
+    if after.order_by != order_by:
+        raise InvalidCursorError(f"Cursor was issued for order_by={after.order_by!r}")
+    return after
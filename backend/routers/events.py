@@ -0,0 +1,84 @@
+import asyncio
+import os
+
+from fastapi import APIRouter, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from .. import events
+from ..dependencies import get_user_id
+from ..responses import dumps
+
+# Push task changes to clients instead of having them poll GET /tasks/changes.
+# Every event carries the change token of the write, so a client that reconnects
+# (or receives a "resync" event after falling behind) can catch up through the
+# change feed from the last token it saw. Clients only see their user's events.
+
+router = APIRouter(
+    prefix="/tasks",
+    tags=["events"],
+)
+
+# Seconds between keep-alive comments on an idle SSE stream
+SSE_HEARTBEAT = float(os.getenv("TODO_SSE_HEARTBEAT", "15"))
+
+READY_EVENT = {"type": "ready"}
+
+
+def format_sse(event: dict) -> bytes:
+    """Encodes an event as a text/event-stream message."""
+    message = b""
+    if event.get("token"):
+        message += b"id: " + event["token"].encode() + b"\n"
+    return message + b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+
+async def sse_events(request: Request, user_id: int):
+    subscriber = events.subscribe(user_id)
+    try:
+        # Sent once the subscription is live: nothing written after this is missed
+        yield b"retry: 3000\n" + format_sse(READY_EVENT)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.get(), SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield b": ping\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        events.unsubscribe(subscriber)
+
+@router.get("/stream")
+async def stream_task_events(request: Request, user_id: int = Depends(get_user_id)):
+    """Server-Sent Events stream of created/updated/deleted/changed task events."""
+    return StreamingResponse(
+        sse_events(request, user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    # Clients only listen; anything they send is ignored
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+@router.websocket("/ws")
+async def task_events_ws(websocket: WebSocket, user_id: int = Depends(get_user_id)):
+    """WebSocket stream of the same events as GET /tasks/stream, one JSON message each."""
+    await websocket.accept()
+    subscriber = events.subscribe(user_id)
+    disconnected = asyncio.create_task(_wait_for_disconnect(websocket))
+    try:
+        await websocket.send_text(dumps(READY_EVENT).decode())
+        while True:
+            next_event = asyncio.create_task(subscriber.get())
+            await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_event.cancel()
+                break
+            await websocket.send_text(dumps(next_event.result()).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+        events.unsubscribe(subscriber)
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
+import tempfile
 
 # Change back to relative imports for simpler structure
 from .. import crud
 from .. import schemas
+from .. import transfer
+from ..cache import get_cache, list_key, query_key, task_key, task_response, task_rows_response
+from ..responses import FastJSONResponse, parse_fields
+from ..etag import etag_matches, make_etag, not_modified
+from ..pagination import next_cursor, parse_cursor
 # from ..database import SessionLocal # No longer needed directly
-from ..dependencies import get_db # Import from dependencies module
+from ..database import READ_YOUR_WRITES_SECONDS, has_replicas
+from ..dependencies import CHANGE_TOKEN_COOKIE, get_db, get_read_db, get_user_id # Import from dependencies module
 
 # Dependency to get DB session (can be defined here or imported from main/dependencies)
 # def get_db():
@@ -23,43 +33,247 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}, # Default responses
 )
 
+# Write responses carry the change feed position of the write (see GET /tasks/changes)
+CHANGE_TOKEN_HEADER = "X-Change-Token"
+
+def set_change_token(response: Response, change_seq: Optional[int]) -> None:
+    if change_seq is not None:
+        response.headers[CHANGE_TOKEN_HEADER] = str(change_seq)
+        if has_replicas():
+            # Pins this client's reads to data that includes the write until replicas catch up
+            response.set_cookie(
+                CHANGE_TOKEN_COOKIE, str(change_seq), max_age=READ_YOUR_WRITES_SECONDS, httponly=True, samesite="lax",
+            )
+
 
 @router.post("/", response_model=schemas.Task)
-def create_new_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
+def create_new_task(task: schemas.TaskCreate, response: Response, db: Session = Depends(get_db), user_id: int = Depends(get_user_id)):
     """Create a new task."""
-    return crud.create_task(db=db, task=task)
+    db_task = crud.create_task(db, user_id, task=task)
+    set_change_token(response, db_task.change_seq)
+    return db_task
+
+
+@router.get("/", response_model=List[schemas.Task], response_class=FastJSONResponse)
+def read_all_tasks(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields to return, e.g. id,title,completed"),
+    filters: schemas.TaskListParams = Depends(),
+    db: Session = Depends(get_read_db),
+    user_id: int = Depends(get_user_id),
+):
+    """Retrieve all tasks, optionally filtered and sorted.
+
+    Pass the `X-Next-Cursor` header of a page back as `cursor` to fetch the next
+    page with keyset pagination; `skip` is ignored in that case. `fields` limits
+    each task to the listed fields.
+    """
+    try:
+        after = parse_cursor(cursor, filters.order_by)
+        selected_fields = parse_fields(fields)
+    except ValueError as e: # includes InvalidCursorError
+        raise HTTPException(status_code=400, detail=str(e))
+    # Read the version before the data: a concurrent write can only make the ETag older
+    etag = make_etag(crud.get_user_change_seq(db, user_id), user_id, query_key(request))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    cache = get_cache()
+    generation = cache.generation()
+    # Keyed by ETag (user's version + user + query): a lagging replica's older data gets its own entry
+    key = list_key(generation, etag)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached.to_response()
+    # Core rows of just the needed columns, encoded without ORM objects or Pydantic
+    rows = crud.get_task_rows(db, user_id, selected_fields, skip=skip, limit=limit, after=after, filters=filters)
+    headers = {"ETag": etag}
+    cursor_for_next_page = next_cursor(rows, limit, filters.order_by)
+    if cursor_for_next_page is not None:
+        headers["X-Next-Cursor"] = cursor_for_next_page
+    serialized = task_rows_response(rows, selected_fields, headers)
+    cache.set(key, serialized, generation)
+    return serialized.to_response()
+
+
+# Static routes are declared before /{task_id} so e.g. "bulk" is not parsed as an ID.
+@router.get("/search", response_model=List[schemas.Task])
+def search_tasks(
+    q: str = Query(..., min_length=1, description="Words to find in title, description or category (prefix match)"),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_user_id),
+):
+    """Full-text search over tasks, best matches first."""
+    return crud.search_tasks(db, user_id, q=q, skip=skip, limit=limit)
+
+
+@router.get("/changes", response_model=schemas.TaskChanges)
+def read_task_changes(
+    since: str = Query("0", description="Token from a previous response; 0 fetches everything"),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_user_id),
+):
+    """Retrieve only the tasks created, updated or deleted after `since`."""
+    try:
+        since_seq = int(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid change token: {since!r}")
+    if 0 < since_seq < crud.get_pruned_seq(db):
+        raise HTTPException(status_code=410, detail="Change token expired; fetch everything with since=0")
+    tasks, deleted, has_more = crud.get_changes(db, user_id, since=since_seq, limit=limit)
+    last_seq = max([t.change_seq for t in tasks] + [seq for _, seq in deleted], default=since_seq)
+    return schemas.TaskChanges(
+        tasks=tasks,
+        deleted=[task_id for task_id, _ in deleted],
+        token=str(last_seq),
+        has_more=has_more,
+    )
+
 
+@router.get("/stats", response_model=schemas.TaskStats)
+def read_task_stats(
+    request: Request,
+    response: Response,
+    days: int = Query(30, ge=1, le=3660, description="Length of the created-per-day histogram, ending today (UTC)"),
+    db: Session = Depends(get_read_db),
+    user_id: int = Depends(get_user_id),
+):
+    """Task counts per category and completion state, and tasks created per day."""
+    since_day = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    etag = make_etag("stats", crud.get_user_change_seq(db, user_id), user_id, since_day)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return crud.get_task_stats(db, user_id, since_day=since_day)
 
-@router.get("/", response_model=List[schemas.Task])
-def read_all_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Retrieve all tasks."""
-    tasks = crud.get_tasks(db, skip=skip, limit=limit)
-    return tasks
+
+@router.get("/export", response_class=StreamingResponse)
+def export_tasks(format: Literal["ndjson", "csv"] = "ndjson", db: Session = Depends(get_db), user_id: int = Depends(get_user_id)):
+    """Stream every task as NDJSON or CSV."""
+    return StreamingResponse(
+        transfer.export_tasks(db, format, user_id),
+        media_type=transfer.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_tasks(
+    request: Request, format: Literal["ndjson", "csv"] = "ndjson", db: Session = Depends(get_db), user_id: int = Depends(get_user_id),
+):
+    """Import tasks from a streamed NDJSON or CSV body (same layout as /tasks/export)."""
+    # Spool the upload to disk so the import runs in constant memory
+    with tempfile.TemporaryFile() as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        try:
+            return await run_in_threadpool(transfer.import_tasks, db, upload, format, user_id)
+        except transfer.ImportRowError as e:
+            raise HTTPException(
+                status_code=422,
+                detail={"line": e.line, "error": e.message, "imported": e.imported},
+            )
+
+
+@router.post("/bulk", response_model=List[schemas.BulkItemResult])
+def create_tasks_bulk(tasks: List[schemas.TaskCreate], response: Response, db: Session = Depends(get_db), user_id: int = Depends(get_user_id)):
+    """Create many tasks in a single transaction."""
+    db_tasks = crud.create_tasks(db, user_id, tasks=tasks)
+    set_change_token(response, max((db_task.change_seq for db_task in db_tasks), default=None))
+    return [
+        schemas.BulkItemResult(id=db_task.id, status="created", task=db_task)
+        for db_task in db_tasks
+    ]
+
+
+@router.patch("/bulk", response_model=List[schemas.BulkItemResult])
+def update_tasks_bulk(
+    updates: List[schemas.TaskBulkUpdate], response: Response, db: Session = Depends(get_db), user_id: int = Depends(get_user_id),
+):
+    """Apply partial updates to many tasks in a single transaction."""
+    updated, missing = crud.update_tasks(db, user_id, updates=updates)
+    set_change_token(response, max((db_task.change_seq for db_task in updated), default=None))
+    updated_by_id = {db_task.id: db_task for db_task in updated}
+    missing_ids = set(missing)
+    results = []
+    for item in updates:
+        if item.id in missing_ids:
+            results.append(schemas.BulkItemResult(id=item.id, status="not_found"))
+        else:
+            results.append(schemas.BulkItemResult(id=item.id, status="updated", task=updated_by_id[item.id]))
+    return results
+
+
+@router.delete("/bulk", response_model=List[schemas.BulkItemResult])
+def delete_tasks_bulk(criteria: schemas.TaskBulkDelete, response: Response, db: Session = Depends(get_db), user_id: int = Depends(get_user_id)):
+    """Delete many tasks by ID and/or filter in a single transaction."""
+    has_filter = criteria.completed is not None or criteria.category is not None
+    if criteria.ids is None and not has_filter and not criteria.all:
+        raise HTTPException(status_code=400, detail="Specify ids, a filter, or all=true")
+    deleted, last_seq = crud.delete_tasks(
+        db, user_id, task_ids=criteria.ids, completed=criteria.completed, category=criteria.category
+    )
+    set_change_token(response, last_seq)
+    if criteria.ids is None:
+        return [schemas.BulkItemResult(id=task_id, status="deleted") for task_id in deleted]
+    deleted_ids = set(deleted)
+    return [
+        schemas.BulkItemResult(id=task_id, status="deleted" if task_id in deleted_ids else "not_found")
+        for task_id in criteria.ids
+    ]
 
 
 @router.get("/{task_id}", response_model=schemas.Task)
-def read_single_task(task_id: int, db: Session = Depends(get_db)):
+def read_single_task(
+    task_id: int, request: Request, response: Response, db: Session = Depends(get_read_db), user_id: int = Depends(get_user_id),
+):
     """Retrieve a single task by ID."""
-    db_task = crud.get_task(db, task_id=task_id)
+    change_seq = crud.get_task_change_seq(db, user_id, task_id=task_id)
+    etag = make_etag(user_id, task_id, change_seq) if change_seq is not None else None
+    if etag is not None:
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+    cache = get_cache()
+    generation = cache.generation()
+    cached = cache.get(task_key(user_id, task_id))
+    # An entry from another version (e.g. stored from a lagging replica) counts as a miss
+    if cached is not None and cached.headers.get("ETag") == etag:
+        return cached.to_response()
+    db_task = crud.get_task(db, user_id, task_id=task_id)
     if db_task is None:
         # Use the router's default 404 or raise specific one
         raise HTTPException(status_code=404, detail="Task not found")
-    return db_task
+    if not cache.enabled:
+        return db_task
+    serialized = task_response(db_task, {"ETag": etag} if etag is not None else {})
+    cache.set(task_key(user_id, task_id), serialized, generation)
+    return serialized.to_response()
 
 
 @router.put("/{task_id}", response_model=schemas.Task)
-def update_existing_task(task_id: int, task: schemas.TaskUpdate, db: Session = Depends(get_db)):
+def update_existing_task(
+    task_id: int, task: schemas.TaskUpdate, response: Response, db: Session = Depends(get_db), user_id: int = Depends(get_user_id),
+):
     """Update an existing task."""
-    db_task = crud.update_task(db, task_id=task_id, task_update=task)
+    db_task = crud.update_task(db, user_id, task_id=task_id, task_update=task)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    set_change_token(response, db_task.change_seq)
     return db_task
 
 
 @router.delete("/{task_id}", response_model=schemas.Task)
-def delete_existing_task(task_id: int, db: Session = Depends(get_db)):
+def delete_existing_task(task_id: int, response: Response, db: Session = Depends(get_db), user_id: int = Depends(get_user_id)):
     """Delete a task."""
-    db_task = crud.delete_task(db, task_id=task_id)
+    db_task = crud.delete_task(db, user_id, task_id=task_id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    set_change_token(response, db_task.change_seq)
     return db_task # Return the deleted task data 
\ No newline at end of file
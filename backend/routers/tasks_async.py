@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from .. import crud_async
+from .. import schemas
+from ..cache import get_cache, list_key, query_key, task_key, task_response, task_rows_response
+from ..responses import FastJSONResponse, parse_fields
+from ..etag import etag_matches, make_etag, not_modified
+from ..pagination import next_cursor, parse_cursor
+from ..dependencies import get_async_db, get_async_read_db, get_user_id
+from .tasks import set_change_token
+
+# Async versions of the core routes in tasks.py. main.py includes this router
+# ahead of the sync one when TODO_ASYNC_DB is set, so these handlers take
+# precedence and the remaining routes (e.g. bulk) fall through to the sync router.
+# {task_id:int} keeps static paths such as /tasks/changes from matching a task ID.
+router = APIRouter(
+    prefix="/tasks",
+    tags=["tasks"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.post("/", response_model=schemas.Task)
+async def create_new_task_async(
+    task: schemas.TaskCreate, response: Response, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_user_id),
+):
+    """Create a new task."""
+    db_task = await crud_async.create_task(db, user_id, task=task)
+    set_change_token(response, db_task.change_seq)
+    return db_task
+
+
+@router.get("/", response_model=List[schemas.Task], response_class=FastJSONResponse)
+async def read_all_tasks_async(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields to return, e.g. id,title,completed"),
+    filters: schemas.TaskListParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+    user_id: int = Depends(get_user_id),
+):
+    """Retrieve all tasks, optionally filtered, sorted and limited to some fields."""
+    try:
+        after = parse_cursor(cursor, filters.order_by)
+        selected_fields = parse_fields(fields)
+    except ValueError as e: # includes InvalidCursorError
+        raise HTTPException(status_code=400, detail=str(e))
+    # Read the version before the data: a concurrent write can only make the ETag older
+    etag = make_etag(await crud_async.get_user_change_seq(db, user_id), user_id, query_key(request))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    cache = get_cache()
+    generation = cache.generation()
+    key = list_key(generation, etag)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached.to_response()
+    # Core rows of just the needed columns, encoded without ORM objects or Pydantic
+    rows = await crud_async.get_task_rows(db, user_id, selected_fields, skip=skip, limit=limit, after=after, filters=filters)
+    headers = {"ETag": etag}
+    cursor_for_next_page = next_cursor(rows, limit, filters.order_by)
+    if cursor_for_next_page is not None:
+        headers["X-Next-Cursor"] = cursor_for_next_page
+    serialized = task_rows_response(rows, selected_fields, headers)
+    cache.set(key, serialized, generation)
+    return serialized.to_response()
+
+
+@router.get("/{task_id:int}", response_model=schemas.Task)
+async def read_single_task_async(
+    task_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db), user_id: int = Depends(get_user_id),
+):
+    """Retrieve a single task by ID."""
+    change_seq = await crud_async.get_task_change_seq(db, user_id, task_id=task_id)
+    etag = make_etag(user_id, task_id, change_seq) if change_seq is not None else None
+    if etag is not None:
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+    cache = get_cache()
+    generation = cache.generation()
+    cached = cache.get(task_key(user_id, task_id))
+    if cached is not None and cached.headers.get("ETag") == etag:
+        return cached.to_response()
+    db_task = await crud_async.get_task(db, user_id, task_id=task_id)
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not cache.enabled:
+        return db_task
+    serialized = task_response(db_task, {"ETag": etag} if etag is not None else {})
+    cache.set(task_key(user_id, task_id), serialized, generation)
+    return serialized.to_response()
+
+
+@router.put("/{task_id:int}", response_model=schemas.Task)
+async def update_existing_task_async(
+    task_id: int, task: schemas.TaskUpdate, response: Response, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_user_id),
+):
+    """Update an existing task."""
+    db_task = await crud_async.update_task(db, user_id, task_id=task_id, task_update=task)
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    set_change_token(response, db_task.change_seq)
+    return db_task
+
+
+@router.delete("/{task_id:int}", response_model=schemas.Task)
+async def delete_existing_task_async(
+    task_id: int, response: Response, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_user_id),
+):
+    """Delete a task."""
+    db_task = await crud_async.delete_task(db, user_id, task_id=task_id)
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    set_change_token(response, db_task.change_seq)
+    return db_task
@@ -0,0 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from .. import schemas
+from ..writer import GroupCommitWriter, WriterBusy, get_writer, stop_writer
+from ..dependencies import get_user_id
+from .tasks import set_change_token
+
+# Create/update routes that go through the group-commit writer (writer.py).
+# main.py includes this router ahead of the others when TODO_GROUP_COMMIT is set;
+# every other route falls through to the regular handlers.
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Commit whatever is still queued before the process exits
+    await asyncio.to_thread(stop_writer)
+
+router = APIRouter(
+    prefix="/tasks",
+    tags=["tasks"],
+    responses={404: {"description": "Not found"}, 503: {"description": "Write queue full, retry later"}},
+    lifespan=lifespan,
+)
+
+# Seconds clients are asked to wait when the write queue is full
+RETRY_AFTER = "1"
+
+async def _wait_for(submit):
+    try:
+        future = submit()
+    except WriterBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": RETRY_AFTER})
+    return await asyncio.wrap_future(future)
+
+
+@router.post("/", response_model=schemas.Task)
+async def create_new_task_grouped(task: schemas.TaskCreate, response: Response,
+                                  writer: GroupCommitWriter = Depends(get_writer),
+                                  user_id: int = Depends(get_user_id)):
+    """Create a new task."""
+    db_task = await _wait_for(lambda: writer.create(user_id, task))
+    set_change_token(response, db_task.change_seq)
+    return db_task
+
+
+@router.put("/{task_id}", response_model=schemas.Task)
+async def update_existing_task_grouped(task_id: int, task: schemas.TaskUpdate, response: Response,
+                                       writer: GroupCommitWriter = Depends(get_writer),
+                                       user_id: int = Depends(get_user_id)):
+    """Update an existing task."""
+    db_task = await _wait_for(lambda: writer.update(user_id, task_id, task))
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    set_change_token(response, db_task.change_seq)
+    return db_task
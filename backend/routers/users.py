@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import crud
+from .. import schemas
+from ..dependencies import get_directory_db
+
+# Users own tasks (see models.Task.user_id); task requests name theirs with the
+# X-User-Id header. Users live in the main database in every tenancy mode.
+
+router = APIRouter(
+    prefix="/users",
+    tags=["users"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.post("/", response_model=schemas.User, status_code=201)
+def create_new_user(user: schemas.UserCreate, db: Session = Depends(get_directory_db)):
+    """Create a user."""
+    try:
+        return crud.create_user(db, user)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Username or email already taken")
+
+
+@router.get("/{user_id}", response_model=schemas.User)
+def read_user(user_id: int, db: Session = Depends(get_directory_db)):
+    """Retrieve a user by ID."""
+    db_user = crud.get_user(db, user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return db_user
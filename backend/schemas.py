@@ -1,6 +1,18 @@
 from pydantic import BaseModel, ConfigDict
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Literal, Optional
+
+class UserCreate(BaseModel):
+    username: str
+    email: str
+
+
+class User(UserCreate):
+    id: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
 
 # Base model for common task attributes
 class TaskBase(BaseModel):
@@ -20,6 +32,19 @@ class TaskUpdate(BaseModel):
     category: Optional[str] = None
     completed: Optional[bool] = None
 
+# Supported sort orders for task lists ("-" prefix = descending)
+TaskOrderBy = Literal["id", "-id", "created_at", "-created_at", "updated_at", "-updated_at"]
+
+# Query parameters for filtering and sorting task lists
+class TaskListParams(BaseModel):
+    completed: Optional[bool] = None
+    category: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_since: Optional[datetime] = None
+    order_by: TaskOrderBy = "id"
+    include_archived: bool = False # also list completed tasks moved to the archive
+
 # Schema for reading/returning a task (includes DB-generated fields)
 class Task(TaskBase):
     id: int
@@ -29,4 +54,59 @@ class Task(TaskBase):
     # Pydantic V2 config for ORM mode
     model_config = ConfigDict(
         from_attributes=True 
-    ) 
\ No newline at end of file
+    ) 
+
+# Schema for one item of a bulk update (a partial update plus the target ID)
+class TaskBulkUpdate(TaskUpdate):
+    id: int
+
+# Schema for bulk deletion by explicit IDs and/or filter
+class TaskBulkDelete(BaseModel):
+    ids: Optional[List[int]] = None
+    completed: Optional[bool] = None
+    category: Optional[str] = None
+    all: bool = False # Must be set explicitly to delete without any criteria
+
+# Per-item outcome of a bulk operation
+class BulkItemResult(BaseModel):
+    id: int
+    status: Literal["created", "updated", "deleted", "not_found"]
+    task: Optional[Task] = None
+
+# Response of the delta sync endpoint (GET /tasks/changes)
+class TaskChanges(BaseModel):
+    tasks: List[Task] # created or updated since the given token, oldest change first
+    deleted: List[int] # IDs of tasks deleted since the given token
+    token: str # pass back as `since` to get the changes after these
+    has_more: bool # more changes are waiting; fetch again with `token`
+
+# One row of a bulk import; timestamps are kept when present so exports round-trip
+class TaskImport(TaskCreate):
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+# Outcome of POST /tasks/import
+class ImportResult(BaseModel):
+    imported: int
+    seconds: float
+    rows_per_second: float
+
+
+class CategoryStats(BaseModel):
+    category: Optional[str] = None # None groups tasks without a category
+    total: int = 0
+    completed: int = 0
+    pending: int = 0
+
+
+class DailyStats(BaseModel):
+    day: date # UTC creation date
+    created: int # tasks created that day that still exist
+
+
+class TaskStats(BaseModel):
+    total: int
+    completed: int
+    pending: int
+    categories: List[CategoryStats] # uncategorized first, then by name
+    created_per_day: List[DailyStats] # oldest day first; days without tasks are omitted
@@ -0,0 +1,130 @@
+import argparse
+import sys
+from datetime import date
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Date, delete, false, func, insert, select, union_all
+
+from . import models
+from .database import DATABASE_URL, make_engine
+
+# Consistency check for the task statistics tables (see models.TASK_STATS_DDL).
+#
+# The triggers keep the counters exact, but a restore, a manual edit or a bulk
+# load with the triggers dropped can leave them off. `python -m backend.stats`
+# recounts from tasks and tasks_archive, reports any drift and rewrites the tables;
+# `--check` only reports (exit status 1 on drift).
+
+CategoryCounts = Dict[Tuple[int, str, bool], int] # (user_id, category, completed) -> tasks
+DailyCounts = Dict[Tuple[int, date], int] # (user_id, day) -> tasks
+
+
+def recount(connection) -> Tuple[CategoryCounts, DailyCounts]:
+    """Counts computed from the tasks and tasks_archive tables themselves (a full scan)."""
+    task = union_all(*(
+        select(model.user_id, model.category, model.completed, model.created_at)
+        for model in (models.Task, models.ArchivedTask)
+    )).subquery().c
+    category = func.coalesce(task.category, "")
+    completed = func.coalesce(task.completed, false())
+    by_category = {
+        (user_id, name, bool(done)): total
+        for user_id, name, done, total in connection.execute(
+            select(task.user_id, category, completed, func.count()).group_by(task.user_id, category, completed)
+        )
+    }
+    day = func.date(task.created_at, type_=Date)
+    by_day = {
+        (user_id, created): total
+        for user_id, created, total in connection.execute(
+            select(task.user_id, day, func.count()).where(task.created_at.is_not(None)).group_by(task.user_id, day)
+        )
+    }
+    return by_category, by_day
+
+def stored(connection) -> Tuple[CategoryCounts, DailyCounts]:
+    """Counts currently held by the statistics tables."""
+    counts, daily = models.TaskCategoryCount, models.TaskDailyCount
+    by_category = {
+        (user_id, name, bool(done)): total
+        for user_id, name, done, total in connection.execute(
+            select(counts.user_id, counts.category, counts.completed, counts.total).where(counts.total != 0)
+        )
+    }
+    by_day = {
+        (user_id, day): total
+        for user_id, day, total in connection.execute(select(daily.user_id, daily.day, daily.total).where(daily.total != 0))
+    }
+    return by_category, by_day
+
+def _diff(expected: dict, actual: dict, label) -> List[str]:
+    return [
+        f"{label(key)}: stored {actual.get(key, 0)}, actual {expected.get(key, 0)}"
+        for key in sorted(expected.keys() | actual.keys(), key=str)
+        if expected.get(key, 0) != actual.get(key, 0)
+    ]
+
+def check(connection) -> List[str]:
+    """Differences between the statistics tables and a recount (empty when consistent)."""
+    expected_categories, expected_days = recount(connection)
+    categories, days = stored(connection)
+    return (
+        _diff(expected_categories, categories, lambda key: f"user={key[0]} category={key[1]!r} completed={key[2]}")
+        + _diff(expected_days, days, lambda key: f"user={key[0]} day={key[1]}")
+    )
+
+def rebuild(connection) -> List[str]:
+    """Rewrites the statistics tables from a recount; returns the drift that was fixed.
+
+    Run inside a transaction: writers are held off until it commits, so no trigger
+    update falls between the recount and the rewrite.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("LOCK TABLE tasks, tasks_archive IN SHARE MODE")
+    else:
+        # Takes SQLite's write lock before reading
+        connection.execute(delete(models.TaskDailyCount).where(false()))
+    drift = check(connection)
+    by_category, by_day = recount(connection)
+    connection.execute(delete(models.TaskCategoryCount))
+    connection.execute(delete(models.TaskDailyCount))
+    if by_category:
+        connection.execute(insert(models.TaskCategoryCount), [
+            {"user_id": user_id, "category": name, "completed": done, "total": total}
+            for (user_id, name, done), total in by_category.items()
+        ])
+    if by_day:
+        connection.execute(insert(models.TaskDailyCount), [
+            {"user_id": user_id, "day": day, "total": total} for (user_id, day), total in by_day.items()
+        ])
+    return drift
+
+def install(connection) -> None:
+    """(Re)creates the statistics tables and triggers and fills the tables (migration 6)."""
+    models.drop_stats_triggers(connection)
+    for table in (models.TaskCategoryCount.__table__, models.TaskDailyCount.__table__):
+        table.drop(connection, checkfirst=True)
+        table.create(connection)
+    models.ensure_stats_triggers(connection)
+    rebuild(connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the task statistics tables and rebuild them from the tasks table.")
+    parser.add_argument("--url", default=DATABASE_URL, help="Database URL (default: TODO_DATABASE_URL)")
+    parser.add_argument("--check", action="store_true", help="Only report drift; exit with status 1 if there is any")
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    with engine.begin() as connection:
+        drift = check(connection) if args.check else rebuild(connection)
+    for line in drift:
+        print(line)
+    if args.check:
+        print("Statistics are consistent" if not drift else f"{len(drift)} counters differ")
+        sys.exit(1 if drift else 0)
+    print(f"Rebuilt statistics ({len(drift)} counters were off)")
+
+
+if __name__ == "__main__":
+    main()
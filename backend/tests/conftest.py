@@ -1,29 +1,60 @@
 import pytest
 import os # Import os module for file operations
+
+# The fixtures migrate the test database; keep the app from migrating todo.db on startup
+os.environ.setdefault("TODO_AUTO_MIGRATE", "0")
+
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import delete, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+from fastapi import FastAPI
 
+from backend import models
 from backend.main import app
-from backend.dependencies import get_db # Import get_db from its new location
-from backend.database import Base
+from backend.dependencies import get_db, get_async_db, get_directory_db # Import get_db from its new location
+from backend.database import Base, to_async_url, make_engine, make_async_engine
+from backend.migrations import upgrade
+from backend.routers import tasks, tasks_async, tasks_grouped
+from backend.writer import GroupCommitWriter, get_writer
 
-# Use a file-based SQLite database for integration testing
-TEST_DATABASE_FILE = "./test_todo.db"
+# Use a file-based SQLite database for integration testing, one per pytest-xdist
+# worker (gw0, gw1, ...) so parallel runs (`pytest -n auto`) never share a file
+WORKER = os.environ.get("PYTEST_XDIST_WORKER", "main")
+TEST_DATABASE_FILE = f"./test_todo_{WORKER}.db"
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DATABASE_FILE}"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    # poolclass=StaticPool, # StaticPool is mainly for :memory:
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Same engine factory (pragmas, pool) as the application
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+# pysqlite starts transactions itself and would let a SAVEPOINT outside them
+# commit on RELEASE; emit BEGIN explicitly so tests can roll everything back.
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def _begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+# Connection of the running test while it runs inside a transaction that is
+# rolled back afterwards (see the `connection` fixture); None for tests whose
+# writes must really commit.
+_connection = None
 
 
 # Override the get_db dependency to use the test database
 def override_get_db():
-    database = TestingSessionLocal()
+    if _connection is not None:
+        # Commits release a SAVEPOINT instead, so the test's rollback undoes them
+        database = Session(
+            bind=_connection, join_transaction_mode="create_savepoint", autoflush=False, expire_on_commit=False,
+        )
+    else:
+        database = TestingSessionLocal()
     try:
         yield database
     finally:
@@ -32,29 +63,139 @@ def override_get_db():
 
 # Apply the override to the FastAPI app
 app.dependency_overrides[get_db] = override_get_db # Use the imported get_db
+app.dependency_overrides[get_directory_db] = override_get_db
+
+
+# Async engine on the same test database for the async routes.
+# NullPool: each TestClient runs its own event loop, so connections must not be reused across loops.
+async_engine = None
+AsyncTestingSessionLocal = None
+
+
+async def override_get_async_db():
+    global async_engine, AsyncTestingSessionLocal
+    if AsyncTestingSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        async_engine = make_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+        AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    async with AsyncTestingSessionLocal() as database:
+        yield database
+
+
+# App serving the async stack the way main.py does when TODO_ASYNC_DB is set
+async_app = FastAPI(title="Todo List API (async)")
+async_app.include_router(tasks_async.router)
+async_app.include_router(tasks.router)
+async_app.dependency_overrides[get_db] = override_get_db
+async_app.dependency_overrides[get_directory_db] = override_get_db
+async_app.dependency_overrides[get_async_db] = override_get_async_db
+
+
+# App with the group-commit write routes the way main.py adds them when TODO_GROUP_COMMIT is set
+grouped_app = FastAPI(title="Todo List API (group commit)")
+grouped_app.include_router(tasks_grouped.router)
+grouped_app.include_router(tasks.router)
+grouped_app.dependency_overrides[get_db] = override_get_db
+grouped_app.dependency_overrides[get_directory_db] = override_get_db
+
+
+def _remove_database_files():
+    engine.dispose()
+    for path in (TEST_DATABASE_FILE, f"{TEST_DATABASE_FILE}-wal", f"{TEST_DATABASE_FILE}-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def reset_database(conn):
+    """Empties every table and restores what the migrations seed (default user, change counter)."""
+    for table in reversed(Base.metadata.sorted_tables):
+        if table.name != models.SchemaMigration.__tablename__:
+            conn.execute(delete(table))
+    models.ensure_user_row(conn, models.DEFAULT_USER_ID, "default")
+    models.ensure_change_tracking(conn)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    # Created once per run (per worker with xdist); tests roll back or reset their data
+    _remove_database_files()
+    upgrade(engine)
+    yield
+
+
+# Tests reach the database through these fixtures rather than importing this
+# module: pytest loads it as `conftest`, so an import would create a second
+# engine and a second _connection.
+@pytest.fixture(scope="session")
+def test_engine():
+    return engine
+
 
+@pytest.fixture(scope="function")
+def connection():
+    """Runs the test in one transaction, rolled back afterwards; the app's sessions join it."""
+    global _connection
+    conn = engine.connect()
+    transaction = conn.begin()
+    _connection = conn
+    try:
+        yield conn
+    finally:
+        _connection = None
+        transaction.rollback()
+        conn.close()
 
-# Remove db_session fixture if not strictly needed for integration tests,
-# the client fixture handles DB setup/teardown per function.
-# @pytest.fixture(scope="function")
-# def db_session():
-#     Base.metadata.create_all(bind=engine)
-#     yield TestingSessionLocal()
-#     Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="function")
+def db(connection):
+    """Session on the test's transaction, for calling crud directly."""
+    with Session(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False) as session:
+        yield session
 
 
 @pytest.fixture(scope="function")
-def client():
-    # Create the database tables before each test
-    Base.metadata.create_all(bind=engine)
+def committed():
+    """For tests whose writes must reach other connections (writer thread, async engine, file copies).
+
+    Their writes really commit, so the tables are emptied afterwards instead.
+    """
+    yield
+    with engine.begin() as conn:
+        reset_database(conn)
+
+
+@pytest.fixture(scope="function")
+def client(connection):
     with TestClient(app) as c:
         yield c
-    # Drop the database tables after each test
-    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def committed_client(committed):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="function")
+def async_client(committed):
+    with TestClient(async_app) as c:
+        yield c
+
+
+@pytest.fixture(scope="function")
+def writer():
+    group_commit_writer = GroupCommitWriter(sessionmaker(bind=engine, autoflush=False, expire_on_commit=False))
+    yield group_commit_writer
+    group_commit_writer.stop()
+
+
+@pytest.fixture(scope="function")
+def grouped_client(committed, writer):
+    grouped_app.dependency_overrides[get_writer] = lambda: writer
+    with TestClient(grouped_app) as c:
+        yield c
 
 
 def pytest_sessionfinish(session, exitstatus):
     """ Clean up the test database file after the session. """
-    if os.path.exists(TEST_DATABASE_FILE):
-        os.remove(TEST_DATABASE_FILE)
-        print(f"\nRemoved test database: {TEST_DATABASE_FILE}") 
\ No newline at end of file
+    _remove_database_files() 
\ No newline at end of file
@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+from backend.admission import AdmissionMiddleware, ConcurrencyLimit, Overloaded, RateLimiter
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _app(release: asyncio.Event, **options) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/tasks/")
+    async def slow_write():
+        await release.wait()
+        return {"written": True}
+
+    @app.get("/tasks/")
+    async def read():
+        return []
+
+    @app.get("/")
+    async def root():
+        return {}
+
+    app.add_middleware(AdmissionMiddleware, **options)
+    return app
+
+
+def test_waiters_are_served_in_order_and_the_overflow_is_shed():
+    async def scenario():
+        limit = ConcurrencyLimit("test", limit=1, max_queue=2, timeout=1)
+        await limit.acquire()
+        order = []
+
+        async def wait(name):
+            await limit.acquire()
+            order.append(name)
+
+        first, second = asyncio.create_task(wait("first")), asyncio.create_task(wait("second"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await limit.acquire()
+        limit.release()
+        await first
+        limit.release()
+        await second
+        limit.release()
+        return order, full.value.reason, limit.active, limit.waiting
+
+    assert asyncio.run(scenario()) == (["first", "second"], "queue_full", 0, 0)
+
+
+def test_waiting_too_long_is_shed_and_frees_the_queue():
+    async def scenario():
+        limit = ConcurrencyLimit("test", limit=1, max_queue=1, timeout=0.01)
+        await limit.acquire()
+        with pytest.raises(Overloaded) as timeout:
+            await limit.acquire()
+        limit.release()
+        return timeout.value.reason, limit.active, limit.waiting
+
+    assert asyncio.run(scenario()) == ("queue_timeout", 0, 0)
+
+
+def test_writes_beyond_the_limit_get_503_while_reads_go_through():
+    async def scenario():
+        release = asyncio.Event()
+        app = _app(release, write_concurrency=1, write_queue=0, rate=0)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            writing = asyncio.create_task(client.post("/tasks/"))
+            await asyncio.sleep(0.05)
+            shed = await client.post("/tasks/")
+            read = await client.get("/tasks/")
+            release.set()
+            return (await writing).status_code, shed, read.status_code
+
+    rejected = sample("todo_admission_rejected_total", kind="write", reason="queue_full")
+    written, shed, read = asyncio.run(scenario())
+    assert (written, shed.status_code, read) == (200, 503, 200)
+    assert shed.headers["Retry-After"] == "1"
+    assert sample("todo_admission_rejected_total", kind="write", reason="queue_full") == rejected + 1
+    assert sample("todo_admission_in_flight", kind="write") == 0
+
+
+def test_clients_are_rate_limited_separately():
+    async def scenario():
+        app = _app(asyncio.Event(), rate=0.5, burst=2, api_keys=frozenset({"known"}))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            statuses = [(await client.get("/tasks/")).status_code for _ in range(3)]
+            limited = await client.get("/tasks/")
+            # A made-up key does not buy a fresh bucket; a known one has its own
+            made_up = await client.get("/tasks/", headers={"X-API-Key": "made-up"})
+            known = await client.get("/tasks/", headers={"X-API-Key": "known"})
+            unlimited = await client.get("/")
+            return statuses, limited, made_up.status_code, known.status_code, unlimited.status_code
+
+    statuses, limited, made_up, known, unlimited = asyncio.run(scenario())
+    assert statuses == [200, 200, 429]
+    assert limited.status_code == 429 and limited.headers["Retry-After"] == "2"
+    assert (made_up, known, unlimited) == (429, 200, 200)
+
+
+def test_token_bucket_refills_over_time():
+    limiter = RateLimiter(rate=10, burst=2)
+    assert [limiter.acquire("client", now=0) for _ in range(3)] == [0, 0, pytest.approx(0.1)]
+    assert limiter.acquire("client", now=0.1) == 0
+    assert limiter.acquire("client", now=0.1) == pytest.approx(0.1)
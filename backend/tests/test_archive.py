@@ -0,0 +1,175 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from backend import archive
+from backend import stats as stats_module
+
+OLD = datetime.utcnow() - timedelta(days=90)
+
+
+@pytest.fixture
+def client(committed_client):
+    # The archiver works on its own connections, so the tests' writes must commit
+    return committed_client
+
+
+@pytest.fixture
+def engine(test_engine):
+    return test_engine
+
+
+def _seed(client: TestClient, engine) -> dict:
+    """Two old completed tasks, an old open one and two fresh completed ones."""
+    ids = {}
+    for name, completed in [("old done", True), ("old open", False), ("old done 2", True), ("fresh done", True), ("newest", True)]:
+        ids[name] = client.post("/tasks/", json={"title": name, "completed": completed}).json()["id"]
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE tasks SET updated_at = :old WHERE title LIKE 'old%'"), {"old": OLD})
+    return ids
+
+
+def _archive(engine) -> int:
+    return archive.archive_completed(engine, timedelta(days=30), batch_size=1, pause=0)
+
+
+def test_archives_old_completed_tasks_in_batches(client: TestClient, engine):
+    ids = _seed(client, engine)
+    etag = client.get("/tasks/").headers["ETag"]
+    assert _archive(engine) == 2
+    assert _archive(engine) == 0
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM tasks_archive ORDER BY id")).scalars().all() == [ids["old done"], ids["old done 2"]]
+
+    # Lists leave archived tasks out unless asked, and their ETag moved on
+    response = client.get("/tasks/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()] == ["old open", "fresh done", "newest"]
+    listed = client.get("/tasks/", params={"include_archived": True, "order_by": "-id"}).json()
+    assert [t["title"] for t in listed] == ["newest", "fresh done", "old done 2", "old open", "old done"]
+
+
+def test_archived_tasks_stay_in_search_and_stats(client: TestClient, engine):
+    ids = _seed(client, engine)
+    stats = client.get("/tasks/stats").json()
+    _archive(engine)
+    # Moving tasks to the archive changes neither
+    assert client.get("/tasks/stats").json() == stats
+    found = client.get("/tasks/search", params={"q": "old done"}).json()
+    assert sorted(t["id"] for t in found) == [ids["old done"], ids["old done 2"]]
+
+    # Deleting an archived task, or reopening one, is counted like any other write
+    client.delete(f"/tasks/{ids['old done 2']}")
+    client.put(f"/tasks/{ids['old done']}", json={"completed": False})
+    assert [t["id"] for t in client.get("/tasks/search", params={"q": "old done"}).json()] == [ids["old done"]]
+    after = client.get("/tasks/stats").json()
+    assert (after["total"], after["completed"]) == (stats["total"] - 1, stats["completed"] - 2)
+    with engine.connect() as conn:
+        assert stats_module.check(conn) == []
+
+
+def test_archived_lists_page_across_both_tables(client: TestClient, engine):
+    _seed(client, engine)
+    _archive(engine)
+    titles, cursor = [], None
+    while True:
+        params = {"include_archived": True, "order_by": "updated_at", "limit": 2, "fields": "id,title"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/tasks/", params=params)
+        titles += [t["title"] for t in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert sorted(titles) == sorted(["old done", "old open", "old done 2", "fresh done", "newest"])
+    skipped = client.get("/tasks/", params={"include_archived": True, "skip": 3, "limit": 10}).json()
+    assert [t["title"] for t in skipped] == ["fresh done", "newest"]
+
+
+def test_archived_task_is_read_and_written_transparently(client: TestClient, engine):
+    ids = _seed(client, engine)
+    task_id = ids["old done"]
+    etag = client.get(f"/tasks/{task_id}").headers["ETag"]
+    _archive(engine)
+
+    response = client.get(f"/tasks/{task_id}")
+    assert response.json()["title"] == "old done"
+    assert response.headers["ETag"] != etag # the move is a change of its owner's tasks (see archive_batch)
+
+    # Reopening it brings it back to the live table
+    assert client.put(f"/tasks/{task_id}", json={"completed": False}).json()["completed"] is False
+    assert task_id in [t["id"] for t in client.get("/tasks/").json()]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM tasks_archive WHERE id = :id"), {"id": task_id}).scalar() == 0
+
+    archived_id = ids["old done 2"]
+    token = client.get("/tasks/changes").json()["token"]
+    assert client.delete(f"/tasks/{archived_id}").status_code == 200
+    assert client.get(f"/tasks/{archived_id}").status_code == 404
+    assert client.get("/tasks/changes", params={"since": token}).json()["deleted"] == [archived_id]
+
+
+def test_bulk_writes_and_export_include_archived_tasks(client: TestClient, engine):
+    ids = _seed(client, engine)
+    _archive(engine)
+
+    reopened = client.patch("/tasks/bulk", json=[{"id": ids["old done"], "completed": False}]).json()
+    assert [(r["status"], r["task"]["completed"]) for r in reopened] == [("updated", False)]
+    assert ids["old done"] in [t["id"] for t in client.get("/tasks/").json()]
+
+    exported = [json.loads(line)["title"] for line in client.get("/tasks/export").text.splitlines()]
+    assert exported == ["old done", "old open", "old done 2", "fresh done", "newest"]
+
+    archived_id = ids["old done 2"]
+    token = client.get("/tasks/changes").json()["token"]
+    deleted = client.request("DELETE", "/tasks/bulk", json={"ids": [archived_id]}).json()
+    assert deleted == [{"id": archived_id, "status": "deleted", "task": None}]
+    assert client.get(f"/tasks/{archived_id}").status_code == 404
+    assert client.get("/tasks/changes", params={"since": token}).json()["deleted"] == [archived_id]
+
+    # Deleting everything leaves nothing behind in the archive either
+    _archive(engine)
+    client.request("DELETE", "/tasks/bulk", json={"all": True})
+    assert client.get("/tasks/", params={"include_archived": True}).json() == []
+    assert client.get("/tasks/stats").json()["total"] == 0
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM tasks_archive")).scalar() == 0
+        assert stats_module.check(conn) == []
+
+
+def test_change_feed_keeps_archived_tasks(client: TestClient, engine):
+    ids = _seed(client, engine)
+    _archive(engine)
+    changed = client.get("/tasks/changes").json()["tasks"]
+    assert {t["id"] for t in changed} == set(ids.values())
+
+
+def test_task_changed_after_selection_stays_live(client: TestClient, engine):
+    ids = _seed(client, engine)
+    cutoff = datetime.utcnow() - timedelta(days=30)
+    with engine.connect() as conn:
+        candidates = archive.find_candidates(conn, cutoff)
+    assert candidates == [ids["old done"], ids["old done 2"]]
+    client.put(f"/tasks/{ids['old done']}", json={"completed": False})
+    with engine.begin() as conn:
+        assert archive.archive_batch(conn, candidates, cutoff) == 1
+    assert client.get("/tasks/", params={"completed": False}).json()[0]["id"] == ids["old done"]
+
+
+def test_new_tasks_never_reuse_archived_or_deleted_ids(client: TestClient, engine):
+    ids = _seed(client, engine)
+    assert client.delete(f"/tasks/{ids['newest']}").status_code == 200
+    # Archive what is now the highest live ID as well
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE tasks SET updated_at = :old WHERE title = 'fresh done'"), {"old": OLD})
+    assert _archive(engine) == 3
+
+    new_id = client.post("/tasks/", json={"title": "brand new"}).json()["id"]
+    assert new_id > ids["newest"]
+    listed = [t["id"] for t in client.get("/tasks/", params={"include_archived": True}).json()]
+    assert len(listed) == len(set(listed)) == 5
+    assert client.get(f"/tasks/{ids['fresh done']}").json()["title"] == "fresh done"
+    assert client.get(f"/tasks/{ids['newest']}").status_code == 404
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+
+
+def test_async_task_lifecycle(async_client: TestClient):
+    create_response = async_client.post("/tasks/", json={"title": "Async Task"})
+    assert create_response.status_code == 200
+    task_id = create_response.json()["id"]
+
+    read_response = async_client.get(f"/tasks/{task_id}")
+    assert read_response.status_code == 200
+    assert read_response.json()["title"] == "Async Task"
+
+    update_response = async_client.put(f"/tasks/{task_id}", json={"completed": True})
+    assert update_response.status_code == 200
+    assert update_response.json()["completed"] is True
+    assert update_response.json()["title"] == "Async Task"
+
+    assert [t["id"] for t in async_client.get("/tasks/").json()] == [task_id]
+
+    delete_response = async_client.delete(f"/tasks/{task_id}")
+    assert delete_response.status_code == 200
+    assert async_client.get(f"/tasks/{task_id}").status_code == 404
+
+
+def test_async_app_falls_back_to_sync_bulk_routes(async_client: TestClient):
+    response = async_client.post("/tasks/bulk", json=[{"title": "One"}, {"title": "Two"}])
+    assert response.status_code == 200
+    assert len(async_client.get("/tasks/").json()) == 2
+
+
+def test_async_task_routes_leave_static_paths_to_the_sync_router(async_client: TestClient):
+    async_client.post("/tasks/", json={"title": "One"})
+    assert async_client.get("/tasks/changes").status_code == 200
+    assert async_client.get("/tasks/stats").json()["total"] == 1
+    response = async_client.request("DELETE", "/tasks/bulk", json={"all": True})
+    assert [item["status"] for item in response.json()] == ["deleted"]
@@ -0,0 +1,69 @@
+from fastapi.testclient import TestClient
+
+
+def test_bulk_create(client: TestClient):
+    response = client.post(
+        "/tasks/bulk",
+        json=[{"title": "Bulk 1"}, {"title": "Bulk 2", "category": "work"}]
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["status"] for r in results] == ["created", "created"]
+    assert [r["task"]["title"] for r in results] == ["Bulk 1", "Bulk 2"]
+    assert results[1]["task"]["category"] == "work"
+    assert results[0]["id"] == results[0]["task"]["id"]
+
+    all_tasks = client.get("/tasks/").json()
+    assert len(all_tasks) == 2
+
+
+def test_bulk_update_reports_missing(client: TestClient):
+    created = client.post("/tasks/bulk", json=[{"title": "A"}, {"title": "B"}]).json()
+    first_id, second_id = created[0]["id"], created[1]["id"]
+
+    response = client.patch(
+        "/tasks/bulk",
+        json=[
+            {"id": first_id, "completed": True},
+            {"id": 99999, "title": "Ghost"},
+            {"id": second_id, "title": "B2"},
+        ]
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["status"] for r in results] == ["updated", "not_found", "updated"]
+    assert results[0]["task"]["completed"] is True
+    assert results[0]["task"]["title"] == "A"
+    assert results[2]["task"]["title"] == "B2"
+    assert results[1]["task"] is None
+
+
+def test_bulk_delete_by_ids_and_filter(client: TestClient):
+    created = client.post(
+        "/tasks/bulk",
+        json=[
+            {"title": "Keep"},
+            {"title": "Done 1", "completed": True},
+            {"title": "Done 2", "completed": True},
+        ]
+    ).json()
+    keep_id = created[0]["id"]
+
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": [created[1]["id"], 99999]})
+    assert [r["status"] for r in response.json()] == ["deleted", "not_found"]
+
+    response = client.request("DELETE", "/tasks/bulk", json={"completed": True})
+    assert [r["id"] for r in response.json()] == [created[2]["id"]]
+
+    remaining = client.get("/tasks/").json()
+    assert [t["id"] for t in remaining] == [keep_id]
+
+
+def test_bulk_delete_requires_criteria(client: TestClient):
+    client.post("/tasks/", json={"title": "Safe"})
+    response = client.request("DELETE", "/tasks/bulk", json={})
+    assert response.status_code == 400
+
+    response = client.request("DELETE", "/tasks/bulk", json={"all": True})
+    assert len(response.json()) == 1
+    assert client.get("/tasks/").json() == []
@@ -0,0 +1,90 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import cache as cache_module
+from backend.cache import CachedResponse, LRUCache, NullCache
+from backend.dependencies import USER_ID_HEADER
+
+
+@pytest.fixture
+def memory_cache():
+    previous = cache_module.get_cache()
+    cache_module.set_cache(LRUCache(maxsize=100, ttl=60))
+    yield cache_module.get_cache()
+    cache_module.set_cache(previous)
+
+
+def test_lru_cache_evicts_and_expires():
+    cache = LRUCache(maxsize=2, ttl=60)
+    value = CachedResponse(body=b"[]", headers={})
+    cache.set("a", value, cache.generation())
+    cache.set("b", value, cache.generation())
+    cache.get("a") # "a" is now the most recently used entry
+    cache.set("c", value, cache.generation())
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+
+    expired = LRUCache(maxsize=2, ttl=-1)
+    expired.set("a", value, expired.generation())
+    assert expired.get("a") is None
+
+
+def test_lru_cache_skips_values_built_before_a_write():
+    cache = LRUCache()
+    generation = cache.generation()
+    cache.bump_generation() # a write lands while the value is being built
+    cache.set("a", CachedResponse(body=b"{}", headers={}), generation)
+    assert cache.get("a") is None
+
+
+def test_single_task_is_cached_and_invalidated(client: TestClient, memory_cache):
+    task_id = client.post("/tasks/", json={"title": "Cached"}).json()["id"]
+
+    first = client.get(f"/tasks/{task_id}")
+    second = client.get(f"/tasks/{task_id}")
+    assert first.json() == second.json()
+    assert memory_cache.hits == 1
+
+    client.put(f"/tasks/{task_id}", json={"title": "Changed"})
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "Changed"
+
+    client.delete(f"/tasks/{task_id}")
+    assert client.get(f"/tasks/{task_id}").status_code == 404
+
+
+def test_list_is_cached_per_query_and_invalidated(client: TestClient, memory_cache):
+    client.post("/tasks/", json={"title": "One"})
+    client.post("/tasks/", json={"title": "Two"})
+
+    page = client.get("/tasks/", params={"limit": 1})
+    cached_page = client.get("/tasks/", params={"limit": 1})
+    assert cached_page.json() == page.json()
+    assert cached_page.headers["X-Next-Cursor"] == page.headers["X-Next-Cursor"]
+    assert memory_cache.hits == 1
+
+    client.post("/tasks/bulk", json=[{"title": "Three"}])
+    assert len(client.get("/tasks/").json()) == 3
+    assert client.get("/cache/stats").json()["backend"] == "memory"
+
+
+def test_other_users_writes_keep_a_users_list_and_stats(client: TestClient, memory_cache):
+    other = {USER_ID_HEADER: str(client.post("/users/", json={"username": "other", "email": "other@example.com"}).json()["id"])}
+    client.post("/tasks/", json={"title": "Mine"})
+    listed, stats = client.get("/tasks/"), client.get("/tasks/stats")
+
+    client.post("/tasks/", json={"title": "Theirs"}, headers=other)
+    client.request("DELETE", "/tasks/bulk", json={"all": True}, headers=other)
+    assert client.get("/tasks/", headers={"If-None-Match": listed.headers["ETag"]}).status_code == 304
+    assert client.get("/tasks/stats", headers={"If-None-Match": stats.headers["ETag"]}).status_code == 304
+    hits = memory_cache.hits
+    assert client.get("/tasks/").json() == listed.json()
+    assert memory_cache.hits == hits + 1
+
+    client.post("/tasks/", json={"title": "Mine too"})
+    assert client.get("/tasks/", headers={"If-None-Match": listed.headers["ETag"]}).status_code == 200
+    assert client.get("/tasks/stats", headers={"If-None-Match": stats.headers["ETag"]}).status_code == 200
+
+
+def test_cache_disabled_by_default(client: TestClient):
+    assert isinstance(cache_module.get_cache(), NullCache)
+    assert client.get("/cache/stats").json() == {"backend": "none", "hits": 0, "misses": 0}
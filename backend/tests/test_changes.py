@@ -0,0 +1,58 @@
+from fastapi.testclient import TestClient
+
+from backend import crud
+
+
+def test_changes_returns_everything_from_zero(client: TestClient):
+    client.post("/tasks/", json={"title": "A"})
+    client.post("/tasks/", json={"title": "B"})
+
+    changes = client.get("/tasks/changes").json()
+    assert [t["title"] for t in changes["tasks"]] == ["A", "B"]
+    assert changes["deleted"] == []
+    assert changes["has_more"] is False
+
+
+def test_changes_since_token_returns_only_new_writes(client: TestClient):
+    first_id = client.post("/tasks/", json={"title": "A"}).json()["id"]
+    second = client.post("/tasks/", json={"title": "B"})
+    token = client.get("/tasks/changes").json()["token"]
+    assert token == second.headers["X-Change-Token"]
+
+    assert client.get("/tasks/changes", params={"since": token}).json()["tasks"] == []
+
+    update = client.put(f"/tasks/{first_id}", json={"completed": True})
+    delete = client.delete(f"/tasks/{second.json()['id']}")
+    assert int(update.headers["X-Change-Token"]) < int(delete.headers["X-Change-Token"])
+
+    changes = client.get("/tasks/changes", params={"since": token}).json()
+    assert [(t["id"], t["completed"]) for t in changes["tasks"]] == [(first_id, True)]
+    assert changes["deleted"] == [second.json()["id"]]
+    assert changes["token"] == delete.headers["X-Change-Token"]
+
+
+def test_changes_paginates_in_change_order(client: TestClient):
+    created = client.post("/tasks/bulk", json=[{"title": f"T{i}"} for i in range(3)])
+    ids = [r["id"] for r in created.json()]
+    client.request("DELETE", "/tasks/bulk", json={"ids": [ids[0]]})
+    client.patch("/tasks/bulk", json=[{"id": ids[1], "title": "T1 edited"}])
+
+    first_page = client.get("/tasks/changes", params={"limit": 2}).json()
+    assert [t["id"] for t in first_page["tasks"]] == [ids[2]]
+    assert first_page["deleted"] == [ids[0]]
+    assert first_page["has_more"] is True
+
+    second_page = client.get("/tasks/changes", params={"since": first_page["token"], "limit": 2}).json()
+    assert [t["title"] for t in second_page["tasks"]] == ["T1 edited"]
+    assert second_page["has_more"] is False
+
+
+def test_changes_rejects_bad_and_pruned_tokens(client: TestClient, db):
+    assert client.get("/tasks/changes", params={"since": "abc"}).status_code == 400
+
+    task_id = client.post("/tasks/", json={"title": "A"}).json()["id"]
+    client.delete(f"/tasks/{task_id}")
+    token = client.post("/tasks/", json={"title": "B"}).headers["X-Change-Token"]
+    assert crud.prune_tombstones(db, before_seq=int(token)) == 1
+    assert client.get("/tasks/changes", params={"since": "1"}).status_code == 410
+    assert client.get("/tasks/changes", params={"since": token}).status_code == 200
@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+
+def test_list_etag_returns_304_until_a_write(client: TestClient):
+    client.post("/tasks/", json={"title": "A"})
+    first = client.get("/tasks/")
+    etag = first.headers["ETag"]
+
+    not_modified = client.get("/tasks/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    # Different queries have different ETags
+    assert client.get("/tasks/", params={"limit": 1}).headers["ETag"] != etag
+
+    client.post("/tasks/", json={"title": "B"})
+    changed = client.get("/tasks/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert len(changed.json()) == 2
+    assert changed.headers["ETag"] != etag
+
+
+def test_single_task_etag_follows_that_task(client: TestClient):
+    task_id = client.post("/tasks/", json={"title": "A"}).json()["id"]
+    etag = client.get(f"/tasks/{task_id}").headers["ETag"]
+
+    assert client.get(f"/tasks/{task_id}", headers={"If-None-Match": f'{etag.removeprefix("W/")}, "other"'}).status_code == 304
+
+    # Writing another task does not change this one's ETag
+    client.post("/tasks/", json={"title": "B"})
+    assert client.get(f"/tasks/{task_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/tasks/{task_id}", json={"completed": True})
+    response = client.get(f"/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["completed"] is True
+
+
+def test_large_lists_are_compressed(client: TestClient):
+    client.post("/tasks/bulk", json=[{"title": f"Task number {i}"} for i in range(50)])
+    response = client.get("/tasks/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()) == 50
+
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+
+def test_etags_are_weak_across_content_encodings(client: TestClient):
+    client.post("/tasks/bulk", json=[{"title": f"Task {i}", "description": "x" * 100} for i in range(20)])
+    gzipped = client.get("/tasks/", headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/tasks/", headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["Content-Encoding"] == "gzip" and "Content-Encoding" not in plain.headers
+    # Same version, different bytes: only a weak validator may be shared
+    assert gzipped.headers["ETag"] == plain.headers["ETag"] and plain.headers["ETag"].startswith('W/"')
@@ -0,0 +1,70 @@
+from sqlalchemy import text
+
+from backend import migrations
+from backend.database import make_engine
+from backend.models import DEFAULT_USER_ID
+
+
+def test_make_engine_applies_sqlite_pragmas(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1 # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2 # MEMORY
+    assert engine.pool.size() == 10
+    assert not engine.pool._pre_ping # no SELECT 1 per checkout for a local file
+    engine.dispose()
+
+
+def test_make_engine_accepts_custom_pragmas(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'custom.db'}", pragmas={"busy_timeout": 250})
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 250
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    engine.dispose()
+
+
+def test_upgrade_creates_schema_once(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert migrations.current_version(engine) == 0
+    assert migrations.upgrade(engine) == [m.version for m in migrations.MIGRATIONS]
+    assert migrations.current_version(engine) == migrations.HEAD
+    assert migrations.upgrade(engine) == []
+    with engine.connect() as conn:
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+    assert {"tasks", "sync_state", "task_tombstones", "schema_migrations", "tasks_fts"} <= tables
+    engine.dispose()
+
+
+def test_upgrade_brings_unversioned_database_up_to_date(tmp_path):
+    # A tasks table as created before change tracking, indexes and migrations existed
+    engine = make_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description TEXT, "
+            "category VARCHAR, created_at DATETIME, updated_at DATETIME, completed BOOLEAN)"
+        ))
+        conn.execute(text("INSERT INTO tasks (title, completed) VALUES ('old task', 0), ('searchable', 1)"))
+
+    migrations.upgrade(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id, change_seq FROM tasks ORDER BY id")).all() == [(1, 1), (2, 2)]
+        assert conn.execute(text("SELECT seq FROM sync_state")).scalar() == 2
+        assert conn.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'searchable'")).scalar() == 2
+        # Existing tasks belong to the default user; the old indexes gave way to per-user ones
+        assert conn.execute(text("SELECT DISTINCT user_id FROM tasks")).scalars().all() == [DEFAULT_USER_ID]
+        assert conn.execute(text("SELECT username FROM users")).scalars().all() == ["default"]
+        assert conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'ix_tasks_user_completed_id'")).scalar() == 1
+        assert conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'ix_tasks_completed_id'")).scalar() is None
+        assert conn.execute(text("SELECT total FROM task_category_counts WHERE user_id = 1 AND completed = 1")).scalar() == 1
+    # Rebuilt with AUTOINCREMENT, keeping its search index and statistics triggers
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM tasks WHERE id = 2"))
+        conn.execute(text("INSERT INTO tasks (user_id, title) VALUES (1, 'searchable again')"))
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT MAX(id) FROM tasks")).scalar() == 3
+        assert conn.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'searchable'")).scalar() == 3
+        assert conn.execute(text("SELECT total FROM task_category_counts WHERE user_id = 1 AND completed = 1")).scalar() == 0
+    engine.dispose()
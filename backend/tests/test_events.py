@@ -0,0 +1,96 @@
+import asyncio
+
+from backend import events
+from backend.routers.events import format_sse, sse_events
+
+
+def test_websocket_receives_single_task_events(client):
+    with client.websocket_connect("/tasks/ws") as ws:
+        assert ws.receive_json() == {"type": "ready"}
+
+        created = client.post("/tasks/", json={"title": "Pushed"})
+        event = ws.receive_json()
+        assert event["type"] == "created"
+        assert event["id"] == created.json()["id"]
+        assert event["task"]["title"] == "Pushed"
+        assert event["token"] == created.headers["X-Change-Token"]
+
+        task_id = event["id"]
+        client.put(f"/tasks/{task_id}", json={"completed": True})
+        event = ws.receive_json()
+        assert (event["type"], event["id"], event["task"]["completed"]) == ("updated", task_id, True)
+
+        deleted = client.delete(f"/tasks/{task_id}")
+        event = ws.receive_json()
+        assert event == {
+            "type": "deleted", "user_id": 1, "id": task_id, "token": deleted.headers["X-Change-Token"], "task": None,
+        }
+    assert events.broker.subscriber_count() == 0
+
+
+def test_websocket_bulk_writes_publish_one_changed_event(client):
+    with client.websocket_connect("/tasks/ws") as ws:
+        ws.receive_json()
+        response = client.post("/tasks/bulk", json=[{"title": f"Bulk {i}"} for i in range(3)])
+        assert ws.receive_json() == {"type": "changed", "user_id": 1, "token": response.headers["X-Change-Token"]}
+
+
+def test_no_events_built_without_subscribers(client, monkeypatch):
+    def fail(event):
+        raise AssertionError("published without subscribers")
+    monkeypatch.setattr(events.backend, "publish", fail)
+    assert client.post("/tasks/", json={"title": "Quiet"}).status_code == 200
+
+
+def test_slow_subscriber_gets_resync_instead_of_backlog():
+    async def scenario():
+        subscriber = events.broker.subscribe(1, maxsize=2)
+        try:
+            for i in range(5):
+                events.broker.dispatch({"type": "changed", "user_id": 1, "token": str(i)})
+            await asyncio.sleep(0) # let the threadsafe callbacks run
+            assert await subscriber.get() == events.RESYNC_EVENT
+            assert subscriber.queue.empty()
+        finally:
+            events.broker.unsubscribe(subscriber)
+    asyncio.run(scenario())
+
+
+def test_sse_stream_formats_events():
+    class FakeRequest:
+        async def is_disconnected(self):
+            return False
+
+    async def scenario():
+        stream = sse_events(FakeRequest(), 1)
+        first = await stream.__anext__()
+        assert first.startswith(b"retry: 3000\n") and b"event: ready\n" in first
+        assert events.broker.subscriber_count() == 1
+        events.broker.dispatch({"type": "deleted", "user_id": 1, "id": 7, "token": "42", "task": None})
+        message = await stream.__anext__()
+        await stream.aclose()
+        return message
+
+    message = asyncio.run(scenario())
+    assert message == format_sse({"type": "deleted", "user_id": 1, "id": 7, "token": "42", "task": None})
+    assert message.startswith(b"id: 42\nevent: deleted\ndata: {")
+    assert events.broker.subscriber_count() == 0
+
+
+def test_dispatch_visits_only_the_writers_subscribers(monkeypatch):
+    offered = []
+    monkeypatch.setattr(events.Subscriber, "offer", lambda self, event: offered.append((self.user_id, event["token"])))
+
+    async def scenario():
+        broker = events.EventBroker()
+        mine = [broker.subscribe(2), broker.subscribe(2)]
+        other = broker.subscribe(3)
+        broker.dispatch({"type": "changed", "user_id": 2, "token": "1"})
+        broker.dispatch({"type": "changed", "user_id": 4, "token": "2"}) # nobody listening
+        await asyncio.sleep(0)
+        for subscriber in (*mine, other):
+            broker.unsubscribe(subscriber)
+        return broker.subscriber_count()
+
+    assert asyncio.run(scenario()) == 0
+    assert offered == [(2, "1"), (2, "1")]
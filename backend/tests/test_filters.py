@@ -0,0 +1,107 @@
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from backend import crud, schemas
+from backend.models import DEFAULT_USER_ID
+from backend.pagination import Cursor
+
+
+def _create(client, **fields):
+    return client.post("/tasks/", json=fields).json()
+
+
+def test_filter_by_completed_and_category(client: TestClient):
+    _create(client, title="A", category="work", completed=True)
+    _create(client, title="B", category="work")
+    _create(client, title="C", category="home", completed=True)
+
+    done = client.get("/tasks/", params={"completed": True}).json()
+    assert [t["title"] for t in done] == ["A", "C"]
+
+    work_open = client.get("/tasks/", params={"completed": False, "category": "work"}).json()
+    assert [t["title"] for t in work_open] == ["B"]
+
+
+def test_filter_by_dates(client: TestClient):
+    first = _create(client, title="First")
+    created = datetime.fromisoformat(first["created_at"])
+
+    assert client.get("/tasks/", params={"created_after": (created + timedelta(seconds=1)).isoformat()}).json() == []
+    assert len(client.get("/tasks/", params={"created_before": (created + timedelta(seconds=1)).isoformat()}).json()) == 1
+    assert len(client.get("/tasks/", params={"updated_since": (created - timedelta(seconds=1)).isoformat() + "Z"}).json()) == 1
+
+
+def test_order_by_and_cursor(client: TestClient):
+    ids = [_create(client, title=f"T{i}")["id"] for i in range(3)]
+    client.put(f"/tasks/{ids[0]}", json={"title": "T0 edited"})
+
+    newest_first = client.get("/tasks/", params={"order_by": "-updated_at"}).json()
+    assert newest_first[0]["id"] == ids[0]
+
+    page = client.get("/tasks/", params={"order_by": "-id", "limit": 2})
+    assert [t["id"] for t in page.json()] == [ids[2], ids[1]]
+    rest = client.get("/tasks/", params={"order_by": "-id", "limit": 2, "cursor": page.headers["X-Next-Cursor"]})
+    assert [t["id"] for t in rest.json()] == [ids[0]]
+
+    page = client.get("/tasks/", params={"order_by": "created_at", "limit": 2})
+    rest = client.get("/tasks/", params={"order_by": "created_at", "limit": 2, "cursor": page.headers["X-Next-Cursor"]})
+    assert [t["id"] for t in page.json() + rest.json()] == ids
+
+    # A cursor is only valid for the sort order it was issued for
+    mismatched = client.get("/tasks/", params={"order_by": "id", "cursor": page.headers["X-Next-Cursor"]})
+    assert mismatched.status_code == 400
+
+
+def test_invalid_order_by(client: TestClient):
+    assert client.get("/tasks/", params={"order_by": "title"}).status_code == 422
+
+
+SINCE = datetime(2024, 1, 1)
+FILTER_COMBINATIONS = [
+    {"completed": True},
+    {"category": "work"},
+    {"created_after": SINCE},
+    {"created_after": SINCE, "created_before": SINCE + timedelta(days=7)},
+    {"updated_since": SINCE},
+    {"completed": False, "category": "work"},
+    {"completed": True, "created_after": SINCE},
+    {"completed": True, "updated_since": SINCE},
+    {"category": "work", "created_after": SINCE},
+    {"category": "work", "updated_since": SINCE},
+]
+ORDER_BYS = ["id", "-id", "created_at", "-created_at", "updated_at", "-updated_at"]
+
+
+def _query_plan(conn, filters, after=None):
+    query = crud.build_tasks_query(DEFAULT_USER_ID, filters, after=after)
+    sql = str(query.compile(conn, compile_kwargs={"literal_binds": True}))
+    return [row[3] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+@pytest.mark.parametrize("filters,order_by", list(itertools.product(FILTER_COMBINATIONS, ORDER_BYS)))
+def test_filters_use_an_index(connection, filters, order_by):
+    params = schemas.TaskListParams(order_by=order_by, **filters)
+    after = Cursor(order_by=order_by, value=None if order_by.endswith("id") else SINCE, id=1)
+    for plan in (_query_plan(connection, params), _query_plan(connection, params, after)):
+        assert "USING INDEX" in plan[0] or "PRIMARY KEY" in plan[0], plan
+
+
+@pytest.mark.parametrize("order_by", ORDER_BYS)
+def test_unfiltered_sorts_walk_an_index(connection, order_by):
+    plan = _query_plan(connection, schemas.TaskListParams(order_by=order_by))
+    # Every sort walks an index that leads with user_id
+    assert "USING INDEX" in plan[0] or "USING COVERING INDEX" in plan[0], plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+@pytest.mark.parametrize("filters,order_by", list(itertools.product(
+    [{"completed": False}, {"category": "work"}, {"completed": False, "category": "work"}], ["id", "-id"],
+)))
+def test_equality_filters_keep_id_order(connection, filters, order_by):
+    # The default listing: without (column, id) indexes SQLite sorts every matching row
+    plan = _query_plan(connection, schemas.TaskListParams(order_by=order_by, **filters))
+    assert not any("TEMP B-TREE" in step for step in plan), plan
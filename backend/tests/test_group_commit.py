@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from backend import archive, schemas
+from backend.models import DEFAULT_USER_ID
+from backend.writer import WriterBusy
+
+
+def test_grouped_create_and_update(grouped_client: TestClient):
+    response = grouped_client.post("/tasks/", json={"title": "Queued", "category": "work"})
+    assert response.status_code == 200
+    created = response.json()
+    assert created["id"] and created["created_at"] and created["completed"] is False
+    created_token = int(response.headers["X-Change-Token"])
+
+    response = grouped_client.put(f"/tasks/{created['id']}", json={"completed": True})
+    assert response.status_code == 200
+    assert response.json()["completed"] is True
+    assert response.json()["title"] == "Queued"
+    assert int(response.headers["X-Change-Token"]) > created_token
+
+    # Reads go through the regular routes and see the committed writes
+    assert grouped_client.get(f"/tasks/{created['id']}").json()["completed"] is True
+    assert grouped_client.put("/tasks/999999", json={"completed": True}).status_code == 404
+
+
+def test_grouped_update_moves_an_archived_task_back(grouped_client: TestClient, test_engine):
+    task_id = grouped_client.post("/tasks/", json={"title": "Done long ago", "completed": True}).json()["id"]
+    with test_engine.begin() as conn:
+        conn.execute(text("UPDATE tasks SET updated_at = :old"), {"old": datetime.utcnow() - timedelta(days=90)})
+    assert archive.archive_completed(test_engine, timedelta(days=30), pause=0) == 1
+
+    response = grouped_client.put(f"/tasks/{task_id}", json={"completed": False})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Done long ago"
+    assert [t["id"] for t in grouped_client.get("/tasks/").json()] == [task_id]
+    with test_engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM tasks_archive")).scalar() == 0
+
+
+def test_concurrent_writes_share_a_transaction(grouped_client: TestClient, writer):
+    writer.max_delay = 0.05 # linger long enough to collect every submission below
+    futures = [writer.create(DEFAULT_USER_ID, schemas.TaskCreate(title=f"Task {i}")) for i in range(20)]
+    tasks = [future.result(timeout=5) for future in futures]
+    assert writer.batches < 20 and writer.writes == 20
+    assert len({task.id for task in tasks}) == 20
+    # Change sequence numbers follow submission order
+    assert [task.change_seq for task in tasks] == sorted(task.change_seq for task in tasks)
+    assert len(grouped_client.get("/tasks/").json()) == 20
+
+
+def test_failed_write_does_not_fail_its_batch(grouped_client: TestClient, writer):
+    writer.max_delay = 0.05
+    good = writer.create(DEFAULT_USER_ID, schemas.TaskCreate(title="Good"))
+    bad = writer.submit(DEFAULT_USER_ID, None, {"title": None}) # violates NOT NULL
+    also_good = writer.create(DEFAULT_USER_ID, schemas.TaskCreate(title="Also good"))
+    assert good.result(timeout=5).title == "Good"
+    assert also_good.result(timeout=5).title == "Also good"
+    with pytest.raises(Exception):
+        bad.result(timeout=5)
+
+
+def test_full_queue_returns_503(grouped_client: TestClient, writer, monkeypatch):
+    monkeypatch.setattr(writer, "start", lambda: None) # nothing drains the queue
+    while True:
+        try:
+            writer.submit(DEFAULT_USER_ID, None, {"title": "Backlog"})
+        except WriterBusy:
+            break
+    response = grouped_client.post("/tasks/", json={"title": "One too many"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -63,4 +63,33 @@ def test_full_task_lifecycle(client: TestClient):
     # 8. Read all tasks again (should be empty)
     get_all_empty_response = client.get("/tasks/")
     assert get_all_empty_response.status_code == 200
-    assert get_all_empty_response.json() == [] 
\ No newline at end of file
+    assert get_all_empty_response.json() == [] 
+
+def test_single_writes_use_returning(client: TestClient, connection):
+    """ Each write is the change-seq allocation plus one statement: no load before, no refresh after. """
+    from sqlalchemy import event
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        # Leave out the savepoints the test transaction wraps each commit in
+        if not statement.startswith(("SAVEPOINT", "RELEASE")):
+            statements.append(statement.split()[0].upper())
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        task = client.post("/tasks/", json={"title": "Returning"}).json()
+        assert statements == ["UPDATE", "INSERT"]
+        assert task["id"] and task["created_at"] and task["updated_at"]
+
+        statements.clear()
+        response = client.put(f"/tasks/{task['id']}", json={"completed": True})
+        assert statements == ["UPDATE", "UPDATE"]
+        assert response.json()["completed"] is True
+        assert response.json()["title"] == "Returning"
+        assert response.json()["updated_at"] >= task["updated_at"]
+
+        statements.clear()
+        assert client.delete(f"/tasks/{task['id']}").json()["title"] == "Returning"
+        assert statements == ["UPDATE", "DELETE", "INSERT"]
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
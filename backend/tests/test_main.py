@@ -66,4 +66,26 @@ def test_read_todo_not_found(client: TestClient):
     assert response.status_code == 404
     assert response.json() == {"detail": "Task not found"}
 
-# Add more tests here for update, delete, etc. 
\ No newline at end of file
+# Add more tests here for update, delete, etc. 
+
+def test_read_todos_cursor_pagination(client: TestClient):
+    for i in range(5):
+        client.post("/tasks/", json={"title": f"Todo {i}"})
+
+    first_page = client.get("/tasks/", params={"limit": 2})
+    assert first_page.status_code == 200
+    assert [t["title"] for t in first_page.json()] == ["Todo 0", "Todo 1"]
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    second_page = client.get("/tasks/", params={"limit": 2, "cursor": cursor})
+    assert [t["title"] for t in second_page.json()] == ["Todo 2", "Todo 3"]
+    cursor = second_page.headers["X-Next-Cursor"]
+
+    last_page = client.get("/tasks/", params={"limit": 2, "cursor": cursor})
+    assert [t["title"] for t in last_page.json()] == ["Todo 4"]
+    assert "X-Next-Cursor" not in last_page.headers
+
+
+def test_read_todos_invalid_cursor(client: TestClient):
+    response = client.get("/tasks/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
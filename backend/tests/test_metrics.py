@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from backend.main import app
+from backend.metrics import MetricsMiddleware
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_endpoint_exposes_request_and_db_metrics(client):
+    task_id = client.post("/tasks/", json={"title": "Measured"}).json()["id"]
+    client.get(f"/tasks/{task_id}")
+    client.get("/tasks/999999")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    # Labelled by route template, not by the concrete path
+    assert 'todo_http_requests_total{method="GET",route="/tasks/{task_id}",status="200"}' in body
+    assert 'todo_http_requests_total{method="GET",route="/tasks/{task_id}",status="404"}' in body
+    assert f"/tasks/{task_id}\"" not in body
+    for name in ("todo_http_request_duration_seconds_bucket", "todo_http_requests_in_progress",
+                 "todo_db_query_duration_seconds_bucket", "todo_db_pool_checkout_seconds_count",
+                 "todo_db_commit_duration_seconds_count", "todo_http_request_db_queries_bucket"):
+        assert name in body
+
+
+def test_db_queries_and_commits_are_counted(committed_client):
+    # Committed for real: inside the rolled-back test transaction a commit only releases a savepoint
+    inserts = sample("todo_db_queries_total", operation="insert")
+    commits = sample("todo_db_commit_duration_seconds_count")
+    committed_client.post("/tasks/", json={"title": "Counted"})
+    assert sample("todo_db_queries_total", operation="insert") == inserts + 1
+    assert sample("todo_db_commit_duration_seconds_count") >= commits + 1
+
+
+def test_unmatched_paths_share_one_label(client):
+    before = sample("todo_http_requests_total", method="GET", route="<unmatched>", status="404")
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+    assert sample("todo_http_requests_total", method="GET", route="<unmatched>", status="404") == before + 2
+
+
+def test_server_timing_header_is_opt_in(client):
+    assert "server-timing" not in client.get("/tasks/").headers
+
+    with TestClient(MetricsMiddleware(app, server_timing=True)) as timed_client:
+        timed_client.post("/tasks/", json={"title": "Timed"})
+        header = timed_client.get("/tasks/").headers["server-timing"]
+    parts = dict(part.split(";", 1) for part in header.split(", "))
+    assert set(parts) == {"db", "serialize", "app", "total"}
+    assert 'desc="' in parts["db"] and not parts["db"].endswith('desc="0 queries"')
@@ -0,0 +1,122 @@
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from backend import cache as cache_module
+from backend import main
+from backend.cache import LRUCache
+from backend.database import (
+    configure_async_replicas, configure_replicas, dispose_async_replicas, has_replicas, make_async_engine, make_engine,
+)
+from backend.dependencies import CHANGE_TOKEN_COOKIE, MIN_CHANGE_TOKEN_HEADER
+
+
+@pytest.fixture
+def client(committed_client):
+    # Replication copies the database file, which only holds committed writes
+    return committed_client
+
+
+# A SQLite file stands in for a streaming replica: it only sees the primary's
+# writes when the test "replicates" them with replicate().
+@pytest.fixture
+def replica(client, test_engine, tmp_path):
+    replica_file = str(tmp_path / "replica.db")
+    replica_engine = make_engine(f"sqlite:///{replica_file}")
+
+    def replicate():
+        source, target = sqlite3.connect(test_engine.url.database), sqlite3.connect(replica_file)
+        source.backup(target)
+        source.close()
+        target.close()
+        replica_engine.dispose()
+
+    replicate() # the replica starts with the primary's schema
+    configure_replicas([replica_engine])
+    yield replica_engine, replicate
+    configure_replicas([])
+    replica_engine.dispose()
+
+
+def test_reads_go_to_the_replica(client: TestClient, replica):
+    replica_engine, replicate = replica
+    task_id = client.post("/tasks/", json={"title": "Written"}).json()["id"]
+    client.cookies.clear()
+    # Without a change token the lagging replica answers
+    assert client.get(f"/tasks/{task_id}").status_code == 404
+    assert client.get("/tasks/").json() == []
+
+    replicate()
+    with replica_engine.begin() as conn:
+        conn.execute(text("UPDATE tasks SET title = 'From replica'"))
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "From replica"
+    assert [task["title"] for task in client.get("/tasks/").json()] == ["From replica"]
+
+
+def test_writer_reads_its_own_writes(client: TestClient, replica):
+    replica_engine, replicate = replica
+    response = client.post("/tasks/", json={"title": "Mine"})
+    task_id = response.json()["id"]
+    token = response.headers["X-Change-Token"]
+    assert response.cookies[CHANGE_TOKEN_COOKIE] == token
+
+    # The cookie pins reads to the primary while the replica is behind
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "Mine"
+    assert [task["title"] for task in client.get("/tasks/").json()] == ["Mine"]
+
+    # Clients without cookies send the token as a header
+    client.cookies.clear()
+    headers = {MIN_CHANGE_TOKEN_HEADER: token}
+    assert client.get(f"/tasks/{task_id}", headers=headers).status_code == 200
+
+    # Once the replica has caught up it serves the pinned client too
+    replicate()
+    with replica_engine.begin() as conn:
+        conn.execute(text("UPDATE tasks SET title = 'From replica'"))
+    assert client.get(f"/tasks/{task_id}", headers=headers).json()["title"] == "From replica"
+
+
+def test_lagging_replica_does_not_poison_the_cache(client: TestClient, replica):
+    previous = cache_module.get_cache()
+    cache_module.set_cache(LRUCache(maxsize=100, ttl=60))
+    try:
+        _, replicate = replica
+        task_id = client.post("/tasks/", json={"title": "v1"}).json()["id"]
+        replicate()
+        client.put(f"/tasks/{task_id}", json={"title": "v2"})
+        # Served by the stale replica, then by the primary for the pinned writer
+        client.cookies.clear()
+        assert client.get(f"/tasks/{task_id}").json()["title"] == "v1"
+        assert client.get("/tasks/").json()[0]["title"] == "v1"
+        headers = {MIN_CHANGE_TOKEN_HEADER: "999999"}
+        assert client.get(f"/tasks/{task_id}", headers=headers).json()["title"] == "v2"
+        assert client.get("/tasks/", headers=headers).json()[0]["title"] == "v2"
+    finally:
+        cache_module.set_cache(previous)
+
+
+def test_async_routes_read_from_the_replica(async_client: TestClient, replica, tmp_path):
+    _, replicate = replica
+    configure_async_replicas([make_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")])
+    try:
+        response = async_client.post("/tasks/", json={"title": "Async"})
+        task_id = response.json()["id"]
+        # Pinned to the primary by the write's cookie, then served by the lagging replica without it
+        assert async_client.get(f"/tasks/{task_id}").json()["title"] == "Async"
+        async_client.cookies.clear()
+        assert async_client.get(f"/tasks/{task_id}").status_code == 404
+        assert async_client.get("/tasks/").json() == []
+        replicate()
+        assert [task["title"] for task in async_client.get("/tasks/").json()] == ["Async"]
+    finally:
+        asyncio.run(dispose_async_replicas())
+
+
+def test_replicas_are_ignored_with_a_database_per_tenant(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "TENANCY", "database")
+    monkeypatch.setattr(main, "REPLICA_URLS", [f"sqlite:///{tmp_path / 'replica.db'}"])
+    with TestClient(main.app):
+        assert not has_replicas()
@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import literal, select
+
+from backend.crud import build_fts_query, build_like_pattern
+
+
+def test_build_fts_query_quotes_words():
+    assert build_fts_query('buy milk') == '"buy"* "milk"*'
+    assert build_fts_query('NOT "x" OR title:y') == '"NOT"* "x"* "OR"* "title"* "y"*'
+    assert build_fts_query('  -- ') == ''
+    # Scoped to one user: the words must not match the user_id column
+    assert build_fts_query('buy 7', user_id=7) == 'user_id : "7" AND {title description category} : ("buy"* "7"*)'
+
+
+def test_build_like_pattern_escapes_wildcards(connection):
+    assert build_like_pattern("50%") == "%50\\%%"
+    assert build_like_pattern(r"a_b\c") == r"%a\_b\\c%"
+
+    def matches(text, q):
+        return connection.scalar(select(literal(text).ilike(build_like_pattern(q), escape="\\")))
+    assert matches("Save 50% today", "50%") and not matches("Save 500 today", "50%")
+    assert matches("A_B", "a_b") and not matches("axb", "a_b")
+    assert matches(r"C:\temp", r"c:\t")
+
+
+def test_search_matches_title_description_and_category(client: TestClient):
+    client.post("/tasks/", json={"title": "Buy groceries", "description": "milk and eggs"})
+    client.post("/tasks/", json={"title": "Call plumber", "category": "household"})
+    client.post("/tasks/", json={"title": "Write report", "description": "quarterly numbers"})
+
+    assert [t["title"] for t in client.get("/tasks/search", params={"q": "milk"}).json()] == ["Buy groceries"]
+    assert [t["title"] for t in client.get("/tasks/search", params={"q": "house"}).json()] == ["Call plumber"]
+    assert [t["title"] for t in client.get("/tasks/search", params={"q": "QUART numb"}).json()] == ["Write report"]
+    assert client.get("/tasks/search", params={"q": "nothing"}).json() == []
+
+
+def test_search_ranks_title_matches_first_and_paginates(client: TestClient):
+    client.post("/tasks/", json={"title": "Other", "description": "about the garden"})
+    client.post("/tasks/", json={"title": "Garden", "description": "weeding"})
+
+    results = client.get("/tasks/search", params={"q": "garden"}).json()
+    assert [t["title"] for t in results] == ["Garden", "Other"]
+
+    second_page = client.get("/tasks/search", params={"q": "garden", "skip": 1, "limit": 1}).json()
+    assert [t["title"] for t in second_page] == ["Other"]
+
+
+def test_search_index_follows_updates_and_deletes(client: TestClient):
+    task_id = client.post("/tasks/", json={"title": "Old name"}).json()["id"]
+    client.put(f"/tasks/{task_id}", json={"title": "New name"})
+    assert client.get("/tasks/search", params={"q": "old"}).json() == []
+    assert [t["id"] for t in client.get("/tasks/search", params={"q": "new"}).json()] == [task_id]
+
+    client.delete(f"/tasks/{task_id}")
+    assert client.get("/tasks/search", params={"q": "new"}).json() == []
+
+
+def test_search_requires_query(client: TestClient):
+    assert client.get("/tasks/search").status_code == 422
@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+
+
+def test_list_matches_single_task_serialization(client: TestClient):
+    task_id = client.post("/tasks/", json={"title": "Same", "description": "both ways", "completed": True}).json()["id"]
+    assert client.get("/tasks/").json() == [client.get(f"/tasks/{task_id}").json()]
+
+
+def test_sparse_fieldsets(client: TestClient):
+    client.post("/tasks/", json={"title": "A", "description": "hidden"})
+    client.post("/tasks/", json={"title": "B"})
+
+    response = client.get("/tasks/", params={"fields": "completed, title"})
+    assert response.json() == [
+        {"title": "A", "completed": False},
+        {"title": "B", "completed": False},
+    ]
+
+    # The cursor still works when the sort key is not among the fields
+    page = client.get("/tasks/", params={"fields": "title", "order_by": "-created_at", "limit": 1})
+    rest = client.get("/tasks/", params={
+        "fields": "title", "order_by": "-created_at", "limit": 1, "cursor": page.headers["X-Next-Cursor"],
+    })
+    assert [t["title"] for t in page.json() + rest.json()] == ["B", "A"]
+
+
+def test_unknown_field_is_rejected(client: TestClient):
+    response = client.get("/tasks/", params={"fields": "id,secret"})
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from backend import crud, models, stats
+
+
+def test_stats_count_by_category_and_completion(client: TestClient):
+    client.post("/tasks/bulk", json=[
+        {"title": "Milk", "category": "shopping"},
+        {"title": "Bread", "category": "shopping", "completed": True},
+        {"title": "Report", "category": "work"},
+        {"title": "Loose end"},
+    ])
+    stats_response = client.get("/tasks/stats").json()
+    assert (stats_response["total"], stats_response["completed"], stats_response["pending"]) == (4, 1, 3)
+    assert stats_response["categories"] == [
+        {"category": None, "total": 1, "completed": 0, "pending": 1},
+        {"category": "shopping", "total": 2, "completed": 1, "pending": 1},
+        {"category": "work", "total": 1, "completed": 0, "pending": 1},
+    ]
+    today = datetime.now(timezone.utc).date().isoformat()
+    assert stats_response["created_per_day"] == [{"day": today, "created": 4}]
+
+
+def test_stats_follow_every_write_path(client: TestClient, connection):
+    task_id = client.post("/tasks/", json={"title": "Move me", "category": "home"}).json()["id"]
+    client.put(f"/tasks/{task_id}", json={"category": "work", "completed": True})
+    client.post("/tasks/import", content=b'{"title": "Imported", "category": "home"}\n')
+    client.patch("/tasks/bulk", json=[{"id": task_id, "completed": False}])
+    client.request("DELETE", "/tasks/bulk", json={"category": "home"})
+
+    categories = client.get("/tasks/stats").json()["categories"]
+    assert categories == [{"category": "work", "total": 1, "completed": 0, "pending": 1}]
+    assert stats.check(connection) == []
+
+
+def test_stats_read_only_the_summary_tables(client: TestClient, connection):
+    client.post("/tasks/bulk", json=[{"title": f"Task {i}", "category": f"c{i % 3}"} for i in range(30)])
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        assert client.get("/tasks/stats").json()["total"] == 30
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+    # Besides the ETag's version lookup, which is one index seek per table
+    version = str(crud.get_user_change_seq_stmt(models.DEFAULT_USER_ID).compile(connection))
+    assert version in statements
+    assert not any("FROM tasks" in statement for statement in statements if statement != version)
+
+
+def test_stats_etag(client: TestClient):
+    client.post("/tasks/", json={"title": "One"})
+    etag = client.get("/tasks/stats").headers["ETag"]
+    assert client.get("/tasks/stats", headers={"If-None-Match": etag}).status_code == 304
+    client.post("/tasks/", json={"title": "Two"})
+    assert client.get("/tasks/stats", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_rebuild_repairs_drifted_counters(client: TestClient, connection):
+    client.post("/tasks/bulk", json=[{"title": "A", "category": "x"}, {"title": "B", "category": "x"}])
+    connection.execute(text("UPDATE task_category_counts SET total = 7"))
+    connection.execute(text("DELETE FROM task_daily_counts"))
+    assert len(stats.check(connection)) == 2
+
+    assert len(stats.rebuild(connection)) == 2
+    assert stats.check(connection) == []
+    assert client.get("/tasks/stats").json()["categories"][0]["total"] == 2
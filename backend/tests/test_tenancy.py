@@ -0,0 +1,101 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from backend import crud, events, schemas
+from backend.database import TenantEngines
+from backend.dependencies import USER_ID_HEADER
+
+
+def _user(client: TestClient, name: str) -> dict:
+    response = client.post("/users/", json={"username": name, "email": f"{name}@example.com"})
+    assert response.status_code == 201
+    return {USER_ID_HEADER: str(response.json()["id"])}
+
+
+def test_users_only_see_their_own_tasks(client: TestClient):
+    alice, bob = _user(client, "alice"), _user(client, "bob")
+    task = client.post("/tasks/", json={"title": "Alice's report", "category": "work"}, headers=alice).json()
+    client.post("/tasks/", json={"title": "Bob's report", "category": "work"}, headers=bob)
+    task_id = task["id"]
+
+    assert [t["title"] for t in client.get("/tasks/", headers=alice).json()] == ["Alice's report"]
+    assert [t["title"] for t in client.get("/tasks/search", params={"q": "report"}, headers=bob).json()] == ["Bob's report"]
+    assert client.get(f"/tasks/{task_id}", headers=bob).status_code == 404
+    assert client.put(f"/tasks/{task_id}", json={"completed": True}, headers=bob).status_code == 404
+    assert client.delete(f"/tasks/{task_id}", headers=bob).status_code == 404
+    assert client.patch("/tasks/bulk", json=[{"id": task_id, "completed": True}], headers=bob).json()[0]["status"] == "not_found"
+    assert client.request("DELETE", "/tasks/bulk", json={"all": True}, headers=bob).json()[0]["status"] == "deleted"
+    assert client.get(f"/tasks/{task_id}", headers=alice).json()["completed"] is False
+
+    # Bob's deletion shows up in his change feed only
+    assert client.get("/tasks/changes", headers=alice).json()["deleted"] == []
+    assert len(client.get("/tasks/changes", headers=bob).json()["deleted"]) == 1
+    assert client.get("/tasks/stats", headers=alice).json()["total"] == 1
+    assert client.get("/tasks/stats", headers=bob).json()["total"] == 0
+
+
+def test_requests_without_a_user_act_as_the_default_user(client: TestClient):
+    alice = _user(client, "alice")
+    client.post("/tasks/", json={"title": "Default"})
+    assert [t["title"] for t in client.get("/tasks/").json()] == ["Default"]
+    assert client.get("/tasks/", headers=alice).json() == []
+    assert client.get("/users/1").json()["username"] == "default"
+
+
+def test_unknown_or_invalid_user_is_rejected(client: TestClient):
+    assert client.get("/tasks/", headers={USER_ID_HEADER: "999999"}).status_code == 401
+    assert client.get("/tasks/", headers={USER_ID_HEADER: "alice"}).status_code == 400
+    assert client.post("/users/", json={"username": "default", "email": "other@example.com"}).status_code == 409
+    assert client.get("/users/999999").status_code == 404
+
+
+def test_list_etags_differ_per_user(client: TestClient):
+    alice, bob = _user(client, "alice"), _user(client, "bob")
+    etag = client.get("/tasks/", headers=alice).headers["ETag"]
+    # Same change seq and query, but another user's list
+    response = client.get("/tasks/", headers={**bob, "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_list_queries_lead_with_user_id(connection):
+    query = crud.build_tasks_query(2, schemas.TaskListParams(completed=False))
+    sql = str(query.compile(connection, compile_kwargs={"literal_binds": True}))
+    plan = [row[3] for row in connection.execute(text("EXPLAIN QUERY PLAN " + sql))]
+    assert "ix_tasks_user_completed_id" in plan[0] and "user_id=?" in plan[0], plan
+
+
+def test_events_reach_only_the_owner():
+    async def scenario():
+        alice, bob = events.broker.subscribe(2), events.broker.subscribe(3)
+        try:
+            events.broker.dispatch({"type": "changed", "user_id": 3, "token": "1"})
+            await asyncio.sleep(0)
+            return alice.queue.empty(), await bob.get()
+        finally:
+            events.broker.unsubscribe(alice)
+            events.broker.unsubscribe(bob)
+    alice_empty, bob_event = asyncio.run(scenario())
+    assert alice_empty and bob_event["token"] == "1"
+
+
+def test_tenant_databases_are_separate_and_bounded(tmp_path):
+    tenants = TenantEngines(url_template=f"sqlite:///{tmp_path}/{{user_id}}.db", maxsize=2)
+    try:
+        for user_id in (2, 3):
+            with tenants.sessionmaker(user_id)() as db:
+                crud.create_task(db, user_id, schemas.TaskCreate(title=f"Task of {user_id}"))
+        # Each tenant database is migrated on first use and holds only its user's tasks
+        with tenants.sessionmaker(2)() as db:
+            assert [task.title for task in crud.get_tasks(db, 2)] == ["Task of 2"]
+            assert crud.get_user(db, 2) is not None
+        assert sorted(path.name for path in tmp_path.glob("*.db")) == ["2.db", "3.db"]
+
+        # Opening a third tenant disposes of the least recently used engine
+        tenants.sessionmaker(4)
+        assert len(tenants) == 2 and 3 not in tenants and 2 in tenants
+        with tenants.sessionmaker(3)() as db:
+            assert [task.title for task in crud.get_tasks(db, 3)] == ["Task of 3"]
+    finally:
+        tenants.dispose()
@@ -0,0 +1,156 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from . import crud
+from . import schemas
+
+# Optional group-commit write mode (TODO_GROUP_COMMIT=1).
+#
+# POST /tasks/ and PUT /tasks/{id} hand their write to a single writer thread
+# instead of committing themselves. The writer collects pending writes for up to
+# TODO_GROUP_COMMIT_MAX_DELAY_MS or TODO_GROUP_COMMIT_MAX_BATCH items and applies
+# them in one transaction (crud.apply_task_writes), then resolves each request's
+# future with its task, including the assigned ID and timestamps. SQLite allows
+# one writer at a time, so this turns N lock acquisitions and commits into one.
+#
+# At most TODO_GROUP_COMMIT_QUEUE_SIZE writes wait at once; beyond that
+# submit() raises WriterBusy and the route answers 503 with Retry-After.
+
+GROUP_COMMIT = os.getenv("TODO_GROUP_COMMIT", "").lower() in ("1", "true", "yes")
+MAX_BATCH = int(os.getenv("TODO_GROUP_COMMIT_MAX_BATCH", "200"))
+MAX_DELAY = int(os.getenv("TODO_GROUP_COMMIT_MAX_DELAY_MS", "2")) / 1000
+QUEUE_SIZE = int(os.getenv("TODO_GROUP_COMMIT_QUEUE_SIZE", "2000"))
+
+log = logging.getLogger(__name__)
+
+
+class WriterBusy(Exception):
+    """The write queue is full."""
+
+
+class PendingWrite(NamedTuple):
+    user_id: int
+    task_id: Optional[int] # None creates a task
+    values: dict
+    future: Future
+
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Single writer thread that commits queued task writes in batches."""
+
+    def __init__(self, session_factory, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY,
+                 queue_size: int = QUEUE_SIZE):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+
+    def create(self, user_id: int, task: schemas.TaskCreate) -> Future:
+        return self.submit(user_id, None, task.model_dump())
+
+    def update(self, user_id: int, task_id: int, task_update: schemas.TaskUpdate) -> Future:
+        return self.submit(user_id, task_id, task_update.model_dump(exclude_unset=True))
+
+    def submit(self, user_id: int, task_id: Optional[int], values: dict) -> Future:
+        """Queues a write; the future resolves to the task (None if an updated task does not exist)."""
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait(PendingWrite(user_id, task_id, values, future))
+        except queue.Full:
+            raise WriterBusy("Too many pending writes") from None
+        return future
+
+    def start(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+                    self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Commits everything already queued, then stops the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    # Drain what is already waiting, then linger until the deadline for more
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            # Requests cancelled while queued (client went away) are dropped uncommitted
+            batch = [write for write in batch if write.future.set_running_or_notify_cancel()]
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch: List[PendingWrite]) -> None:
+        try:
+            results = self._apply(batch)
+        except Exception:
+            # One bad write must not fail its neighbours: retry them one by one
+            log.warning(f"Grouped commit of {len(batch)} writes failed, retrying them individually")
+            for write in batch:
+                try:
+                    [result] = self._apply([write])
+                except Exception as e:
+                    write.future.set_exception(e)
+                else:
+                    write.future.set_result(result)
+            return
+        for write, result in zip(batch, results):
+            write.future.set_result(result)
+
+    def _apply(self, batch: List[PendingWrite]) -> list:
+        with self.session_factory() as db:
+            results = crud.apply_task_writes(db, [(write.user_id, write.task_id, write.values) for write in batch])
+        self.batches += 1
+        self.writes += len(batch)
+        return results
+
+
+_writer: Optional[GroupCommitWriter] = None
+
+def get_writer() -> GroupCommitWriter:
+    """The application's writer, bound to its own non-expiring sessions."""
+    global _writer
+    if _writer is None:
+        from .database import engine
+        _writer = GroupCommitWriter(sessionmaker(bind=engine, autoflush=False, expire_on_commit=False))
+    return _writer
+
+def stop_writer() -> None:
+    if _writer is not None:
+        _writer.stop()
@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Throughput/latency benchmark of the task API against a seeded database.
+#
+# Seeds 10k, 1M or 10M tasks (kept under benchmarks/.data and reused between runs),
+# drives each endpoint in-process through ASGI or against uvicorn, and writes
+# p50/p99/RPS per scenario as JSON. With --baseline the run fails (exit code 1)
+# when a scenario got slower than the stored baseline by more than the tolerance.
+#
+# Run from the project root:
+#   python benchmarks/bench_api.py --rows 10k --output bench.json
+#   python benchmarks/bench_api.py --rows 10k --mode server --workers 2 --concurrency 64
+#   python benchmarks/bench_api.py --rows 10k --baseline benchmarks/baseline.json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+SEED = 1234
+SEED_CHUNK = 50_000
+
+WORDS = ["report", "invoice", "groceries", "deploy", "review", "meeting", "email", "backup",
+         "budget", "release", "dentist", "laundry", "garden", "taxes", "slides", "refactor"]
+CATEGORIES = ["work", "home", "errands", "health", "finance", "study", "travel", "misc"]
+
+READ_SCENARIOS = ["list", "list_deep", "list_filtered", "list_fields", "get", "search", "changes", "stats"]
+WRITE_SCENARIOS = ["create", "update"]
+
+
+def parse_rows(value: str) -> int:
+    return SIZES.get(value.lower()) or int(value)
+
+
+# --- Seeding ---
+
+def seed(database_url: str, rows: int) -> int:
+    """Tops the database up to `rows` deterministic tasks; returns the current change token."""
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.orm import Session
+
+    from backend import crud, migrations, models, stats
+    from backend.database import make_engine
+
+    engine = make_engine(database_url)
+    migrations.upgrade(engine)
+    with Session(engine) as db:
+        existing = db.scalar(select(func.count()).select_from(models.Task))
+        if existing >= rows:
+            seq = crud.get_change_seq(db)
+            # Close before disposing so migration writes are checkpointed before the file is copied
+            db.close()
+            engine.dispose()
+            return seq
+        # Maintaining the search index and statistics row by row dominates load time; rebuild them once at the end
+        models.drop_search_index(db.connection())
+        models.drop_stats_triggers(db.connection())
+        db.commit()
+        rng = random.Random(SEED + existing)
+        base = datetime(2024, 1, 1)
+        started = time.perf_counter()
+        for start in range(existing, rows, SEED_CHUNK):
+            count = min(SEED_CHUNK, rows - start)
+            first_seq = crud.allocate_change_seqs(db, count)
+            params = []
+            for i in range(start, start + count):
+                created = base + timedelta(seconds=i * 30)
+                params.append({
+                    "title": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                    "description": f"{rng.choice(WORDS)} notes for task {i}" if i % 3 else None,
+                    "category": rng.choice(CATEGORIES),
+                    "completed": rng.random() < 0.3,
+                    "created_at": created,
+                    "updated_at": created,
+                    "change_seq": first_seq + i - start,
+                })
+            db.execute(insert(models.Task), params)
+            db.commit()
+            done = start + count
+            rate = (done - existing) / (time.perf_counter() - started)
+            print(f"seeded {done}/{rows} tasks ({rate:.0f} rows/s)", file=sys.stderr)
+        print("rebuilding search index and statistics", file=sys.stderr)
+        models.ensure_search_index(db.connection())
+        stats.install(db.connection())
+        db.commit()
+        seq = crud.get_change_seq(db)
+    engine.dispose()
+    return seq
+
+
+# --- Scenarios ---
+
+def make_scenarios(rows: int, change_seq: int):
+    """Maps scenario name -> function(rng) returning (method, url, json body)."""
+    from backend.pagination import encode_cursor
+
+    deep_cursor = encode_cursor(rows // 2)
+    return {
+        "list": lambda rng: ("GET", "/tasks/?limit=50", None),
+        "list_deep": lambda rng: ("GET", f"/tasks/?limit=50&cursor={deep_cursor}", None),
+        "list_filtered": lambda rng: ("GET", f"/tasks/?completed=false&category={rng.choice(CATEGORIES)}&limit=50", None),
+        "list_fields": lambda rng: ("GET", "/tasks/?limit=500&fields=id,title,completed", None),
+        "get": lambda rng: ("GET", f"/tasks/{rng.randint(1, rows)}", None),
+        "search": lambda rng: ("GET", f"/tasks/search?q={rng.choice(WORDS)}&limit=20", None),
+        "changes": lambda rng: ("GET", f"/tasks/changes?since={max(change_seq - 100, 0)}", None),
+        "stats": lambda rng: ("GET", "/tasks/stats?days=365", None),
+        "create": lambda rng: ("POST", "/tasks/", {"title": f"bench {rng.choice(WORDS)}", "category": "bench"}),
+        "update": lambda rng: ("PUT", f"/tasks/{rng.randint(1, rows)}", {"completed": rng.random() < 0.5}),
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(client, make_request, requests, concurrency, warmup):
+    rng = random.Random(SEED)
+    latencies, errors = [], 0
+
+    async def send():
+        method, url, body = make_request(rng)
+        start = time.perf_counter()
+        response = await client.request(method, url, json=body)
+        return time.perf_counter() - start, response.status_code < 400
+
+    for _ in range(warmup):
+        await send()
+
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            elapsed, ok = await send()
+            latencies.append(elapsed)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+    }
+
+
+async def run_all(client, scenarios, names, args):
+    results = {}
+    for name in names:
+        rounds = [
+            await run_scenario(client, scenarios[name], args.requests, args.concurrency, args.warmup)
+            for _ in range(args.repeat)
+        ]
+        # Median of each metric across rounds damps one-off stalls (GC, checkpoints, noisy neighbours)
+        r = results[name] = {key: statistics.median(round_[key] for round_ in rounds) for key in rounds[0]}
+        print(f"{name:<14}{r['rps']:>10.1f} req/s  p50 {r['p50_ms']:>8.2f} ms  p99 {r['p99_ms']:>8.2f} ms"
+              f"  errors {r['errors']}", file=sys.stderr)
+    return results
+
+
+# --- Targets ---
+
+async def bench_in_process(scenarios, names, args):
+    import httpx
+
+    from backend.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        return await run_all(client, scenarios, names, args)
+
+
+async def bench_server(scenarios, names, args, url):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        return await run_all(client, scenarios, names, args)
+
+
+def start_server(args, env):
+    command = [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+               "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"]
+    server = subprocess.Popen(command, cwd=ROOT, env=env)
+    url = f"http://127.0.0.1:{args.port}"
+    import httpx
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            httpx.get(url + "/", timeout=1)
+            return server, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("uvicorn did not start within 60s")
+
+
+# --- Baseline comparison ---
+
+def compare(report, baseline, tolerance, p99_tolerance):
+    """Returns a list of human-readable regressions against `baseline`."""
+    for key in ("rows", "mode", "concurrency"):
+        if baseline["meta"].get(key) != report["meta"][key]:
+            raise SystemExit(f"Baseline was recorded with {key}={baseline['meta'].get(key)!r}, "
+                             f"this run uses {report['meta'][key]!r}")
+    regressions = []
+    for name, current in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        # (metric, allowed relative change, True if larger is worse)
+        for metric, allowed, larger_is_worse in (("p50_ms", tolerance, True),
+                                                 ("p99_ms", p99_tolerance, True),
+                                                 ("rps", tolerance, False)):
+            if not base[metric]:
+                continue
+            change = (current[metric] - base[metric]) / base[metric]
+            if (change if larger_is_worse else -change) > allowed:
+                regressions.append(f"{name} {metric}: {base[metric]} -> {current[metric]} ({change:+.0%})")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name} errors: {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the task API.")
+    parser.add_argument("--rows", default="10k", help="Tasks to seed: 10k, 1m, 10m or a number.")
+    parser.add_argument("--mode", choices=["in-process", "server"], default="in-process",
+                        help="Drive the ASGI app directly or through uvicorn over HTTP.")
+    parser.add_argument("--url", help="Benchmark an already running server instead of starting uvicorn.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (server mode).")
+    parser.add_argument("--port", type=int, default=8765, help="uvicorn port (server mode).")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests in flight.")
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests per scenario.")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per scenario.")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds per scenario; the median is reported.")
+    parser.add_argument("--scenarios", default=",".join(READ_SCENARIOS + WRITE_SCENARIOS),
+                        help="Comma-separated scenarios; writes modify the seeded database.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Where seeded databases are kept.")
+    parser.add_argument("--in-place", action="store_true",
+                        help="Run against the seeded database instead of a copy (saves disk for 10m).")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout).")
+    parser.add_argument("--baseline", help="JSON report to compare against; exit 1 on regression.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed p50/RPS slowdown (0.15 = 15%%).")
+    parser.add_argument("--p99-tolerance", type=float, default=0.5, help="Allowed p99 slowdown.")
+    args = parser.parse_args()
+
+    # The app configures INFO logging; a log line per request would dominate the numbers
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    rows = parse_rows(args.rows)
+    os.makedirs(args.data_dir, exist_ok=True)
+    seeded_file = os.path.join(args.data_dir, f"tasks_{rows}.db")
+    # Write scenarios run against a copy so every run starts from the same data
+    run_file = seeded_file if args.in_place else os.path.join(args.data_dir, f"tasks_{rows}.run.db")
+    # The app reads its database URL when backend.database is first imported
+    os.environ["TODO_DATABASE_URL"] = f"sqlite:///{run_file}"
+
+    change_seq = seed(f"sqlite:///{seeded_file}", rows)
+    if not args.in_place:
+        for stale in (f"{run_file}-wal", f"{run_file}-shm"): # would be replayed onto the fresh copy
+            if os.path.exists(stale):
+                os.remove(stale)
+        shutil.copyfile(seeded_file, run_file)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    scenarios = make_scenarios(rows, change_seq)
+    unknown = set(names) - set(scenarios)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.mode == "in-process":
+        results = asyncio.run(bench_in_process(scenarios, names, args))
+    elif args.url:
+        results = asyncio.run(bench_server(scenarios, names, args, args.url.rstrip("/")))
+    else:
+        server, url = start_server(args, dict(os.environ))
+        try:
+            results = asyncio.run(bench_server(scenarios, names, args, url))
+        finally:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "meta": {
+            "rows": rows,
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "server" else None,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "repeat": args.repeat,
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.p99_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
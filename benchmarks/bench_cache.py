@@ -0,0 +1,52 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Measures read latency of the task endpoints with and without the response cache.
+# Run from the project root: python benchmarks/bench_cache.py
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_cache.db")
+os.environ["TODO_DATABASE_URL"] = f"sqlite:///{DB_FILE}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient # noqa: E402
+
+from backend import cache as cache_module # noqa: E402
+from backend.main import app # noqa: E402
+
+
+def measure(client, url, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the task response cache.")
+    parser.add_argument("--tasks", type=int, default=1000, help="Number of tasks to seed.")
+    parser.add_argument("--iterations", type=int, default=500, help="Requests per endpoint and backend.")
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        client.post("/tasks/bulk", json=[{"title": f"Task {i}", "category": "bench"} for i in range(args.tasks)])
+        urls = {"single": "/tasks/1", "list (100)": "/tasks/?limit=100", "list (1000)": "/tasks/?limit=1000"}
+        print(f"{'endpoint':<14}{'no cache':>12}{'memory':>12}{'speedup':>10}")
+        for name, url in urls.items():
+            cache_module.set_cache(cache_module.NullCache())
+            uncached = measure(client, url, args.iterations)
+            cache_module.set_cache(cache_module.LRUCache())
+            cached = measure(client, url, args.iterations)
+            print(f"{name:<14}{uncached:>10.2f}ms{cached:>10.2f}ms{uncached / cached:>9.1f}x")
+
+    os.remove(DB_FILE)
+
+
+if __name__ == "__main__":
+    main()
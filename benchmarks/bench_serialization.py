@@ -0,0 +1,79 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+# Measures the cost of building a GET /tasks/ page per 1k tasks: the old ORM +
+# Pydantic pipeline against the Core rows + orjson path (full and sparse fields).
+# Run from the project root: python benchmarks/bench_serialization.py
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_serialization.db")
+os.environ["TODO_DATABASE_URL"] = f"sqlite:///{DB_FILE}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter # noqa: E402
+
+from backend import crud, migrations, schemas # noqa: E402
+from backend.database import SessionLocal, engine # noqa: E402
+from backend.models import DEFAULT_USER_ID # noqa: E402
+from backend.responses import TASK_FIELDS, dumps, orjson, parse_fields, rows_to_dicts # noqa: E402
+
+task_list_adapter = TypeAdapter(List[schemas.Task])
+
+
+def orm_pydantic(db, limit):
+    tasks = crud.get_tasks(db, DEFAULT_USER_ID, limit=limit)
+    return task_list_adapter.dump_json(task_list_adapter.validate_python(tasks, from_attributes=True))
+
+
+def core_rows(db, limit, fields=TASK_FIELDS):
+    return dumps(rows_to_dicts(crud.get_task_rows(db, DEFAULT_USER_ID, fields, limit=limit), fields))
+
+
+def measure(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        db = SessionLocal()
+        start = time.perf_counter()
+        fn(db)
+        samples.append(time.perf_counter() - start)
+        db.close()
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark task list serialization.")
+    parser.add_argument("--page-size", type=int, default=1000, help="Tasks per page.")
+    parser.add_argument("--iterations", type=int, default=50, help="Pages built per variant.")
+    args = parser.parse_args()
+
+    migrations.upgrade(engine)
+    db = SessionLocal()
+    crud.create_tasks(db, DEFAULT_USER_ID, [
+        schemas.TaskCreate(title=f"Task {i}", description="Some details " * 5, category="bench")
+        for i in range(args.page_size)
+    ])
+    db.close()
+
+    per_1k = 1000 / args.page_size
+    variants = {
+        "ORM + Pydantic": lambda db: orm_pydantic(db, args.page_size),
+        "Core rows": lambda db: core_rows(db, args.page_size),
+        "Core rows, id,title,completed": lambda db: core_rows(db, args.page_size, parse_fields("id,title,completed")),
+    }
+    print(f"encoder: {'orjson' if orjson else 'json (orjson not installed)'}")
+    baseline = None
+    for name, fn in variants.items():
+        ms = measure(fn, args.iterations) * per_1k
+        baseline = baseline or ms
+        print(f"{name:<32}{ms:>8.2f} ms / 1k tasks{baseline / ms:>7.1f}x")
+
+    engine.dispose()
+    os.remove(DB_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,90 @@
-import { useState, useCallback, useEffect } from 'react';
+import { useState, useCallback, useEffect, useRef } from 'react';
 import axios from 'axios';
 
 const API_URL = 'http://localhost:8000'; // Keep API URL definition here
 
+const withDate = (task) => {
+  // Ensure incoming string is treated as UTC by appending 'Z'
+  const utcCreatedAtString = task.created_at + 'Z';
+  return {
+      ...task,
+      createdAt: new Date(utcCreatedAtString) // Parse as UTC
+  };
+};
+
 export function useTaskManager() {
   const [tasks, setTasks] = useState([]);
   const [error, setError] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
+  // Change token of the last delta applied to `tasks` ('0' = nothing fetched yet)
+  const syncToken = useRef('0');
 
+  // Fetch only what changed since the last sync and patch local state
+  const fetchChanges = useCallback(async () => {
+    let hasMore = true;
+    while (hasMore) {
+      let response;
+      try {
+        response = await axios.get(`${API_URL}/tasks/changes`, {
+          params: { since: syncToken.current }
+        });
+      } catch (err) {
+        if (err.response?.status !== 410) throw err;
+        // Our token is older than the retained history: start over
+        syncToken.current = '0';
+        setTasks([]);
+        continue;
+      }
+      const { tasks: changed, deleted, token, has_more } = response.data;
+      setTasks(current => {
+        const byId = new Map(current.map(task => [task.id, task]));
+        deleted.forEach(id => byId.delete(id));
+        changed.forEach(task => byId.set(task.id, withDate(task)));
+        return Array.from(byId.values()).sort((a, b) => a.id - b.id);
+      });
+      syncToken.current = token;
+      hasMore = has_more;
+    }
+  }, []);
+
+  // Full reload: start the change feed over from the beginning
   const fetchTasks = useCallback(async () => {
     setIsLoading(true);
     setError(null);
     try {
-      const response = await axios.get(`${API_URL}/tasks/`);
-      const tasksWithDate = response.data.map(task => {
-        // Ensure incoming string is treated as UTC by appending 'Z'
-        const utcCreatedAtString = task.created_at + 'Z';
-        return {
-            ...task,
-            createdAt: new Date(utcCreatedAtString) // Parse as UTC
-        };
-      });
-      setTasks(tasksWithDate);
+      syncToken.current = '0';
+      setTasks([]);
+      await fetchChanges();
     } catch (err) {
       console.error("Error fetching tasks:", err);
       setError("Failed to load tasks.");
     } finally {
       setIsLoading(false);
     }
-  }, []);
+  }, [fetchChanges]);
 
   // Initial fetch on mount
   useEffect(() => {
     fetchTasks();
   }, [fetchTasks]);
 
+  // Live updates from other tabs/clients: every pushed event (or a "resync" after
+  // falling behind) pulls the delta since our token; events we already applied are no-ops
+  useEffect(() => {
+    const source = new EventSource(`${API_URL}/tasks/stream`);
+    const onEvent = (event) => {
+      if (event.lastEventId && Number(event.lastEventId) <= Number(syncToken.current)) return;
+      fetchChanges().catch(err => console.error("Error syncing tasks:", err));
+    };
+    ['created', 'updated', 'deleted', 'changed', 'resync'].forEach(type => source.addEventListener(type, onEvent));
+    return () => source.close();
+  }, [fetchChanges]);
+
   const addTask = async (taskTitle) => {
     setError(null);
     try {
       await axios.post(`${API_URL}/tasks/`, { title: taskTitle });
-      await fetchTasks(); 
+      await fetchChanges();
     } catch (err) {
       console.error("Error adding task:", err);
       setError("Failed to add task.");
@@ -51,7 +96,7 @@ export function useTaskManager() {
     setError(null);
     try {
       await axios.put(`${API_URL}/tasks/${taskId}`, { completed: !currentStatus });
-      await fetchTasks(); 
+      await fetchChanges();
     } catch (err) {
       console.error("Error updating task completion:", err);
       setError("Failed to update task status.");
@@ -63,7 +108,7 @@ export function useTaskManager() {
     setError(null);
     try {
       await axios.delete(`${API_URL}/tasks/${taskId}`);
-      await fetchTasks(); 
+      await fetchChanges();
     } catch (err) {
       console.error("Error deleting task:", err);
       setError("Failed to delete task.");
@@ -79,7 +124,7 @@ export function useTaskManager() {
     setError(null);
     try {
       await axios.put(`${API_URL}/tasks/${taskId}`, { title: newTitle });
-      await fetchTasks(); 
+      await fetchChanges();
     } catch (err) {
       console.error("Error saving task edit:", err);
       setError("Failed to save edit.");
@@ -1,12 +1,11 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import argparse # Import argparse
 # Import directly from the backend package
-from backend.database import DATABASE_URL, create_db_tables
+from backend.database import DATABASE_URL, make_engine
 from backend import models
 
-# Create engine (need check_same_thread for SQLite)
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Create engine with the same settings (pragmas, pool) as the backend
+engine = make_engine(DATABASE_URL)
 
 # Create a session maker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -40,7 +39,7 @@ def main():
     
     # Ensure tables exist before querying
     # print("Ensuring database tables exist...")
-    # create_db_tables() # Usually not needed if backend creates tables
+    # upgrade(engine) # Usually not needed: run `python -m backend.migrations` instead
     # print("Tables should exist now.")
 
     db = SessionLocal()
@@ -63,14 +62,15 @@ def main():
             else:
                 print("No tasks found in the database.")
         else:
-            # Default: show all tasks
-            tasks = query.order_by(models.Task.id).all()
-            if not tasks:
+            # Default: show all tasks, streamed in batches instead of loading the whole table
+            count = 0
+            for task in query.order_by(models.Task.id).yield_per(1000):
+                print_task_details(task, show_timestamps=show_timestamps_flag)
+                count += 1
+            if not count:
                 print("No tasks found in the database.")
             else:
-                print(f"Found {len(tasks)} task(s):")
-                for task in tasks:
-                    print_task_details(task, show_timestamps=show_timestamps_flag)
+                print(f"Found {count} task(s).")
                 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+# Simple load generator for comparing the sync and async backends.
+# Start the server once normally and once with TODO_ASYNC_DB=1, then run this against each.
+
+API_URL = "http://localhost:8000/tasks/"
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def worker(client, queue, latencies, errors):
+    while True:
+        try:
+            kind, task_id = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            if kind == "create":
+                response = await client.post(API_URL, json={"title": "load test"})
+            elif kind == "read":
+                response = await client.get(f"{API_URL}{task_id}")
+            else:
+                response = await client.get(API_URL, params={"limit": 50})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            errors.append(kind)
+
+async def run(requests, concurrency, read_ratio):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        seed = await client.post(API_URL, json={"title": "load test seed"})
+        seed.raise_for_status()
+        seed_id = seed.json()["id"]
+
+        queue = asyncio.Queue()
+        reads = int(requests * read_ratio)
+        for i in range(requests):
+            if i < reads:
+                queue.put_nowait(("read" if i % 2 else "list", seed_id))
+            else:
+                queue.put_nowait(("create", None))
+
+        latencies, errors = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, queue, latencies, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    print(f"Requests:    {len(latencies)} ok, {len(errors)} failed in {elapsed:.2f}s")
+    print(f"Throughput:  {len(latencies) / elapsed:.1f} req/s")
+    if latencies:
+        print(f"Latency p50: {percentile(latencies, 50) * 1000:.1f} ms")
+        print(f"Latency p99: {percentile(latencies, 99) * 1000:.1f} ms")
+        print(f"Latency avg: {statistics.mean(latencies) * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the task API.")
+    parser.add_argument("--requests", type=int, default=2000, help="Total number of requests to send.")
+    parser.add_argument("--concurrency", type=int, default=50, help="Number of concurrent clients.")
+    parser.add_argument("--read-ratio", type=float, default=0.8, help="Fraction of requests that are reads.")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.read_ratio))
+
+if __name__ == "__main__":
+    main()